@@ -3,17 +3,36 @@ FastAPI service for transport mode detection.
 Provides REST API endpoints for training and prediction.
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request, Depends, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Dict, Any, Optional, Union
 import uvicorn
+import asyncio
+import concurrent.futures
+import contextlib
 import json
 import os
+import threading
+import uuid
 from datetime import datetime
 
 from .transport_mode_detector import TransportModeDetector
-from .feature_extraction import SensorData
+from .feature_store import FeatureStore
+from .model_registry import ModelRegistry
+from .batching import MicroBatcher
+from .execution import BoundedExecutor, ExecutorSaturated
+from .training_jobs import TrainingJobManager, QUEUED, RUNNING
+from . import kernels
+from .feature_extraction import SensorBatch
+from .sessions import DeviceSession, SessionManager, SessionNotFound
+from .batch_prediction import NDJSON_CONTENT_TYPE, BatchPredictionPool, NDJSONLines
+from .payloads import (
+    BINARY_CONTENT_TYPE, COLUMNAR_JSON_CONTENT_TYPE, content_type, decode_binary, decode_columns
+)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -31,8 +50,177 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize the detector
-detector = TransportModeDetector()
+# Models are served from the versioned registry; training reuses features
+# cached from earlier runs
+registry = ModelRegistry(os.environ.get('ML_MODEL_REGISTRY', 'models/registry'))
+
+# With ML_CASCADE_THRESHOLD set, windows the cheap first stage classifies
+# with at least that confidence skip full feature extraction and the forest
+CASCADE_THRESHOLD = float(os.environ['ML_CASCADE_THRESHOLD']) if os.environ.get('ML_CASCADE_THRESHOLD') else None
+
+detector = TransportModeDetector(feature_store=FeatureStore(), registry=registry,
+                                 cascade_threshold=CASCADE_THRESHOLD)
+
+# Seconds between checks for a newly activated model version (0 disables)
+MODEL_RELOAD_INTERVAL = float(os.environ.get('ML_MODEL_RELOAD_INTERVAL', '5'))
+
+# 'portable' serves registry versions from their NumPy archive, so the
+# service starts without importing scikit-learn; 'full' unpickles the estimator
+PORTABLE_SERVING = os.environ.get('ML_SERVING_MODE', 'portable') == 'portable'
+
+# Longest a finished training job waits for the event loop to activate its model
+TRAINING_ACTIVATION_TIMEOUT = float(os.environ.get('ML_TRAINING_ACTIVATION_TIMEOUT', '30'))
+
+# Held while switching versions so the watcher and the admin endpoints
+# cannot interleave a load and an activation
+model_reload_lock = asyncio.Lock()
+
+def _swap_detector(trained: TransportModeDetector):
+    """
+    Serve a newly trained detector.
+    
+    Handlers look up `detector` per request, so rebinding it switches every
+    new request at once while requests already holding the old detector
+    finish on it.
+    """
+    global detector
+    trained.feature_store = detector.feature_store
+    trained.cascade_threshold = detector.cascade_threshold
+    detector = trained
+    if hybrid_engine is not None:
+        hybrid_engine.tmd_detector = trained
+    print(f"Serving model version {trained.model_version}")
+
+def _load_version(version: Optional[str] = None) -> TransportModeDetector:
+    """Load a registry version (default: the active one) into a new detector."""
+    loaded = TransportModeDetector(registry=registry)
+    if not loaded.load_model(version, portable=PORTABLE_SERVING):
+        raise RuntimeError(f"Model version {version or registry.active_version()} could not be loaded")
+    return loaded
+
+async def _reload(version: Optional[str] = None):
+    """Load a registry version off the event loop and serve it."""
+    loaded = await asyncio.get_running_loop().run_in_executor(None, _load_version, version)
+    _swap_detector(loaded)
+
+async def _watch_registry():
+    """
+    Serve whichever version is active in the registry.
+    
+    Picks up versions activated by another worker process, by train_model.py
+    or by editing the registry on disk, without a restart.
+    """
+    while True:
+        await asyncio.sleep(MODEL_RELOAD_INTERVAL)
+        try:
+            async with model_reload_lock:
+                active = registry.active_version()
+                if active is not None and active != detector.model_version:
+                    await _reload(active)
+        except Exception as e:
+            print(f"Model reload failed: {e}")
+
+async def _activate_trained(trained: TransportModeDetector, claim: threading.Lock):
+    """
+    Activate a finished training job's version and serve it, in turn with the watcher and admin endpoints.
+    
+    Skipped if the job thread has already given up waiting and taken claim.
+    """
+    async with model_reload_lock:
+        if not claim.acquire(blocking=False):
+            return
+        registry.activate(trained.model_version)
+        _swap_detector(trained)
+
+def _complete_training(trained: TransportModeDetector):
+    """
+    Training job callback: run the activation on the event loop.
+    
+    Called on the training job thread; blocks it until the version is
+    active and served, so a job only reports success once it is. If the
+    loop does not get to it within TRAINING_ACTIVATION_TIMEOUT the job
+    fails and the activation is called off.
+    
+    Raises:
+        RuntimeError: If the activation timed out
+    """
+    claim = threading.Lock()
+    future = asyncio.run_coroutine_threadsafe(_activate_trained(trained, claim), app.state.loop)
+    try:
+        future.result(timeout=TRAINING_ACTIVATION_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        if claim.acquire(blocking=False):
+            future.cancel()
+            raise RuntimeError(f"activation timed out after {TRAINING_ACTIVATION_TIMEOUT:g}s")
+        # The activation has started and no longer awaits anything
+        future.result()
+
+# Training runs as background jobs in a separate process
+training_jobs = TrainingJobManager(
+    registry,
+    on_complete=_complete_training,
+    extractor_config=lambda: detector.feature_extractor.get_config(),
+    feature_store_root=detector.feature_store.root,
+    portable=PORTABLE_SERVING
+)
+
+# Inference runs on bounded worker pools, never on the event loop, so
+# health checks stay responsive and overload is answered with 429. The
+# batcher owns every slot of inference_executor; other paths that score
+# windows get pools of their own so they cannot take workers from it
+inference_executor = BoundedExecutor(
+    'inference', max_workers=int(os.environ.get('ML_INFERENCE_WORKERS', '2')), max_queue=0
+)
+
+# Concurrent /predict requests are scored together, one model pass per batch
+batcher = MicroBatcher(
+    lambda traces: detector.predict_many(traces),
+    max_batch_size=int(os.environ.get('ML_BATCH_MAX_SIZE', '32')),
+    max_wait_ms=float(os.environ.get('ML_BATCH_MAX_WAIT_MS', '5')),
+    max_queue_size=int(os.environ.get('ML_PREDICT_QUEUE_SIZE', '1024')),
+    executor=inference_executor
+)
+
+# Device sessions keep each device's window tail between uploads
+session_executor = BoundedExecutor(
+    'sessions', max_workers=int(os.environ.get('ML_SESSION_WORKERS', '2')),
+    max_queue=int(os.environ.get('ML_SESSION_QUEUE_SIZE', '16'))
+)
+sessions = SessionManager(
+    ttl_seconds=float(os.environ.get('ML_SESSION_TTL_SECONDS', '600')),
+    max_memory_bytes=int(float(os.environ.get('ML_SESSION_MAX_MEMORY_MB', '64')) * 1024 * 1024)
+)
+
+# Chunks a live WebSocket connection may have waiting for inference before
+# the server stops reading from it
+WS_MAX_PENDING = int(os.environ.get('ML_WS_MAX_PENDING', '8'))
+
+# Live connections score on their own pool; a connection whose chunk is
+# rejected backs off and merges what arrives meanwhile into its next pass
+live_executor = BoundedExecutor(
+    'live', max_workers=int(os.environ.get('ML_WS_WORKERS', '2')), max_queue=0
+)
+
+# /infer/hybrid shares one engine, built on first use so that the service
+# starts without importing the GTFS stack (pandas)
+GTFS_DB_PATH = os.environ.get('ML_GTFS_DB_PATH', 'data/gtfs.db')
+hybrid_engine = None
+hybrid_engine_lock = asyncio.Lock()
+
+# Hybrid requests hold a worker through the sensor stage and the GTFS wait,
+# so they run on their own pool; the engine gets one lookup thread per worker
+hybrid_executor = BoundedExecutor(
+    'hybrid', max_workers=int(os.environ.get('ML_HYBRID_WORKERS', '2')),
+    max_queue=int(os.environ.get('ML_HYBRID_QUEUE_SIZE', '16'))
+)
+
+# Bulk /predict/batch requests are scored in worker processes, apart from
+# the inference threads that serve online requests
+backfill_pool = BatchPredictionPool(
+    n_workers=int(os.environ['ML_BACKFILL_WORKERS']) if os.environ.get('ML_BACKFILL_WORKERS') else None,
+    shard_size=int(os.environ.get('ML_BACKFILL_SHARD_SIZE', '16')),
+    portable=PORTABLE_SERVING
+)
 
 # Pydantic models for API requests/responses
 class SensorDataPoint(BaseModel):
@@ -67,14 +255,23 @@ class TrainingRequest(BaseModel):
     generate_synthetic: bool = False
     num_synthetic_samples: int = 1000
 
-class TrainingResponse(BaseModel):
-    success: bool
-    message: str
+class TrainingJobResponse(BaseModel):
+    job_id: str
+    status: str
+    progress: float
+    stage: str
+    num_samples: int
     metrics: Optional[Dict[str, float]] = None
+    model_version: Optional[str] = None
+    error: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
 
 class ModelInfoResponse(BaseModel):
     is_trained: bool
     model_path: str
+    model_version: Optional[str] = None
     feature_count: Optional[int] = None
     transport_modes: List[str]
     last_trained: Optional[str] = None
@@ -82,16 +279,172 @@ class ModelInfoResponse(BaseModel):
 class FeatureImportanceResponse(BaseModel):
     feature_importance: Dict[str, float]
 
+class SessionRequest(BaseModel):
+    device_id: str = Field(..., description="Client device identifier")
+
+class SessionResponse(BaseModel):
+    session_id: str
+    device_id: str
+    created_at: str
+    samples_received: int
+    windows_emitted: int
+    window_size: int
+    step_size: int
+
+class SessionPredictionResponse(BaseModel):
+    session_id: str
+    samples_received: int
+    windows_emitted: int
+    predictions: List[PredictionResponse]
+
+class HybridInferenceResponse(PredictionResponse):
+    evidence: Dict[str, Any]
+
+class ModelVersionsResponse(BaseModel):
+    active_version: Optional[str] = None
+    serving_version: Optional[str] = None
+    history: List[str]
+    versions: List[Dict[str, Any]]
+
+async def read_sensor_batch(request: Request) -> SensorBatch:
+    """
+    Decode a prediction request body into a sensor batch, by Content-Type.
+    
+    - application/json: {"sensor_data": [point, ...]} validated per point as
+      before, or {"sensor_data": {channel: [values]}} decoded per channel
+    - application/vnd.sensor-batch+json: the columnar form only
+    - application/vnd.sensor-batch: binary typed arrays (see payloads.py),
+      decoded without copying
+    """
+    media_type = content_type(request.headers.get('content-type'))
+    if media_type not in ('application/json', COLUMNAR_JSON_CONTENT_TYPE, BINARY_CONTENT_TYPE):
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported content type {media_type}; use application/json, "
+                   f"{COLUMNAR_JSON_CONTENT_TYPE} or {BINARY_CONTENT_TYPE}"
+        )
+    
+    body = await request.body()
+    try:
+        if media_type == BINARY_CONTENT_TYPE:
+            return decode_binary(body)
+        return _decode_json(json.loads(body), columnar=media_type == COLUMNAR_JSON_CONTENT_TYPE)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _decode_json(payload: Any, columnar: bool = False) -> SensorBatch:
+    """Sensor batch from a parsed JSON body, per point or (if sensor_data is an object) columnar."""
+    sensor_data = payload.get('sensor_data') if isinstance(payload, dict) else None
+    if columnar or isinstance(sensor_data, dict):
+        return decode_columns(sensor_data)
+    return SensorBatch.from_sensor_data(PredictionRequest.model_validate(payload).sensor_data)
+
+async def read_journeys(request: Request) -> Union[NDJSONLines, List[Any]]:
+    """
+    Split a /predict/batch body into journeys, by Content-Type.
+    
+    - application/x-ndjson: one {"journey_id", "sensor_data"} object per
+      line; lines are read from the request stream as they are scored and
+      parsed in the worker processes, so the body is never held in memory
+    - application/json: {"journeys": [{"journey_id", "sensor_data"}, ...]},
+      read whole; for small requests
+    """
+    media_type = content_type(request.headers.get('content-type'))
+    if media_type not in ('application/json', NDJSON_CONTENT_TYPE):
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported content type {media_type}; use {NDJSON_CONTENT_TYPE} or application/json"
+        )
+    
+    if media_type == NDJSON_CONTENT_TYPE:
+        return NDJSONLines(request.stream())
+    body = await request.body()
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Body is not valid JSON: {e}")
+    journeys = payload.get('journeys') if isinstance(payload, dict) else None
+    if not isinstance(journeys, list):
+        raise HTTPException(status_code=400, detail="Body must be {\"journeys\": [...]}")
+    return journeys
+
+# Request body documentation for endpoints that take read_sensor_batch
+SENSOR_BATCH_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": PredictionRequest.model_json_schema()},
+            COLUMNAR_JSON_CONTENT_TYPE: {"schema": {"type": "object", "properties": {"sensor_data": {
+                "type": "object", "additionalProperties": {"type": "array", "items": {"type": "number"}}
+            }}}},
+            BINARY_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}}
+        }
+    }
+}
+
+# Request body documentation for /predict/batch
+JOURNEY_BATCH_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            NDJSON_CONTENT_TYPE: {"schema": {"type": "string", "description": "One journey object per line"}},
+            "application/json": {"schema": {"type": "object", "properties": {"journeys": {
+                "type": "array", "items": {"type": "object", "properties": {
+                    "journey_id": {}, "sensor_data": {}
+                }}
+            }}}}
+        }
+    }
+}
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the model on startup."""
     print("Starting Transport Mode Detection API...")
     
+    # Compile JIT feature kernels (if numba is installed) before the first request
+    kernels.warm_up()
+    print(f"Feature kernels: {kernels.BACKEND}")
+    
     # Try to load existing model
-    if detector.load_model():
+    if detector.load_model(portable=PORTABLE_SERVING):
         print("Loaded existing trained model")
     else:
         print("No existing model found. Train a model using /train endpoint")
+    
+    # Finished training jobs hand their model swap to this loop
+    app.state.loop = asyncio.get_running_loop()
+    batcher.start()
+    if MODEL_RELOAD_INTERVAL > 0:
+        app.state.registry_watcher = asyncio.get_running_loop().create_task(_watch_registry())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the registry watcher, prediction batcher, worker pools and training jobs."""
+    watcher = getattr(app.state, 'registry_watcher', None)
+    if watcher is not None:
+        watcher.cancel()
+    await batcher.stop()
+    inference_executor.shutdown()
+    session_executor.shutdown()
+    live_executor.shutdown()
+    hybrid_executor.shutdown()
+    backfill_pool.shutdown()
+    if hybrid_engine is not None:
+        hybrid_engine.shutdown()
+    # Off the loop: a finishing job may be waiting for it to activate its model
+    await asyncio.get_running_loop().run_in_executor(None, training_jobs.shutdown)
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    """Tell clients to back off instead of queueing without bound."""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 @app.get("/", response_model=Dict[str, str])
 async def root():
@@ -102,7 +455,7 @@ async def root():
         "status": "running"
     }
 
-@app.get("/health", response_model=Dict[str, str])
+@app.get("/health", response_model=Dict[str, Any])
 async def health_check():
     """Health check endpoint."""
     return {
@@ -117,11 +470,95 @@ async def get_model_info():
     return ModelInfoResponse(
         is_trained=detector.is_trained,
         model_path=detector.model_path,
+        model_version=detector.model_version,
         feature_count=len(detector.feature_names) if detector.feature_names else None,
         transport_modes=detector.TRANSPORT_MODES,
         last_trained=detector.model_path if os.path.exists(detector.model_path) else None
     )
 
+@app.get("/model/versions", response_model=ModelVersionsResponse)
+async def list_model_versions():
+    """List registry versions with their manifests, and which one is active and served."""
+    return ModelVersionsResponse(
+        active_version=registry.active_version(),
+        serving_version=detector.model_version,
+        history=registry.history(),
+        versions=[registry.manifest(version) for version in registry.versions()]
+    )
+
+@app.post("/model/reload", response_model=ModelInfoResponse)
+async def reload_model():
+    """Load and serve the registry's active version now."""
+    if registry.active_version() is None:
+        raise HTTPException(status_code=404, detail="No active model version")
+    try:
+        async with model_reload_lock:
+            await _reload()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed: {str(e)}")
+    return await get_model_info()
+
+@app.post("/model/versions/{version}/activate", response_model=ModelInfoResponse)
+async def activate_model_version(version: str):
+    """Serve a specific registry version and make it the active one."""
+    if version not in registry.versions():
+        raise HTTPException(status_code=404, detail="Model version not found")
+    async with model_reload_lock:
+        try:
+            # Load before activating so a broken version is never marked active
+            await _reload(version)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Activation failed: {str(e)}")
+        registry.activate(version)
+    return await get_model_info()
+
+@app.post("/model/rollback", response_model=ModelInfoResponse)
+async def rollback_model():
+    """Serve the version that was active before the current one."""
+    async with model_reload_lock:
+        version = registry.previous_version()
+        if version is None:
+            raise HTTPException(status_code=409, detail="No previous model version to roll back to")
+        try:
+            await _reload(version)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Rollback failed: {str(e)}")
+        registry.rollback()
+    return await get_model_info()
+
+@app.get("/metrics/batching", response_model=Dict[str, Any])
+async def get_batching_metrics():
+    """Queue depth and batch-size statistics of the prediction batcher."""
+    return batcher.get_metrics()
+
+@app.get("/metrics/cascade", response_model=Dict[str, Any])
+async def get_cascade_metrics():
+    """Share of windows answered by the cascade's first stage since the model was loaded."""
+    stats = detector.cascade_stats
+    return {
+        "enabled": detector.cascade is not None and detector.cascade_threshold is not None,
+        "threshold": detector.cascade_threshold,
+        "windows": stats['windows'],
+        "early_exits": stats['exits'],
+        "early_exit_rate": stats['exits'] / stats['windows'] if stats['windows'] else 0.0
+    }
+
+@app.get("/metrics/executors", response_model=Dict[str, Any])
+async def get_executor_metrics():
+    """Occupancy of the worker pools, the backfill process pool and the training job queue."""
+    jobs = training_jobs.jobs()
+    return {
+        "inference": inference_executor.get_metrics(),
+        "sessions": session_executor.get_metrics(),
+        "live": live_executor.get_metrics(),
+        "hybrid": hybrid_executor.get_metrics(),
+        "backfill": backfill_pool.get_metrics(),
+        "training": {
+            "queued": sum(job.status == QUEUED for job in jobs),
+            "running": sum(job.status == RUNNING for job in jobs)
+        }
+    }
+
 @app.get("/model/features/importance", response_model=FeatureImportanceResponse)
 async def get_feature_importance():
     """Get feature importance scores."""
@@ -131,14 +568,14 @@ async def get_feature_importance():
     importance = detector.get_feature_importance()
     return FeatureImportanceResponse(feature_importance=importance)
 
-@app.post("/predict", response_model=List[PredictionResponse])
-async def predict_transport_mode(request: PredictionRequest):
+@app.post("/predict", response_model=List[PredictionResponse], openapi_extra=SENSOR_BATCH_BODY)
+async def predict_transport_mode(sensor_data: SensorBatch = Depends(read_sensor_batch)):
     """
     Predict transport mode for sensor data.
     
     Args:
-        request: Sensor data points
-        
+        sensor_data: Sensor data points, per point or columnar (see read_sensor_batch)
+    
     Returns:
         List of predictions with confidence scores
     """
@@ -146,41 +583,24 @@ async def predict_transport_mode(request: PredictionRequest):
         raise HTTPException(status_code=400, detail="Model not trained. Please train the model first.")
     
     try:
-        # Convert to SensorData objects
-        sensor_data = [
-            SensorData(
-                timestamp=point.timestamp,
-                acceleration_x=point.acceleration_x,
-                acceleration_y=point.acceleration_y,
-                acceleration_z=point.acceleration_z,
-                gyroscope_x=point.gyroscope_x,
-                gyroscope_y=point.gyroscope_y,
-                gyroscope_z=point.gyroscope_z,
-                latitude=point.latitude,
-                longitude=point.longitude,
-                speed=point.speed,
-                heading=point.heading,
-                accuracy=point.accuracy
-            )
-            for point in request.sensor_data
-        ]
-        
-        # Make predictions
-        predictions = detector.predict(sensor_data)
+        # Make predictions, batched with concurrent requests
+        predictions = await batcher.submit(sensor_data)
         
         return predictions
-        
+    
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
-@app.post("/predict/single", response_model=PredictionResponse)
-async def predict_single_window(request: PredictionRequest):
+@app.post("/predict/single", response_model=PredictionResponse, openapi_extra=SENSOR_BATCH_BODY)
+async def predict_single_window(sensor_data: SensorBatch = Depends(read_sensor_batch)):
     """
     Predict transport mode for a single window of sensor data.
     
     Args:
-        request: Sensor data points (should be window_size length)
-        
+        sensor_data: Sensor data points (should be window_size length)
+    
     Returns:
         Single prediction with confidence score
     """
@@ -188,104 +608,346 @@ async def predict_single_window(request: PredictionRequest):
         raise HTTPException(status_code=400, detail="Model not trained. Please train the model first.")
     
     try:
-        # Convert to SensorData objects
-        sensor_data = [
-            SensorData(
-                timestamp=point.timestamp,
-                acceleration_x=point.acceleration_x,
-                acceleration_y=point.acceleration_y,
-                acceleration_z=point.acceleration_z,
-                gyroscope_x=point.gyroscope_x,
-                gyroscope_y=point.gyroscope_y,
-                gyroscope_z=point.gyroscope_z,
-                latitude=point.latitude,
-                longitude=point.longitude,
-                speed=point.speed,
-                heading=point.heading,
-                accuracy=point.accuracy
-            )
-            for point in request.sensor_data
-        ]
-        
-        # Make prediction
-        prediction = detector.predict_single_window(sensor_data)
+        # Make prediction, batched with concurrent requests
+        predictions = await batcher.submit(sensor_data)
+        prediction = predictions[0] if predictions else None
         
         if prediction is None:
             raise HTTPException(status_code=400, detail="Insufficient data for prediction")
         
         return prediction
-        
+    
+    except (HTTPException, ExecutorSaturated):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
-@app.post("/train", response_model=TrainingResponse)
-async def train_model(request: TrainingRequest, background_tasks: BackgroundTasks):
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose content may still be reading the request body.
+    
+    StreamingResponse otherwise listens for a disconnect while streaming,
+    which on ASGI servers before spec 2.4 (uvicorn) takes request body
+    messages off the channel and drops them; the content checks for
+    disconnects itself instead.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+@app.post("/predict/batch", response_class=BodyStreamingResponse, openapi_extra=JOURNEY_BATCH_BODY)
+async def predict_journeys(request: Request, journeys: Union[NDJSONLines, List[Any]] = Depends(read_journeys)):
     """
-    Train the transport mode detection model.
+    Predict transport modes for many journeys in one request.
+    
+    Journeys are sharded across the backfill process pool, so a backfill
+    of thousands of journeys is one long-lived request. The response is
+    NDJSON: one line per journey as soon as it is scored, in completion
+    order, with {"index", "journey_id", "predictions"} or "error" for a
+    journey that could not be scored, then a final {"done": true, ...} line.
+    
+    Answers 503 if the backfill workers cannot load the served model.
     
     Args:
-        request: Training data and options
-        background_tasks: Background task manager
-        
+        journeys: Journeys, each with sensor_data per point or columnar (see read_journeys)
+    """
+    if not detector.is_trained:
+        raise HTTPException(status_code=400, detail="Model not trained. Please train the model first.")
+    
+    serving = detector
+    await backfill_pool.start(serving)
+    return BodyStreamingResponse(_journey_lines(request, journeys, serving), media_type=NDJSON_CONTENT_TYPE)
+
+async def _journey_lines(request: Request, journeys: Union[NDJSONLines, List[Any]],
+                         serving: TransportModeDetector):
+    """
+    NDJSON lines of the journey results followed by a summary line.
+    
+    Lines are held back while the body is still being received: most
+    clients only read the response once they have sent the whole request,
+    and writing to one that is not reading would stall reading its body.
+    Results are far smaller than the sensor data they are computed from.
+    """
+    count = failed = 0
+    held = []
+    try:
+        async with contextlib.aclosing(backfill_pool.predict(journeys, serving)) as results:
+            async for result in results:
+                count += 1
+                failed += 'error' in result
+                held.append(json.dumps(result) + "\n")
+                if getattr(journeys, 'done', True):
+                    if await request.is_disconnected():
+                        return
+                    yield "".join(held)
+                    held = []
+    except ClientDisconnect:
+        return
+    yield "".join(held) + json.dumps({"done": True, "journeys": count, "failed": failed}) + "\n"
+
+@app.post("/infer/hybrid", response_model=List[HybridInferenceResponse], openapi_extra=SENSOR_BATCH_BODY)
+async def hybrid_inference(sensor_data: SensorBatch = Depends(read_sensor_batch)):
+    """
+    Predict transport modes from sensor data cross-checked against GTFS vehicle positions.
+    
+    The GTFS lookup for the trace runs while the sensor model scores it.
+    Without a trained model, sensor predictions fall back to speed heuristics.
+    
+    Args:
+        sensor_data: Sensor data points, per point or columnar (see read_sensor_batch)
+    
     Returns:
-        Training status and metrics
+        Predictions with confidence scores and the GTFS evidence behind them
     """
+    engine = await _get_hybrid_engine()
     try:
-        training_data = []
-        
-        # Add provided training data
-        for sample in request.training_data:
-            training_data.append({
-                'sensor_data': [point.dict() for point in sample.sensor_data],
-                'transport_mode': sample.transport_mode
-            })
-        
-        # Generate synthetic data if requested
-        if request.generate_synthetic:
-            synthetic_data = detector.generate_synthetic_data(request.num_synthetic_samples)
-            training_data.extend(synthetic_data)
-        
-        if not training_data:
-            raise HTTPException(status_code=400, detail="No training data provided")
-        
-        # Train model
-        metrics = detector.train(training_data)
+        return await hybrid_executor.run(engine.infer_transport_mode, sensor_data)
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Hybrid inference failed: {str(e)}")
+
+async def _get_hybrid_engine():
+    """The shared hybrid inference engine, built off the event loop on first use."""
+    global hybrid_engine
+    async with hybrid_engine_lock:
+        if hybrid_engine is None:
+            hybrid_engine = await asyncio.get_running_loop().run_in_executor(None, _build_hybrid_engine)
+            # A model swapped in while the engine was being built
+            hybrid_engine.tmd_detector = detector
+    return hybrid_engine
+
+def _build_hybrid_engine():
+    """Hybrid engine around the served detector and the GTFS database."""
+    from .gtfs_service import GTFSService
+    from .hybrid_inference import HybridInferenceEngine
+    return HybridInferenceEngine(tmd_detector=detector, gtfs_service=GTFSService(GTFS_DB_PATH),
+                                 lookup_workers=hybrid_executor.max_workers)
+
+@app.post("/sessions", response_model=SessionResponse, status_code=201)
+async def open_session(request: SessionRequest):
+    """
+    Open a streaming session for a device.
+    
+    Upload readings to /sessions/{session_id}/samples as they are recorded,
+    without resending earlier ones; the server keeps the window tail.
+    Sessions expire after ML_SESSION_TTL_SECONDS without uploads.
+    """
+    if not detector.is_trained:
+        raise HTTPException(status_code=400, detail="Model not trained. Please train the model first.")
+    return sessions.open(request.device_id, detector.feature_extractor).info()
+
+@app.post("/sessions/{session_id}/samples", response_model=SessionPredictionResponse,
+          openapi_extra=SENSOR_BATCH_BODY)
+async def append_session_samples(session_id: str, sensor_data: SensorBatch = Depends(read_sensor_batch)):
+    """
+    Append new readings to a session and predict the windows they complete.
+    
+    Accepts the same encodings as /predict. Readings at or before the
+    newest one already received are ignored, so retrying an upload is safe.
+    
+    Returns:
+        Predictions of the newly completed windows only
+    """
+    if not detector.is_trained:
+        raise HTTPException(status_code=400, detail="Model not trained. Please train the model first.")
+    try:
+        session = sessions.get(session_id)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    
+    try:
+        # Extraction and scoring run on the session pool, off the event loop
+        predictions = await session_executor.run(session.append, sensor_data, detector)
+    except ExecutorSaturated:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+    
+    return SessionPredictionResponse(
+        session_id=session_id,
+        samples_received=session.samples_received,
+        windows_emitted=session.windows_emitted,
+        predictions=predictions
+    )
+
+@app.get("/sessions/{session_id}", response_model=SessionResponse)
+async def get_session(session_id: str):
+    """Get the progress of a session."""
+    try:
+        return sessions.get(session_id).info()
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+
+@app.delete("/sessions/{session_id}", response_model=SessionResponse)
+async def close_session(session_id: str):
+    """Close a session and release its buffers."""
+    try:
+        return sessions.close(session_id).info()
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+
+@app.get("/metrics/sessions", response_model=Dict[str, Any])
+async def get_session_metrics():
+    """Open sessions, their memory use and how many expired or were evicted."""
+    sessions.evict_expired()
+    return sessions.get_metrics()
+
+@app.websocket("/ws/predict")
+async def live_predictions(websocket: WebSocket, device_id: str = 'anonymous'):
+    """
+    Stream sensor chunks in and get predictions pushed as windows complete.
+    
+    Each connection runs its own incremental pipeline, as a device session
+    does. Client frames are JSON text ({"sensor_data": ...}, per point or
+    columnar) or binary sensor batches (see payloads.py). The server sends
+    {"type": "predictions", ...} for each processed chunk that completes a
+    window and {"type": "error", "detail": ...} for a chunk it rejects.
+    
+    Flow control: up to WS_MAX_PENDING chunks wait for inference. When the
+    server falls behind, all waiting chunks go through the model in one
+    pass; at the limit it sends {"type": "backpressure", ...} and stops
+    reading, so the sender is held back by TCP until it catches up.
+    """
+    await websocket.accept()
+    if not detector.is_trained:
+        await websocket.close(code=1013, reason="Model not trained")
+        return
+    
+    session = DeviceSession(uuid.uuid4().hex, device_id, detector.feature_extractor)
+    pending = asyncio.Queue(maxsize=WS_MAX_PENDING)
+    send_lock = asyncio.Lock()
+    
+    async def send(message: Dict[str, Any]):
+        async with send_lock:
+            await websocket.send_json(message)
+    
+    processor = asyncio.get_running_loop().create_task(_process_live_chunks(session, pending, send))
+    try:
+        while True:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            try:
+                if message.get('bytes') is not None:
+                    batch = decode_binary(message['bytes'])
+                else:
+                    batch = _decode_json(json.loads(message.get('text') or ''))
+                # Rejected here so one bad chunk cannot fail a merged pass
+                DeviceSession.check_order(batch)
+            except ValidationError as e:
+                await send({'type': 'error', 'detail': json.loads(e.json())})
+                continue
+            except ValueError as e:
+                await send({'type': 'error', 'detail': str(e)})
+                continue
+            
+            if pending.full():
+                await send({'type': 'backpressure', 'pending': pending.qsize()})
+            await pending.put(batch)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        processor.cancel()
+
+async def _process_live_chunks(session: DeviceSession, pending: asyncio.Queue, send):
+    """Run a live connection's chunks through its session and push the predictions."""
+    while True:
+        batches = [await pending.get()]
+        while not pending.empty():
+            batches.append(pending.get_nowait())
         
-        return TrainingResponse(
-            success=True,
-            message=f"Model trained successfully with {len(training_data)} samples",
-            metrics=metrics
-        )
+        delay = 0.005
+        while True:
+            try:
+                predictions = await live_executor.run(session.append_many, batches, detector)
+                break
+            except ExecutorSaturated:
+                # Chunks keep queueing meanwhile and are merged into the next pass
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.2)
+            except Exception as e:
+                predictions = None
+                await send({'type': 'error', 'detail': f"Prediction failed: {str(e)}"})
+                break
         
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
+        if predictions:
+            await send({
+                'type': 'predictions',
+                'predictions': predictions,
+                'samples_received': session.samples_received,
+                'windows_emitted': session.windows_emitted,
+                'chunks': len(batches)
+            })
+
+@app.post("/train", response_model=TrainingJobResponse, status_code=202)
+async def train_model(request: TrainingRequest):
+    """
+    Submit a training job for the transport mode detection model.
+    
+    Training runs in a separate process; the new model is served as soon as
+    the job succeeds.
+    
+    Args:
+        request: Training data and options
+    
+    Returns:
+        The queued job; poll /train/jobs/{job_id} for progress
+    """
+    training_data = [
+        {
+            'sensor_data': [point.dict() for point in sample.sensor_data],
+            'transport_mode': sample.transport_mode
+        }
+        for sample in request.training_data
+    ]
+    
+    if not training_data and not request.generate_synthetic:
+        raise HTTPException(status_code=400, detail="No training data provided")
+    
+    num_synthetic = request.num_synthetic_samples if request.generate_synthetic else 0
+    return training_jobs.submit(training_data, num_synthetic).to_dict()
 
-@app.post("/train/synthetic", response_model=TrainingResponse)
+@app.post("/train/synthetic", response_model=TrainingJobResponse, status_code=202)
 async def train_with_synthetic_data(num_samples: int = 1000):
     """
-    Train the model using only synthetic data.
+    Submit a training job using only synthetic data.
     
     Args:
         num_samples: Number of synthetic samples to generate
         
     Returns:
-        Training status and metrics
+        The queued job; poll /train/jobs/{job_id} for progress
     """
-    try:
-        # Generate synthetic training data
-        training_data = detector.generate_synthetic_data(num_samples)
-        
-        # Train model
-        metrics = detector.train(training_data)
-        
-        return TrainingResponse(
-            success=True,
-            message=f"Model trained successfully with {len(training_data)} synthetic samples",
-            metrics=metrics
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
+    return training_jobs.submit([], num_samples).to_dict()
+
+@app.get("/train/jobs", response_model=List[TrainingJobResponse])
+async def list_training_jobs():
+    """List recent training jobs, oldest first."""
+    return [job.to_dict() for job in training_jobs.jobs()]
+
+@app.get("/train/jobs/{job_id}", response_model=TrainingJobResponse)
+async def get_training_job(job_id: str):
+    """Get the status, progress and metrics of a training job."""
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job.to_dict()
+
+@app.delete("/train/jobs/{job_id}", response_model=TrainingJobResponse)
+async def cancel_training_job(job_id: str):
+    """
+    Cancel a queued or running training job; the served model is unchanged.
+    
+    A job whose model is already being activated is not cancelled and is
+    returned still running, in the 'activating' stage.
+    """
+    job = training_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job.to_dict()
 
 @app.get("/transport-modes", response_model=List[str])
 async def get_transport_modes():
@@ -0,0 +1,373 @@
+"""
+Bulk transport mode prediction for many journeys in worker processes.
+Shards the journeys of a backfill request across a process pool whose
+workers each load the served model once, and yields every journey's
+predictions as soon as the shard it was in has finished.
+"""
+
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from .execution import ExecutorSaturated
+from .model_registry import ModelRegistry
+from .payloads import PayloadError, decode_columns, decode_points
+from .sensor_data import SensorBatch
+from .transport_mode_detector import TransportModeDetector
+
+
+# Media type of newline-delimited JSON request and response bodies
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+# Per-process state set up by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(model_path: str, registry_root: Optional[str], version: Optional[str],
+                 portable: bool, cascade_threshold: Optional[float]):
+    """Load the served model version into the worker's detector."""
+    detector = TransportModeDetector(
+        model_path=model_path,
+        registry=ModelRegistry(registry_root) if registry_root else None,
+        cascade_threshold=cascade_threshold
+    )
+    if not detector.load_model(version, portable=portable):
+        raise RuntimeError(f"Model {version or model_path} could not be loaded")
+    _worker['detector'] = detector
+
+
+def _ready() -> bool:
+    """No-op task: completes once a worker has finished _init_worker."""
+    return True
+
+
+def decode_journey(journey: Any) -> Dict[str, Any]:
+    """
+    Parse one journey given as an object or as its JSON text.
+    
+    A journey is {"journey_id": ..., "sensor_data": ...} with sensor_data
+    either a list of points or an object of channel arrays, as for /predict.
+    
+    Raises:
+        PayloadError: If the journey is not a JSON object
+    """
+    if isinstance(journey, (bytes, str)):
+        try:
+            journey = json.loads(journey)
+        except ValueError:
+            raise PayloadError("Journey is not valid JSON")
+    if not isinstance(journey, dict):
+        raise PayloadError("Journey must be an object with 'journey_id' and 'sensor_data'")
+    return journey
+
+
+def journey_batch(journey: Dict[str, Any]) -> SensorBatch:
+    """
+    Sensor batch of a parsed journey.
+    
+    Raises:
+        PayloadError: If its sensor data is malformed
+    """
+    sensor_data = journey.get('sensor_data')
+    if isinstance(sensor_data, dict):
+        return decode_columns(sensor_data)
+    return decode_points(sensor_data)
+
+
+def _predict_shard(shard: List[Tuple[int, Any]]) -> List[Dict[str, Any]]:
+    """
+    Decode and score one shard of (index, journey) pairs in a single model pass.
+    
+    If the pass fails, each journey is scored on its own so only the ones
+    that still fail get an error.
+    """
+    results = []
+    decoded = []
+    for index, journey in shard:
+        result = {'index': index, 'journey_id': None}
+        try:
+            journey = decode_journey(journey)
+            result['journey_id'] = journey.get('journey_id')
+            decoded.append((result, journey_batch(journey)))
+        except PayloadError as e:
+            results.append(dict(result, error=str(e)))
+    
+    if decoded:
+        detector = _worker['detector']
+        try:
+            predictions = detector.predict_many([batch for _, batch in decoded])
+            results += [dict(result, predictions=p) for (result, _), p in zip(decoded, predictions)]
+        except Exception as e:
+            if len(decoded) == 1:
+                results.append(dict(decoded[0][0], error=f"Prediction failed: {e}"))
+            else:
+                # Retry journeys one by one so a single bad journey fails alone
+                for result, batch in decoded:
+                    try:
+                        results.append(dict(result, predictions=detector.predict_many([batch])[0]))
+                    except Exception as journey_error:
+                        results.append(dict(result, error=f"Prediction failed: {journey_error}"))
+    return sorted(results, key=lambda result: result['index'])
+
+
+class NDJSONLines:
+    """
+    Non-empty lines of an NDJSON body, split from its chunks as they are consumed.
+    
+    done turns True once the last chunk has been read.
+    """
+    
+    def __init__(self, chunks: AsyncIterable[bytes]):
+        """
+        Initialize NDJSON line reader.
+        
+        Args:
+            chunks: Body chunks, e.g. Request.stream()
+        """
+        self.chunks = chunks
+        self.done = False
+    
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        buffered = b''
+        async for chunk in self.chunks:
+            lines = (buffered + chunk).split(b'\n')
+            buffered = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield line
+        self.done = True
+        if buffered.strip():
+            yield buffered
+
+
+class BatchPredictionPool:
+    """
+    Process pool scoring whole journeys for backfills.
+    
+    Journeys are grouped into shards of shard_size and each shard is scored
+    with one predict_many() call in a worker, so neither the event loop nor
+    the inference threads of the online endpoints do the work. When the
+    served model changes, new shards go to a fresh pool loaded with the new
+    version while shards already submitted finish on the old one.
+    
+    A pool that breaks (its workers cannot load the model, or one dies)
+    is not replaced for the same model until retry_seconds have passed;
+    meanwhile journeys fail without spawning processes.
+    """
+    
+    def __init__(self, n_workers: Optional[int] = None, shard_size: int = 16,
+                 max_pending_shards: Optional[int] = None, portable: bool = False,
+                 retry_seconds: float = 30.0):
+        """
+        Initialize batch prediction pool.
+        
+        Args:
+            n_workers: Worker processes (defaults to the CPU count)
+            shard_size: Journeys scored per task
+            max_pending_shards: Shards one request keeps submitted at a time
+                (defaults to twice the workers), bounding memory held for results
+            portable: Load registry versions from their portable archive (NumPy only)
+            retry_seconds: Time before a model whose pool broke gets a new pool
+        """
+        if shard_size < 1:
+            raise ValueError("shard_size must be at least 1")
+        
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.max_pending_shards = max_pending_shards or 2 * self.n_workers
+        self.portable = portable
+        self.retry_seconds = retry_seconds
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._model_key = None
+        self._broken_key = None
+        self._broken_until = 0.0
+        self._lock = threading.Lock()
+        self._context = multiprocessing.get_context('spawn')
+        self.journeys = 0
+        self.failed = 0
+        self.shards = 0
+        self.restarts = 0
+        self.breaks = 0
+    
+    def _model_source(self, detector: TransportModeDetector) -> Tuple:
+        """Arguments with which a worker loads the model the detector serves."""
+        version = detector.model_version
+        registry_root = detector.registry.root if version and detector.registry is not None else None
+        return detector.model_path, registry_root, version, self.portable, detector.cascade_threshold
+    
+    def _pool_for(self, detector: TransportModeDetector) -> Tuple[ProcessPoolExecutor, Tuple]:
+        """
+        The pool serving the detector's model and its model key, started or restarted as needed.
+        
+        Raises:
+            ExecutorSaturated: (503) If the pool for this model broke less than retry_seconds ago
+        """
+        key = self._model_source(detector)
+        with self._lock:
+            remaining = self._broken_until - time.monotonic()
+            if key == self._broken_key and remaining > 0:
+                raise ExecutorSaturated("Backfill workers could not load the served model",
+                                        retry_after=math.ceil(remaining), status_code=503)
+            if self._pool is None or key != self._model_key:
+                if self._pool is not None:
+                    # Shards already submitted still finish on the old model
+                    self._pool.shutdown(wait=False)
+                    self.restarts += 1
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.n_workers, mp_context=self._context,
+                    initializer=_init_worker, initargs=key
+                )
+                self._model_key = key
+            return self._pool, key
+    
+    def _trip(self, pool: ProcessPoolExecutor, key: Tuple):
+        """Drop a broken pool and hold off starting another for its model."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+                self._model_key = None
+            if self._broken_key != key or self._broken_until <= time.monotonic():
+                self.breaks += 1
+            self._broken_key = key
+            self._broken_until = time.monotonic() + self.retry_seconds
+    
+    async def start(self, detector: TransportModeDetector):
+        """
+        Start the workers for the detector's model and wait until one has loaded it.
+        
+        Raises:
+            ExecutorSaturated: (503) If the workers cannot load the model
+        """
+        pool, key = self._pool_for(detector)
+        try:
+            await asyncio.get_running_loop().run_in_executor(pool, _ready)
+        except BrokenProcessPool:
+            self._trip(pool, key)
+            raise ExecutorSaturated("Backfill workers could not load the served model",
+                                    retry_after=math.ceil(self.retry_seconds), status_code=503)
+    
+    async def predict(self, journeys: Union[Iterable[Any], AsyncIterable[Any]],
+                      detector: TransportModeDetector) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Score journeys in the pool and yield each one's result as its shard finishes.
+        
+        Journeys are taken from the input only as shards are submitted, so an
+        async iterable (e.g. a request body being received) is read no faster
+        than it is scored.
+        
+        Args:
+            journeys: Journey objects, or their JSON text (decoded in the workers)
+            detector: Detector whose model the workers serve; it must be loadable
+                from its registry version or model_path
+        
+        Yields:
+            {'index', 'journey_id', 'predictions'} per journey, or 'error'
+            instead of 'predictions' for a journey that could not be scored.
+            Shards finish in any order; index is the journey's position.
+        """
+        loop = asyncio.get_running_loop()
+        submitted = {}
+        pending = set()
+        shards = self._shards(journeys)
+        exhausted = False
+        
+        try:
+            while True:
+                while not exhausted and len(pending) < self.max_pending_shards:
+                    try:
+                        shard = await shards.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    try:
+                        pool, key = self._pool_for(detector)
+                    except ExecutorSaturated as e:
+                        for result in self._failed(shard, str(e)):
+                            yield result
+                        continue
+                    future = loop.run_in_executor(pool, _predict_shard, shard)
+                    submitted[future] = (shard, pool, key)
+                    pending.add(future)
+                if not pending:
+                    return
+                
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    for result in self._shard_results(future, *submitted.pop(future)):
+                        yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            await shards.aclose()
+    
+    async def _shards(self, journeys: Union[Iterable[Any], AsyncIterable[Any]]
+                      ) -> AsyncIterator[List[Tuple[int, Any]]]:
+        """Group journeys into (index, journey) shards of shard_size."""
+        if not hasattr(journeys, '__aiter__'):
+            journeys = _as_async(journeys)
+        shard = []
+        index = 0
+        async for journey in journeys:
+            shard.append((index, journey))
+            index += 1
+            if len(shard) == self.shard_size:
+                yield shard
+                shard = []
+        if shard:
+            yield shard
+    
+    def _shard_results(self, future: asyncio.Future, shard: List[Tuple[int, Any]],
+                       pool: ProcessPoolExecutor, key: Tuple) -> List[Dict[str, Any]]:
+        """Results of a finished shard, or an error for each of its journeys."""
+        self.shards += 1
+        try:
+            results = future.result()
+        except BrokenProcessPool as e:
+            self._trip(pool, key)
+            return self._failed(shard, f"Worker process failed: {e}")
+        except Exception as e:
+            return self._failed(shard, f"Prediction failed: {e}")
+        self.journeys += len(results)
+        self.failed += sum('error' in result for result in results)
+        return results
+    
+    def _failed(self, shard: List[Tuple[int, Any]], error: str) -> List[Dict[str, Any]]:
+        """An error result for every journey of a shard that was not scored."""
+        self.journeys += len(shard)
+        self.failed += len(shard)
+        return [{'index': index, 'journey_id': None, 'error': error} for index, _ in shard]
+    
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                self._model_key = None
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Journeys and shards scored, failures, pool restarts and breaks."""
+        return {
+            'workers': self.n_workers,
+            'running': self._pool is not None,
+            'shard_size': self.shard_size,
+            'max_pending_shards': self.max_pending_shards,
+            'journeys': self.journeys,
+            'failed': self.failed,
+            'shards': self.shards,
+            'restarts': self.restarts,
+            'breaks': self.breaks,
+        }
+
+
+async def _as_async(items: Iterable[Any]) -> AsyncIterator[Any]:
+    """Iterate a plain iterable asynchronously."""
+    for item in items:
+        yield item
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""
+Cross-request micro-batching for transport mode prediction.
+Coalesces concurrent prediction requests into batches so that feature
+extraction and the model run once per batch instead of once per request.
+"""
+
+import asyncio
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .execution import BoundedExecutor, ExecutorSaturated
+
+
+class BatchingMetrics:
+    """Counters describing how requests were coalesced."""
+    
+    def __init__(self):
+        self.requests = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.rejected = 0
+        self.max_batch_size = 0
+        self.max_queue_depth = 0
+        self.batch_sizes: Dict[int, int] = {}
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+    
+    def record_batch(self, size: int, wait_seconds: float, run_seconds: float):
+        """Account for one executed batch."""
+        self.requests += size
+        self.batches += 1
+        self.max_batch_size = max(self.max_batch_size, size)
+        self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+        self.total_wait_seconds += wait_seconds
+        self.total_run_seconds += run_seconds
+    
+    def to_dict(self, queue_depth: int) -> Dict[str, Any]:
+        """Snapshot for the metrics endpoint."""
+        return {
+            'queue_depth': queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'requests': self.requests,
+            'batches': self.batches,
+            'failed_batches': self.failed_batches,
+            'rejected': self.rejected,
+            'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'batch_size_histogram': {str(size): count for size, count in sorted(self.batch_sizes.items())},
+            'mean_queue_wait_ms': 1000 * self.total_wait_seconds / self.requests if self.requests else 0.0,
+            'mean_batch_run_ms': 1000 * self.total_run_seconds / self.batches if self.batches else 0.0,
+        }
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from concurrent requests and processes them in batches.
+    
+    A batch is dispatched once it holds max_batch_size items or max_wait_ms
+    has passed since its first item arrived, whichever comes first. Batches
+    run on the executor's worker threads, as many at a time as it has
+    workers, so the event loop keeps accepting requests.
+    """
+    
+    def __init__(self, process_batch: Callable[[Sequence[Any]], List[Any]],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 max_queue_size: int = 1024, executor: Optional[BoundedExecutor] = None):
+        """
+        Initialize micro-batcher.
+        
+        Args:
+            process_batch: Maps a list of items to a list of results in the same order
+            max_batch_size: Most items processed in one call
+            max_wait_ms: Longest time the first item of a batch waits for company
+            max_queue_size: Items allowed to wait for a batch before submit() rejects more
+            executor: Executor running the batches (defaults to a single worker)
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must not be negative")
+        
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue_size = max_queue_size
+        self.executor = executor or BoundedExecutor('batcher', max_workers=1, max_queue=0)
+        self.metrics = BatchingMetrics()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._batches = set()
+    
+    def start(self):
+        """Start the dispatch loop on the running event loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue(self.max_queue_size)
+            self._slots = asyncio.Semaphore(self.executor.max_workers)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self):
+        """Stop dispatching; items still queued are failed."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher stopped"))
+    
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item and wait for its result (or the exception it raised).
+        
+        Raises:
+            ExecutorSaturated: If max_queue_size items are already waiting
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.metrics.rejected += 1
+            raise ExecutorSaturated("Prediction queue is full", self._retry_after())
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self._queue.qsize())
+        return await future
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth and batch-size statistics."""
+        return self.metrics.to_dict(self._queue.qsize() if self._queue is not None else 0)
+    
+    def _retry_after(self) -> int:
+        """Seconds for the current queue to drain at the observed batch rate."""
+        batches_ahead = self._queue.qsize() / self.max_batch_size / self.executor.max_workers
+        run_seconds = self.metrics.total_run_seconds / self.metrics.batches if self.metrics.batches else 1.0
+        return max(1, math.ceil(batches_ahead * run_seconds))
+    
+    async def _run(self):
+        """Dispatch loop: gather a batch once a worker is free, then hand it off."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            task = loop.create_task(self._dispatch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+    
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future, float]]):
+        """Process one batch and free its worker slot."""
+        try:
+            await self._process(batch)
+        finally:
+            self._slots.release()
+    
+    async def _process(self, batch: List[Tuple[Any, asyncio.Future, float]]):
+        """Process a batch, retrying items individually if it fails, and scatter results."""
+        items = [item for item, _, _ in batch]
+        started = time.perf_counter()
+        wait_seconds = sum(started - queued for _, _, queued in batch)
+        
+        try:
+            results = await self.executor.run(self.process_batch, items)
+            outcomes = [(result, None) for result in results]
+        except ExecutorSaturated as e:
+            # Retrying items on a full executor only adds rejections
+            self.metrics.failed_batches += 1
+            outcomes = [(None, e)] * len(batch)
+        except Exception as e:
+            self.metrics.failed_batches += 1
+            if len(batch) == 1:
+                outcomes = [(None, e)]
+            else:
+                # Retry items one by one so a single bad request fails alone
+                outcomes = []
+                for item in items:
+                    try:
+                        outcomes.append(((await self.executor.run(self.process_batch, [item]))[0], None))
+                    except Exception as item_error:
+                        outcomes.append((None, item_error))
+        
+        self.metrics.record_batch(len(batch), wait_seconds, time.perf_counter() - started)
+        for (_, future, _), (result, error) in zip(batch, outcomes):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
\ No newline at end of file
@@ -0,0 +1,195 @@
+"""
+Cheap-first cascade inference for transport mode detection.
+A small forest over a handful of inexpensive features classifies every
+window first; only windows it is unsure about pay for the full feature set
+and the full forest.
+"""
+
+import sys
+import time
+import numpy as np
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .compiled_forest import CompiledForest
+from .feature_graph import FeaturePlan
+
+
+# Columns of the first stage: window moments of the accelerometer and
+# gyroscope magnitude and of speed, plus GPS path distances. None of them
+# needs a sort, an FFT or peak detection.
+CASCADE_FEATURES = (
+    'accel_magnitude_mean', 'accel_magnitude_std', 'accel_magnitude_skewness', 'accel_magnitude_kurtosis',
+    'gyro_magnitude_mean', 'gyro_magnitude_std',
+    'speed_mean', 'speed_std',
+    'gps_total_distance', 'gps_mean_distance', 'gps_displacement', 'gps_efficiency',
+)
+
+# First-stage confidence at or above which a window skips the full model
+DEFAULT_THRESHOLD = 0.9
+
+# Thresholds compared by threshold_report; above 1.0 means "always run the full model"
+REPORT_THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.01)
+
+
+class CascadeStage:
+    """
+    First stage of the cascade: a compiled small forest over cheap columns.
+    
+    It reads the same scaled feature matrix as the full model, restricted
+    to `indices`, and predicts the same encoded classes.
+    """
+    
+    def __init__(self, forest: CompiledForest, columns: Sequence[str], indices: np.ndarray):
+        """
+        Initialize a cascade stage.
+        
+        Args:
+            forest: Compiled first-stage forest
+            columns: Feature columns the forest reads, in its column order
+            indices: Position of each of those columns in the full schema
+        """
+        self.forest = forest
+        self.columns = list(columns)
+        self.indices = np.asarray(indices, dtype=np.intp)
+        self.plan = FeaturePlan(self.columns)
+    
+    @classmethod
+    def fit(cls, X_scaled: np.ndarray, y: np.ndarray, feature_names: Sequence[str],
+            columns: Sequence[str] = CASCADE_FEATURES, n_estimators: int = 10,
+            max_depth: int = 6) -> 'CascadeStage':
+        """
+        Train the first stage on scaled full-schema training rows.
+        
+        Args:
+            X_scaled: Scaled feature matrix in feature_names order
+            y: Encoded labels
+            feature_names: Columns of X_scaled
+            columns: Cheap columns the stage may read (those missing from the schema are skipped)
+            n_estimators: Trees in the first-stage forest
+            max_depth: Depth limit of its trees
+        """
+        from sklearn.ensemble import RandomForestClassifier
+        
+        columns = [name for name in columns if name in feature_names]
+        if not columns:
+            raise ValueError("None of the cascade columns are in the feature schema")
+        indices = np.array([list(feature_names).index(name) for name in columns], dtype=np.intp)
+        
+        model = RandomForestClassifier(
+            n_estimators=n_estimators, max_depth=max_depth, random_state=42, n_jobs=-1
+        )
+        model.fit(X_scaled[:, indices], y)
+        return cls(CompiledForest.from_estimator(model), columns, indices)
+    
+    def predict(self, X_scaled: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        First-stage classes and probabilities from a scaled full-schema matrix.
+        
+        Only the cascade columns of X_scaled are read.
+        """
+        return self.forest.predict(X_scaled[:, self.indices])
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # The plan is rebuilt from the columns, so pickles do not depend on it
+        state = dict(self.__dict__)
+        del state['plan']
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.plan = FeaturePlan(self.columns)
+
+
+def evaluate_thresholds(stage: CascadeStage, full_predictions: np.ndarray, X_scaled: np.ndarray,
+                        y: np.ndarray, thresholds: Sequence[float] = REPORT_THRESHOLDS) -> List[Dict[str, float]]:
+    """
+    Accuracy and early-exit rate of the cascade per threshold on labelled rows.
+    
+    Args:
+        stage: First stage
+        full_predictions: Full model's prediction for every row
+        X_scaled: Scaled full-schema rows
+        y: Encoded labels
+        thresholds: First-stage confidences to evaluate
+    """
+    stage_predictions, probabilities = stage.predict(X_scaled)
+    confidence = probabilities.max(axis=1)
+    report = []
+    for threshold in thresholds:
+        exits = confidence >= threshold
+        predictions = np.where(exits, stage_predictions, full_predictions)
+        report.append({
+            'threshold': float(threshold),
+            'exit_rate': float(exits.mean()) if len(exits) else 0.0,
+            'accuracy': float(np.mean(predictions == y)) if len(y) else 0.0,
+        })
+    return report
+
+
+def threshold_report(detector: Any, samples: Sequence[Dict[str, Any]],
+                     thresholds: Sequence[float] = REPORT_THRESHOLDS) -> List[Dict[str, float]]:
+    """
+    Accuracy, early-exit rate and latency of the cascade per threshold.
+    
+    Every sample is predicted on its own, as /predict sees traffic, first
+    with the full model alone and then with the cascade at each threshold.
+    
+    Args:
+        detector: Trained TransportModeDetector with a cascade stage
+        samples: Labelled samples with 'sensor_data' and 'transport_mode' keys
+        thresholds: First-stage confidences to evaluate
+    
+    Returns:
+        One row per threshold (threshold None is the full model alone)
+    """
+    from .feature_extraction import SensorBatch
+    
+    traces = [SensorBatch.from_dicts(sample['sensor_data']) for sample in samples]
+    labels = [sample['transport_mode'] for sample in samples]
+    previous = detector.cascade_threshold
+    
+    report = []
+    try:
+        for threshold in (None,) + tuple(thresholds):
+            detector.cascade_threshold = threshold
+            detector.predict_many(traces[:1])
+            detector.cascade_stats = {'windows': 0, 'exits': 0}
+            
+            correct = windows = 0
+            timings = []
+            for trace, label in zip(traces, labels):
+                start = time.perf_counter()
+                predictions = detector.predict(trace)
+                timings.append((time.perf_counter() - start) * 1000)
+                correct += sum(prediction['transport_mode'] == label for prediction in predictions)
+                windows += len(predictions)
+            
+            stats = detector.cascade_stats
+            report.append({
+                'threshold': threshold,
+                'accuracy': correct / windows if windows else 0.0,
+                'exit_rate': stats['exits'] / stats['windows'] if stats['windows'] else 0.0,
+                'p50_ms': float(np.percentile(timings, 50)),
+                'p99_ms': float(np.percentile(timings, 99)),
+            })
+    finally:
+        detector.cascade_threshold = previous
+    return report
+
+
+if __name__ == "__main__":
+    from .transport_mode_detector import TransportModeDetector
+    
+    detector = TransportModeDetector(sys.argv[1] if len(sys.argv) > 1 else "models/transport_mode_model.pkl")
+    if not detector.load_model():
+        sys.exit(1)
+    if detector.cascade is None:
+        print("Model has no cascade stage; retrain it to add one")
+        sys.exit(1)
+    
+    samples = detector.generate_synthetic_data(350)
+    print(f"{'threshold':>9s} {'accuracy':>9s} {'early exit':>10s} {'p50':>9s} {'p99':>9s}")
+    for row in threshold_report(detector, samples):
+        threshold = 'full' if row['threshold'] is None else f"{row['threshold']:.2f}"
+        print(f"{threshold:>9s} {row['accuracy']:9.3f} {row['exit_rate']:10.1%} "
+              f"{row['p50_ms']:6.2f} ms {row['p99_ms']:6.2f} ms")
\ No newline at end of file
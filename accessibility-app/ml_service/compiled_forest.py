@@ -0,0 +1,232 @@
+"""
+Flat-array random forest inference for transport mode detection.
+Compiles a fitted scikit-learn forest into contiguous NumPy node arrays and
+walks every tree for every window at once, producing class probabilities
+and the predicted class in one pass without joblib dispatch.
+"""
+
+import json
+import os
+import sys
+import time
+import numpy as np
+from typing import Any, Dict, Tuple
+
+
+# Largest probability difference from scikit-learn accepted by the parity check
+PARITY_TOLERANCE = 1e-12
+
+# Node arrays written by save(), one .npy file each
+ARRAY_NAMES = ('feature', 'threshold', 'left', 'right', 'leaf_proba', 'roots', 'classes')
+
+
+class CompiledForest:
+    """
+    A random forest as flat node arrays.
+    
+    Nodes of all trees are concatenated; each tree's root index is kept in
+    `roots`. Leaves point back at themselves, so a fixed number of
+    traversal steps (the deepest tree's depth) lands every window on a leaf.
+    """
+    
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, leaf_proba: np.ndarray, roots: np.ndarray,
+                 max_depth: int, classes: np.ndarray):
+        """
+        Initialize a compiled forest.
+        
+        Args:
+            feature: Feature index each node splits on (0 for leaves)
+            threshold: Split threshold of each node; X <= threshold goes left
+            left: Global index of each node's left child (itself for leaves)
+            right: Global index of each node's right child (itself for leaves)
+            leaf_proba: (n_nodes, n_classes) class distribution of each node
+            roots: Index of every tree's root node
+            max_depth: Depth of the deepest tree
+            classes: Class labels in probability column order
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes = classes
+    
+    @classmethod
+    def from_estimator(cls, model: Any) -> 'CompiledForest':
+        """
+        Compile a fitted single-output forest classifier.
+        
+        Raises:
+            ValueError: If the model is not a forest of decision trees
+        """
+        estimators = getattr(model, 'estimators_', None)
+        if not estimators or not all(hasattr(estimator, 'tree_') for estimator in estimators):
+            raise ValueError("Only forests of decision trees can be compiled")
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+        
+        features, thresholds, lefts, rights, probas, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left < 0
+            
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, 0.0, tree.threshold))
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+            
+            # Older scikit-learn stores weighted counts, newer stores fractions;
+            # predict_proba of either is the normalized distribution
+            values = tree.value[:, 0, :model.n_classes_].astype(np.float64)
+            totals = values.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1.0
+            probas.append(values / totals)
+            
+            roots.append(offset)
+            offset += tree.node_count
+        
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            leaf_proba=np.concatenate(probas),
+            roots=np.array(roots, dtype=np.intp),
+            max_depth=max(estimator.tree_.max_depth for estimator in estimators),
+            classes=np.asarray(model.classes_)
+        )
+    
+    def used_features(self) -> np.ndarray:
+        """Sorted indices of the features any split node reads."""
+        splits = self.left != np.arange(len(self.left))
+        return np.unique(self.feature[splits])
+    
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """(n_windows, n_trees) index of the leaf each window reaches in each tree."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_windows, n_features = X.shape
+        flat = X.ravel()
+        row_offsets = (np.arange(n_windows, dtype=np.intp) * n_features)[:, None]
+        
+        nodes = np.broadcast_to(self.roots, (n_windows, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            # float32 features compared against float64 thresholds, as scikit-learn does
+            goes_left = flat[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(goes_left, self.left[nodes], self.right[nodes])
+        return nodes
+    
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities averaged over trees, in `classes` order."""
+        return self.leaf_proba[self.leaves(X)].sum(axis=1) / len(self.roots)
+    
+    def predict(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predicted class and class probabilities of each window.
+        
+        Returns:
+            (class labels, (n_windows, n_classes) probabilities)
+        """
+        probabilities = self.predict_proba(X)
+        return self.classes[np.argmax(probabilities, axis=1)], probabilities
+    
+    def save(self, directory: str):
+        """Write the node arrays as .npy files (plus the tree depth) into directory."""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name), allow_pickle=False)
+        with open(os.path.join(directory, 'forest.json'), 'w') as f:
+            json.dump({'max_depth': int(self.max_depth), 'n_trees': len(self.roots)}, f)
+    
+    @classmethod
+    def load(cls, directory: str, mmap_mode: str = 'r') -> 'CompiledForest':
+        """
+        Load a forest written by save().
+        
+        With mmap_mode='r' the node arrays are read-only views of the files, so
+        every process serving the same forest shares one copy in the page cache.
+        """
+        with open(os.path.join(directory, 'forest.json')) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode).view(np.ndarray)
+            for name in ARRAY_NAMES
+        }
+        return cls(max_depth=meta['max_depth'], **arrays)
+
+
+# --- Parity check and benchmark ----------------------------------------------
+
+def check_parity(model: Any, X: np.ndarray) -> Dict[str, float]:
+    """
+    Compare the compiled forest against scikit-learn on the same inputs.
+    
+    Returns:
+        Largest probability difference and the number of differing predictions
+    """
+    compiled = CompiledForest.from_estimator(model)
+    predictions, probabilities = compiled.predict(X)
+    return {
+        'max_probability_difference': float(np.max(np.abs(probabilities - model.predict_proba(X)))),
+        'prediction_mismatches': int(np.sum(predictions != model.predict(X)))
+    }
+
+
+def benchmark(model: Any, X: np.ndarray, repeats: int = 200) -> Dict[str, Dict[str, float]]:
+    """
+    Per-window latency of scikit-learn predict + predict_proba and the compiled forest.
+    
+    Each repeat scores a single window, as the streaming and /predict paths do.
+    
+    Returns:
+        p50 and p99 latency in milliseconds per path
+    """
+    compiled = CompiledForest.from_estimator(model)
+    
+    def sklearn_path(window):
+        model.predict(window)
+        model.predict_proba(window)
+    
+    paths = {'sklearn': sklearn_path, 'compiled': compiled.predict}
+    report = {}
+    for name, predict in paths.items():
+        predict(X[:1])
+        timings = []
+        for i in range(repeats):
+            window = X[i % len(X):i % len(X) + 1]
+            start = time.perf_counter()
+            predict(window)
+            timings.append((time.perf_counter() - start) * 1000)
+        report[name] = {'p50_ms': float(np.percentile(timings, 50)), 'p99_ms': float(np.percentile(timings, 99))}
+    return report
+
+
+if __name__ == "__main__":
+    from .feature_extraction import SensorBatch
+    from .transport_mode_detector import TransportModeDetector
+    
+    detector = TransportModeDetector(sys.argv[1] if len(sys.argv) > 1 else "models/transport_mode_model.pkl")
+    if not detector.load_model():
+        sys.exit(1)
+    
+    # Scaled feature rows of fresh synthetic windows, as predict() sees them
+    X = np.concatenate([
+        detector.feature_extractor.extract_feature_matrix(
+            SensorBatch.from_dicts(sample['sensor_data']), detector.feature_schema
+        )
+        for sample in detector.generate_synthetic_data(700)
+    ])
+    X = detector._scale(X)
+    
+    report = check_parity(detector.model, X)
+    for check, value in report.items():
+        print(f"{check:30s} {value}")
+    ok = report['max_probability_difference'] <= PARITY_TOLERANCE and not report['prediction_mismatches']
+    print("parity ok" if ok else "PARITY MISMATCH")
+    
+    for name, latency in benchmark(detector.model, X).items():
+        print(f"{name:10s} p50 {latency['p50_ms']:.3f} ms  p99 {latency['p99_ms']:.3f} ms")
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Bounded execution of CPU-bound work for the transport mode API.
+Runs feature extraction and inference on worker threads instead
+of the asyncio event loop, and rejects work once the pool and its queue
+are full so that overload turns into fast 429/503 responses instead of
+ever-growing latency.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when an executor cannot accept more work right now."""
+    
+    def __init__(self, message: str, retry_after: int, status_code: int = 429):
+        """
+        Initialize the error.
+        
+        Args:
+            message: Reason shown to the client
+            retry_after: Seconds the client should wait before retrying
+            status_code: HTTP status to respond with (429 or 503)
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+class BoundedExecutor:
+    """
+    Thread pool that admits at most max_workers + max_queue tasks at once.
+    
+    NumPy, scikit-learn and the numba kernels release the GIL in their inner
+    loops, so worker threads run in parallel while the event loop stays free
+    to answer health checks and accept requests.
+    """
+    
+    def __init__(self, name: str, max_workers: int = 2, max_queue: int = 16,
+                 saturated_status: int = 429):
+        """
+        Initialize bounded executor.
+        
+        Args:
+            name: Name used in thread names and error messages
+            max_workers: Worker threads
+            max_queue: Tasks allowed to wait for a free worker
+            saturated_status: HTTP status reported when full (429 or 503)
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+        
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.saturated_status = saturated_status
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+    
+    @property
+    def capacity(self) -> int:
+        """Tasks that can be admitted at the same time."""
+        return self.max_workers + self.max_queue
+    
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run fn(*args) on a worker thread and await its result.
+        
+        Raises:
+            ExecutorSaturated: If max_workers + max_queue tasks are already admitted
+        """
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                raise ExecutorSaturated(
+                    f"{self.name} is busy ({self._in_flight} of {self.capacity} slots in use)",
+                    self.retry_after(), self.saturated_status
+                )
+            self._in_flight += 1
+        
+        # Release the slot when the thread finishes, not when the caller stops
+        # waiting: a cancelled request does not stop work already running
+        started = time.perf_counter()
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(lambda _: self._release(started))
+        return await asyncio.wrap_future(future)
+    
+    def _release(self, started: float):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+            self._total_seconds += time.perf_counter() - started
+    
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up, from the mean task duration."""
+        mean_seconds = self._total_seconds / self._completed if self._completed else 1.0
+        waves = self._in_flight / self.max_workers
+        return max(1, math.ceil(mean_seconds * waves))
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Occupancy and throughput counters."""
+        return {
+            'in_flight': self._in_flight,
+            'capacity': self.capacity,
+            'max_workers': self.max_workers,
+            'completed': self._completed,
+            'rejected': self._rejected,
+            'mean_task_ms': 1000 * self._total_seconds / self._completed if self._completed else 0.0,
+        }
+    
+    def shutdown(self):
+        """Stop accepting work and wait for running tasks."""
+        self._pool.shutdown(wait=True)
\ No newline at end of file
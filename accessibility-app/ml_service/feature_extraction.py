@@ -4,70 +4,579 @@ Extracts features from accelerometer and GPS data for ML classification.
 """
 
 import numpy as np
-import pandas as pd
-from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
-from scipy import stats
-from scipy.signal import butter, filtfilt
+from typing import List, Dict, Tuple, Optional, Sequence, Union
+from numpy.lib.stride_tricks import sliding_window_view
 import math
 
-
-@dataclass
-class SensorData:
-    """Container for sensor data points."""
-    timestamp: float
-    acceleration_x: float
-    acceleration_y: float
-    acceleration_z: float
-    gyroscope_x: Optional[float] = None
-    gyroscope_y: Optional[float] = None
-    gyroscope_z: Optional[float] = None
-    latitude: Optional[float] = None
-    longitude: Optional[float] = None
-    speed: Optional[float] = None
-    heading: Optional[float] = None
-    accuracy: Optional[float] = None
+from . import kernels
+from .sensor_data import SensorData, SensorBatch
+from .resampling import Resampler
+from .filters import SensorFilter
+from .block_statistics import (
+    BlockAggregates, block_statistical_moments, sorted_windows, window_crossings,
+    sorted_median, sorted_percentile
+)
+from .feature_registry import FeatureSchema, STATISTICAL_FEATURES
+from .feature_graph import (
+    FeaturePlan, STATISTICAL_NODES, GYROSCOPE_PREFIXES, GPS_PREFIXES, GPS_FALLBACK_FEATURES
+)
 
 
 class FeatureExtractor:
     """Extracts features from sensor data for transport mode detection."""
     
-    def __init__(self, window_size: int = 50, overlap: float = 0.5):
+    def __init__(self, window_size: int = 50, overlap: float = 0.5,
+                 sample_rate: Optional[float] = None, window_seconds: Optional[float] = None,
+                 max_gap_seconds: float = 1.0, lowpass_cutoff: Optional[float] = None,
+                 gravity_cutoff: Optional[float] = None):
         """
         Initialize feature extractor.
         
         Args:
             window_size: Number of samples per window
             overlap: Overlap ratio between windows (0-1)
+            sample_rate: If set, traces are resampled onto a uniform grid at this
+                rate (Hz) before windowing, and spectral features are in Hz
+            window_seconds: Window duration in seconds; overrides window_size
+                (requires sample_rate)
+            max_gap_seconds: Gaps longer than this split a resampled trace into
+                segments that are windowed independently
+            lowpass_cutoff: Low-pass accelerometer and gyroscope channels at
+                this frequency in Hz (requires sample_rate)
+            gravity_cutoff: Remove gravity, estimated as acceleration below this
+                frequency in Hz, leaving linear acceleration (requires sample_rate)
         """
+        if window_seconds is not None:
+            if sample_rate is None:
+                raise ValueError("window_seconds requires sample_rate")
+            window_size = max(int(round(window_seconds * sample_rate)), 1)
+        if (lowpass_cutoff is not None or gravity_cutoff is not None) and sample_rate is None:
+            raise ValueError("filtering requires sample_rate")
+        
         self.window_size = window_size
         self.overlap = overlap
         self.step_size = int(window_size * (1 - overlap))
+        # Blocks of this size tile every window, so overlapping windows can share them
+        self.block_size = math.gcd(window_size, self.step_size)
+        
+        self.sample_rate = sample_rate
+        self.window_seconds = window_seconds
+        self.max_gap_seconds = max_gap_seconds
+        self.resampler = Resampler(sample_rate, max_gap_seconds) if sample_rate else None
+        
+        self.lowpass_cutoff = lowpass_cutoff
+        self.gravity_cutoff = gravity_cutoff
+        self.sensor_filter = None
+        if lowpass_cutoff is not None or gravity_cutoff is not None:
+            self.sensor_filter = SensorFilter(sample_rate, lowpass_cutoff, gravity_cutoff)
+        # Width of one FFT bin; 1.0 keeps bin indices for sample-count windows
+        self.frequency_resolution = sample_rate / window_size if sample_rate else 1.0
+    
+    def get_config(self) -> Dict[str, Optional[float]]:
+        """Constructor arguments, as stored alongside trained models."""
+        return {
+            'window_size': self.window_size,
+            'overlap': self.overlap,
+            'sample_rate': self.sample_rate,
+            'window_seconds': self.window_seconds,
+            'max_gap_seconds': self.max_gap_seconds,
+            'lowpass_cutoff': self.lowpass_cutoff,
+            'gravity_cutoff': self.gravity_cutoff
+        }
     
-    def extract_features(self, sensor_data: List[SensorData]) -> List[Dict[str, float]]:
+    @classmethod
+    def from_config(cls, config: Dict[str, Optional[float]]) -> 'FeatureExtractor':
+        """Rebuild an extractor from get_config() output (older configs lack the resampling and filter keys)."""
+        return cls(
+            window_size=config['window_size'],
+            overlap=config['overlap'],
+            sample_rate=config.get('sample_rate'),
+            window_seconds=config.get('window_seconds'),
+            max_gap_seconds=config.get('max_gap_seconds', 1.0),
+            lowpass_cutoff=config.get('lowpass_cutoff'),
+            gravity_cutoff=config.get('gravity_cutoff')
+        )
+    
+    def extract_features(self, sensor_data: Union[SensorBatch, List[SensorData]]) -> List[Dict[str, float]]:
         """
         Extract features from sensor data using sliding windows.
         
+        All windows are computed at once as 2-D strided views over the trace,
+        so each feature family is a single array operation over the window axis.
+        With a sample_rate the trace is resampled (and optionally filtered)
+        first and every gap-free segment is windowed on its own.
+        
         Args:
-            sensor_data: List of sensor data points
-            
+            sensor_data: Sensor data as a SensorBatch or a list of sensor data points
+        
         Returns:
             List of feature dictionaries for each window
         """
-        if len(sensor_data) < self.window_size:
-            return []
-        
         features = []
+        for segment in self._segments(self.as_batch(sensor_data)):
+            n_windows = self._num_windows(len(segment))
+            if n_windows:
+                groups = self._extract_window_columns(self._channel_arrays(segment))
+                features.extend(self._columns_to_dicts(groups, n_windows))
+        
+        return features
+    
+    def extract_feature_matrix(self, sensor_data: Union[SensorBatch, List[SensorData]],
+                               schema: Optional[FeatureSchema] = None,
+                               plan: Optional[FeaturePlan] = None) -> np.ndarray:
+        """
+        Extract features into a dense matrix with a fixed column order.
+        
+        Args:
+            sensor_data: Sensor data as a SensorBatch or a list of sensor data points
+            schema: Column order to write (defaults to every registered feature)
+            plan: Feature graph nodes to evaluate (defaults to those behind the
+                schema's columns); columns outside the plan are left at 0.0
         
-        for i in range(0, len(sensor_data) - self.window_size + 1, self.step_size):
-            window = sensor_data[i:i + self.window_size]
-            window_features = self._extract_window_features(window)
+        Returns:
+            (n_windows, n_features) float32 matrix. Features a window lacks
+            (no gyroscope, no GPS fix, undefined statistics) are 0.0.
+        """
+        schema = schema or FeatureSchema.default()
+        plan = plan or FeaturePlan(schema.columns)
+        segments = self._segments(self.as_batch(sensor_data))
+        counts = [self._num_windows(len(segment)) for segment in segments]
+        matrix = schema.empty_matrix(sum(counts))
+        
+        row = 0
+        for segment, n_windows in zip(segments, counts):
+            if n_windows:
+                groups = self._extract_window_columns(self._channel_arrays(segment), plan=plan)
+                self._write_matrix(groups, schema, matrix[row:row + n_windows])
+                row += n_windows
+        
+        return matrix
+    
+    @staticmethod
+    def _write_matrix(groups: List[Tuple[Optional[np.ndarray], Dict[str, np.ndarray]]],
+                      schema: FeatureSchema, matrix: np.ndarray):
+        """Write (mask, columns) groups into a preallocated feature matrix."""
+        for mask, columns in groups:
+            for name, values in columns.items():
+                column = schema.index.get(name)
+                if column is None:
+                    continue
+                if mask is None:
+                    matrix[:, column] = values
+                else:
+                    matrix[mask, column] = values[mask]
+        
+        # Undefined statistics (e.g. skewness of a constant window) count as 0.0, as in training
+        matrix[np.isnan(matrix)] = 0.0
+    
+    @staticmethod
+    def _columns_to_dicts(groups: List[Tuple[Optional[np.ndarray], Dict[str, np.ndarray]]],
+                          n_windows: int) -> List[Dict[str, float]]:
+        """Convert (mask, columns) groups into one feature dict per window."""
+        features = []
+        for i in range(n_windows):
+            window_features = {}
+            for mask, columns in groups:
+                if mask is not None and not mask[i]:
+                    continue
+                for name, values in columns.items():
+                    window_features[name] = float(values[i])
             features.append(window_features)
         
         return features
     
+    def count_windows(self, timestamps: Sequence[float]) -> int:
+        """
+        Number of windows (feature rows) a trace with these timestamps yields.
+        
+        Cheap enough to size output buffers before extracting anything.
+        """
+        if self.resampler is None:
+            return self._num_windows(len(timestamps))
+        return sum(self._num_windows(length) for length in self.resampler.segment_lengths(timestamps))
+    
+    def _segments(self, batch: SensorBatch) -> List[SensorBatch]:
+        """Uniformly resampled, filtered gap-free segments, or the batch itself without a sample_rate."""
+        if self.resampler is None:
+            return [batch]
+        
+        segments = self.resampler.resample(batch)
+        if self.sensor_filter is not None:
+            segments = [self.sensor_filter.apply(segment)[0] for segment in segments]
+        return segments
+    
+    def _num_windows(self, num_samples: int) -> int:
+        """Number of sliding windows that fit in a trace of the given length."""
+        if num_samples < self.window_size:
+            return 0
+        return (num_samples - self.window_size) // self.step_size + 1
+    
+    def _windows(self, data: np.ndarray) -> np.ndarray:
+        """Return a (n_windows, window_size) strided view over a 1-D channel."""
+        return sliding_window_view(data, self.window_size)[::self.step_size]
+    
+    @staticmethod
+    def as_batch(sensor_data: Union[SensorBatch, List[SensorData]]) -> SensorBatch:
+        """Return sensor data as a SensorBatch, converting point lists if needed."""
+        if isinstance(sensor_data, SensorBatch):
+            return sensor_data
+        return SensorBatch.from_sensor_data(sensor_data)
+    
+    def _channel_arrays(self, batch: SensorBatch) -> Dict[str, np.ndarray]:
+        """Map batch channels onto the arrays the window engine works with."""
+        return {
+            'accel_x': batch.acceleration_x,
+            'accel_y': batch.acceleration_y,
+            'accel_z': batch.acceleration_z,
+            'gyro_x': batch.gyroscope_x,
+            'gyro_y': batch.gyroscope_y,
+            'gyro_z': batch.gyroscope_z,
+            'latitude': batch.latitude,
+            'longitude': batch.longitude,
+            'speed': batch.speed,
+            'heading': batch.heading,
+            'gyro_valid': batch.valid['gyroscope_x'],
+            'latitude_valid': batch.valid['latitude'],
+            'gps_valid': batch.valid['latitude'] & batch.valid['longitude'],
+        }
+    
+    def _extract_window_columns(self, channels: Dict[str, np.ndarray],
+                                moments: Optional[Dict[str, Dict[str, np.ndarray]]] = None,
+                                plan: Optional[FeaturePlan] = None
+                                ) -> List[Tuple[Optional[np.ndarray], Dict[str, np.ndarray]]]:
+        """
+        Compute features for every window as column arrays.
+        
+        Args:
+            channels: Channel arrays from _channel_arrays
+            moments: Optional precomputed mean/std/min/max/skewness/kurtosis
+                columns per accelerometer/gyroscope prefix, e.g. from running sums
+            plan: Feature graph nodes to evaluate (defaults to all of them)
+        
+        Returns:
+            Ordered list of (window mask, columns) groups. A group's columns are
+            only reported for windows where its mask is set (None means all windows).
+            Group and column order match the per-window dict key order.
+        """
+        moments = moments or {}
+        plan = plan or FeaturePlan()
+        
+        accel_magnitude_trace = None
+        if plan.needs('accel_magnitude'):
+            accel_magnitude_trace = np.sqrt(channels['accel_x'] ** 2 + channels['accel_y'] ** 2 + channels['accel_z'] ** 2)
+        
+        accel_columns = {}
+        accel_columns.update(self._statistical_columns(channels['accel_x'], "accel_x", moments, plan=plan))
+        accel_columns.update(self._statistical_columns(channels['accel_y'], "accel_y", moments, plan=plan))
+        accel_columns.update(self._statistical_columns(channels['accel_z'], "accel_z", moments, plan=plan))
+        if accel_magnitude_trace is not None:
+            accel_columns.update(self._statistical_columns(accel_magnitude_trace, "accel_magnitude", moments, plan=plan))
+        if plan.needs('accel_magnitude', 'spectrum'):
+            accel_columns.update(self._batch_frequency_features(self._windows(accel_magnitude_trace), "accel_magnitude"))
+        if plan.needs('accel', 'correlation'):
+            accel_columns.update(self._batch_cross_axis_features(
+                self._windows(channels['accel_x']),
+                self._windows(channels['accel_y']),
+                self._windows(channels['accel_z'])
+            ))
+        
+        groups = [(None, accel_columns)]
+        if plan.needs('accel_magnitude', 'peaks'):
+            groups.extend(self._batch_peak_features(self._windows(accel_magnitude_trace), "accel_magnitude"))
+        
+        # Gyroscope features for windows with any gyroscope reading
+        if plan.needs_any(GYROSCOPE_PREFIXES):
+            gyro_mask = self._windows(channels['gyro_valid']).any(axis=1)
+            if gyro_mask.any():
+                groups.append((gyro_mask, self._batch_gyroscope_features(channels, gyro_mask, moments, plan)))
+        
+        # GPS features for windows with any latitude reading
+        if plan.needs_any(GPS_PREFIXES):
+            gps_mask = self._windows(channels['latitude_valid']).any(axis=1)
+            if gps_mask.any():
+                groups.extend(self._batch_gps_features(channels, gps_mask, plan))
+        
+        return groups
+    
+    def _batch_gyroscope_features(self, channels: Dict[str, np.ndarray], mask: np.ndarray,
+                                  moments: Dict[str, Dict[str, np.ndarray]],
+                                  plan: FeaturePlan) -> Dict[str, np.ndarray]:
+        """Gyroscope feature columns, computed only for the masked windows."""
+        rows = np.flatnonzero(mask)
+        
+        features = {}
+        features.update(self._statistical_columns(channels['gyro_x'], "gyro_x", moments, rows, plan))
+        features.update(self._statistical_columns(channels['gyro_y'], "gyro_y", moments, rows, plan))
+        features.update(self._statistical_columns(channels['gyro_z'], "gyro_z", moments, rows, plan))
+        if plan.needs('gyro_magnitude'):
+            gyro_magnitude = np.sqrt(channels['gyro_x'] ** 2 + channels['gyro_y'] ** 2 + channels['gyro_z'] ** 2)
+            features.update(self._statistical_columns(gyro_magnitude, "gyro_magnitude", moments, rows, plan))
+            if plan.needs('gyro_magnitude', 'spectrum'):
+                features.update(self._batch_frequency_features(self._windows(gyro_magnitude)[rows], "gyro_magnitude"))
+        
+        return {name: self._scatter(values, rows, len(mask)) for name, values in features.items()}
+    
+    def _batch_gps_features(self, channels: Dict[str, np.ndarray], mask: np.ndarray,
+                            plan: FeaturePlan) -> List[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+        """
+        GPS feature column groups for the masked windows.
+        
+        Windows where every point has a fix are computed together; windows with
+        partial fixes only use their valid points, so they are computed one at a time.
+        """
+        n_windows = len(mask)
+        valid = self._windows(channels['gps_valid'])
+        valid_counts = valid.sum(axis=1)
+        
+        full_rows = np.flatnonzero(mask & (valid_counts == valid.shape[1]))
+        partial_rows = np.flatnonzero(mask & (valid_counts >= 2) & (valid_counts < valid.shape[1]))
+        default_mask = mask & (valid_counts < 2)
+        
+        columns = {}
+        if len(full_rows):
+            window_columns = self._batch_gps_window_features(
+                self._windows(channels['latitude'])[full_rows],
+                self._windows(channels['longitude'])[full_rows],
+                self._windows(channels['speed'])[full_rows],
+                self._windows(channels['heading'])[full_rows],
+                plan
+            )
+            for name, values in window_columns.items():
+                columns.setdefault(name, np.full(n_windows, np.nan))[full_rows] = values
+        
+        for row in partial_rows:
+            start = row * self.step_size
+            points = slice(start, start + self.window_size)
+            keep = channels['gps_valid'][points]
+            window_columns = self._batch_gps_window_features(
+                channels['latitude'][points][keep][None, :],
+                channels['longitude'][points][keep][None, :],
+                channels['speed'][points][keep][None, :],
+                channels['heading'][points][keep][None, :],
+                plan
+            )
+            for name, values in window_columns.items():
+                columns.setdefault(name, np.full(n_windows, np.nan))[row] = values[0]
+        
+        groups = []
+        if columns:
+            efficiency = columns.pop('gps_efficiency', None)
+            groups.append((mask & (valid_counts >= 2), columns))
+            if efficiency is not None:
+                groups.append((~np.isnan(efficiency), {'gps_efficiency': efficiency}))
+        
+        if default_mask.any() and plan.needs('gps', 'fallback'):
+            groups.append((default_mask, {
+                name: np.zeros(n_windows) for name in GPS_FALLBACK_FEATURES
+            }))
+        
+        return groups
+    
+    def _batch_gps_window_features(self, latitudes: np.ndarray, longitudes: np.ndarray,
+                                   speeds: np.ndarray, headings: np.ndarray,
+                                   plan: FeaturePlan) -> Dict[str, np.ndarray]:
+        """Speed, heading and distance columns for windows of valid GPS points."""
+        features = {}
+        features.update(self._batch_statistical_features(speeds, "speed", nodes=plan.statistical_nodes('speed')))
+        features.update(self._batch_statistical_features(headings, "heading", nodes=plan.statistical_nodes('heading')))
+        if not plan.needs('gps', 'distance'):
+            return features
+        
+        total_distance, mean_distance, distance_std, displacement = kernels.path_distances(latitudes, longitudes)
+        
+        features["gps_total_distance"] = total_distance
+        features["gps_mean_distance"] = mean_distance
+        features["gps_distance_std"] = distance_std
+        features["gps_displacement"] = displacement
+        
+        # Efficiency is only reported when the window covered some distance
+        with np.errstate(divide='ignore', invalid='ignore'):
+            features["gps_efficiency"] = np.where(total_distance > 0, displacement / total_distance, np.nan)
+        
+        return features
+    
+    def _statistical_columns(self, channel: np.ndarray, prefix: str,
+                             moments: Dict[str, Dict[str, np.ndarray]],
+                             rows: Optional[np.ndarray] = None,
+                             plan: Optional[FeaturePlan] = None) -> Dict[str, np.ndarray]:
+        """
+        Statistical feature columns for a full 1-D channel.
+        
+        Overlapping windows are assembled from per-block aggregates so samples
+        shared between windows are only summarised once. Without overlap, or
+        when moments are supplied by the caller, windows are computed directly.
+        
+        Args:
+            channel: Channel values for the whole trace
+            prefix: Feature name prefix
+            moments: Precomputed moments keyed by prefix (see _extract_window_columns)
+            rows: Optional subset of windows to return
+            plan: Feature graph nodes to evaluate (defaults to all of them)
+        """
+        nodes = (plan or FeaturePlan()).statistical_nodes(prefix)
+        if not nodes:
+            return {}
+        
+        if prefix not in moments and self.block_size < self.window_size:
+            features = self._block_statistical_features(channel, prefix, nodes)
+            if rows is not None:
+                features = {name: values[rows] for name, values in features.items()}
+            return features
+        
+        windows = self._windows(channel)
+        prefix_moments = moments.get(prefix)
+        if rows is not None:
+            windows = windows[rows]
+            if prefix_moments is not None:
+                prefix_moments = {name: values[rows] for name, values in prefix_moments.items()}
+        
+        return self._batch_statistical_features(windows, prefix, prefix_moments, nodes)
+    
+    def _block_statistical_features(self, channel: np.ndarray, prefix: str,
+                                    nodes: Tuple[str, ...] = STATISTICAL_NODES) -> Dict[str, np.ndarray]:
+        """Statistical feature columns for all windows, merged from step-aligned blocks."""
+        n_windows = self._num_windows(len(channel))
+        span = (n_windows - 1) * self.step_size + self.window_size
+        blocks_per_window = self.window_size // self.block_size
+        first_blocks = np.arange(n_windows) * (self.step_size // self.block_size)
+        starts = first_blocks * self.block_size
+        
+        data = np.nan_to_num(channel[:span], nan=0.0)
+        values = {}
+        
+        if 'moments' in nodes:
+            aggregates = BlockAggregates(data, self.block_size, self.window_size)
+            values.update(block_statistical_moments(aggregates, first_blocks, blocks_per_window))
+        if 'order' in nodes:
+            values.update(self._order_statistics(sorted_windows(data, starts, self.window_size)))
+        if 'crossings' in nodes:
+            values['zero_crossing_rate'] = window_crossings(data, starts, self.window_size) / self.window_size
+        
+        return self._statistical_feature_dict(prefix, values)
+    
+    def _batch_statistical_features(self, windows: np.ndarray, prefix: str,
+                                    moments: Optional[Dict[str, np.ndarray]] = None,
+                                    nodes: Tuple[str, ...] = STATISTICAL_NODES) -> Dict[str, np.ndarray]:
+        """
+        Statistical feature columns over the window axis.
+        
+        If `moments` is given, its mean/std/min/max/skewness/kurtosis columns are
+        used instead of recomputing them from the window data. Only the
+        intermediates listed in `nodes` are evaluated; moments and sign
+        changes come from one fused kernel call.
+        """
+        data = np.nan_to_num(windows, nan=0.0)
+        values = {}
+        
+        if 'order' in nodes:
+            values.update(self._order_statistics(np.sort(data, axis=1)))
+        
+        compute_moments = 'moments' in nodes and moments is None
+        if compute_moments or 'crossings' in nodes:
+            values.update(kernels.window_statistics(data, moments=compute_moments,
+                                                    crossings='crossings' in nodes))
+        if 'moments' in nodes and moments is not None:
+            values.update(moments)
+        
+        return self._statistical_feature_dict(prefix, values)
+    
+    @staticmethod
+    def _order_statistics(sorted_data: np.ndarray) -> Dict[str, np.ndarray]:
+        """Min, max, median and quartiles, all read from one sort of each window."""
+        return {
+            'min': sorted_data[:, 0],
+            'max': sorted_data[:, -1],
+            'median': sorted_median(sorted_data),
+            'q25': sorted_percentile(sorted_data, 25),
+            'q75': sorted_percentile(sorted_data, 75),
+        }
+    
+    @staticmethod
+    def _statistical_feature_dict(prefix: str, values: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Assemble the computed statistical feature columns in the canonical key order."""
+        values = dict(values)
+        if 'min' in values and 'max' in values:
+            values['range'] = values['max'] - values['min']
+        if 'q25' in values and 'q75' in values:
+            values['iqr'] = values['q75'] - values['q25']
+        
+        return {f"{prefix}_{name}": values[name] for name in STATISTICAL_FEATURES if name in values}
+    
+    def _batch_frequency_features(self, windows: np.ndarray, prefix: str) -> Dict[str, np.ndarray]:
+        """Frequency domain feature columns, one FFT per window in a single call."""
+        if windows.shape[1] < 4:
+            return {}
+        
+        data = np.where(np.isnan(windows), 0.0, windows)
+        
+        fft_magnitude = np.abs(np.fft.fft(data, axis=1))
+        psd = fft_magnitude ** 2
+        bins = np.arange(psd.shape[1])
+        total_power = np.sum(psd, axis=1)
+        
+        resolution = self.frequency_resolution
+        
+        features = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            centroid = np.sum(psd * bins, axis=1) / total_power
+            features[f"{prefix}_spectral_centroid"] = centroid * resolution
+            # Rolloff is a cumulative energy level, not a frequency, so it is not rescaled
+            features[f"{prefix}_spectral_rolloff"] = np.percentile(np.cumsum(psd, axis=1), 85, axis=1)
+            features[f"{prefix}_spectral_bandwidth"] = np.sqrt(
+                np.sum(psd * (bins - centroid[:, None]) ** 2, axis=1) / total_power
+            ) * resolution
+        
+        # Dominant frequency
+        features[f"{prefix}_dominant_frequency"] = (
+            np.argmax(fft_magnitude[:, 1:psd.shape[1] // 2], axis=1) + 1
+        ) * resolution
+        
+        return features
+    
+    def _batch_cross_axis_features(self, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> Dict[str, np.ndarray]:
+        """Pearson correlation between accelerometer axes for every window."""
+        if x.shape[1] <= 1:
+            return {}
+        
+        centered = [axis - np.mean(axis, axis=1, keepdims=True) for axis in (x, y, z)]
+        std = [np.sqrt(np.einsum('ij,ij->i', c, c)) for c in centered]
+        
+        def correlation(a: int, b: int) -> np.ndarray:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                r = np.einsum('ij,ij->i', centered[a], centered[b]) / std[a] / std[b]
+            return np.clip(r, -1, 1)
+        
+        return {
+            "accel_xy_correlation": correlation(0, 1),
+            "accel_xz_correlation": correlation(0, 2),
+            "accel_yz_correlation": correlation(1, 2),
+        }
+    
+    def _batch_peak_features(self, windows: np.ndarray, prefix: str) -> List[Tuple[Optional[np.ndarray], Dict[str, np.ndarray]]]:
+        """Peak count for every window, plus peak mean/std for windows with peaks."""
+        if windows.shape[1] < 3:
+            return []
+        
+        peak_count, peak_mean, peak_std = kernels.peak_statistics(windows)
+        
+        return [
+            (None, {f"{prefix}_peak_count": peak_count}),
+            (peak_count > 0, {f"{prefix}_peak_mean": peak_mean, f"{prefix}_peak_std": peak_std}),
+        ]
+    
+    @staticmethod
+    def _scatter(values: np.ndarray, rows: np.ndarray, n_windows: int) -> np.ndarray:
+        """Expand per-row values back to a full-length column (NaN elsewhere)."""
+        column = np.full(n_windows, np.nan)
+        column[rows] = values
+        return column
+    
     def _extract_window_features(self, window: List[SensorData]) -> Dict[str, float]:
-        """Extract features from a single window of sensor data."""
+        """
+        Extract features from a single window of sensor data.
+        
+        Reference implementation of the batched engine used by extract_features.
+        """
         features = {}
         
         # Extract accelerometer features
@@ -208,6 +717,7 @@ class FeatureExtractor:
         features[f"{prefix}_iqr"] = float(np.percentile(data_array, 75) - np.percentile(data_array, 25))
         
         # Skewness and kurtosis
+        from scipy import stats
         features[f"{prefix}_skewness"] = float(stats.skew(data_array))
         features[f"{prefix}_kurtosis"] = float(stats.kurtosis(data_array))
         
@@ -0,0 +1,97 @@
+"""
+Feature dependency graph for transport mode detection.
+Maps every feature column to the shared intermediate it is derived from
+(one sort per window feeds all order statistics, one FFT feeds all spectral
+features), so extraction can evaluate only the intermediates a model reads.
+"""
+
+from typing import Dict, FrozenSet, Iterable, Optional, Sequence, Tuple
+
+from .feature_registry import (
+    STATISTICAL_FEATURES, SPECTRAL_FEATURES, PEAK_FEATURES,
+    CROSS_AXIS_FEATURES, DISTANCE_FEATURES
+)
+
+
+# Intermediates behind the statistical features of a channel, in evaluation order
+STATISTICAL_NODES = ('moments', 'order', 'crossings')
+
+STATISTICAL_FEATURE_NODES = {
+    'mean': 'moments',
+    'std': 'moments',
+    'skewness': 'moments',
+    'kurtosis': 'moments',
+    'min': 'order',
+    'max': 'order',
+    'range': 'order',
+    'median': 'order',
+    'q25': 'order',
+    'q75': 'order',
+    'iqr': 'order',
+    'zero_crossing_rate': 'crossings',
+}
+
+ACCELEROMETER_PREFIXES = ('accel_x', 'accel_y', 'accel_z', 'accel_magnitude')
+GYROSCOPE_PREFIXES = ('gyro_x', 'gyro_y', 'gyro_z', 'gyro_magnitude')
+GPS_PREFIXES = ('speed', 'heading', 'gps')
+
+# Placeholder columns reported for windows with fewer than two GPS fixes
+GPS_FALLBACK_FEATURES = (
+    'gps_speed_mean', 'gps_speed_std', 'gps_speed_max',
+    'gps_heading_mean', 'gps_heading_std', 'gps_distance_total',
+    'gps_distance_mean', 'gps_velocity_mean', 'gps_acceleration_mean'
+)
+
+
+def _column_nodes() -> Dict[str, Tuple[str, str]]:
+    nodes = {}
+    for prefix in ACCELEROMETER_PREFIXES + GYROSCOPE_PREFIXES + ('speed', 'heading'):
+        for name in STATISTICAL_FEATURES:
+            nodes[f"{prefix}_{name}"] = (prefix, STATISTICAL_FEATURE_NODES[name])
+    for prefix in ('accel_magnitude', 'gyro_magnitude'):
+        for name in SPECTRAL_FEATURES:
+            nodes[f"{prefix}_{name}"] = (prefix, 'spectrum')
+    for name in PEAK_FEATURES:
+        nodes[f"accel_magnitude_{name}"] = ('accel_magnitude', 'peaks')
+    for name in CROSS_AXIS_FEATURES:
+        nodes[name] = ('accel', 'correlation')
+    for name in DISTANCE_FEATURES:
+        nodes[name] = ('gps', 'distance')
+    for name in GPS_FALLBACK_FEATURES:
+        nodes[name] = ('gps', 'fallback')
+    return nodes
+
+
+# Column name -> (channel, intermediate) it is computed from
+COLUMN_NODES: Dict[str, Tuple[str, str]] = _column_nodes()
+
+
+class FeaturePlan:
+    """The graph nodes that must be evaluated to produce a set of feature columns."""
+    
+    def __init__(self, columns: Optional[Iterable[str]] = None):
+        """
+        Initialize a feature plan.
+        
+        Args:
+            columns: Feature columns to produce, or None for every feature
+        """
+        self.nodes: Optional[FrozenSet[Tuple[str, str]]] = None
+        if columns is not None:
+            self.nodes = frozenset(COLUMN_NODES[name] for name in columns if name in COLUMN_NODES)
+    
+    def needs(self, channel: str, node: Optional[str] = None) -> bool:
+        """Whether a node of a channel (or any node, if none is given) is required."""
+        if self.nodes is None:
+            return True
+        if node is None:
+            return any(required == channel for required, _ in self.nodes)
+        return (channel, node) in self.nodes
+    
+    def needs_any(self, channels: Sequence[str]) -> bool:
+        """Whether any node of any of the channels is required."""
+        return any(self.needs(channel) for channel in channels)
+    
+    def statistical_nodes(self, channel: str) -> Tuple[str, ...]:
+        """Statistical intermediates required for a channel."""
+        return tuple(node for node in STATISTICAL_NODES if self.needs(channel, node))
\ No newline at end of file
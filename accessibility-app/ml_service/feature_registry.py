@@ -0,0 +1,114 @@
+"""
+Feature registry for transport mode detection.
+Declares the fixed, versioned column order of the feature matrix so that
+training and prediction always agree on which column holds which feature.
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple, Any
+
+
+# Bump whenever a column is added, removed, renamed or reordered
+FEATURE_SCHEMA_VERSION = 1
+
+STATISTICAL_FEATURES = (
+    'mean', 'std', 'min', 'max', 'range', 'median',
+    'q25', 'q75', 'iqr', 'skewness', 'kurtosis', 'zero_crossing_rate'
+)
+
+SPECTRAL_FEATURES = (
+    'spectral_centroid', 'spectral_rolloff', 'spectral_bandwidth', 'dominant_frequency'
+)
+
+PEAK_FEATURES = ('peak_count', 'peak_mean', 'peak_std')
+
+CROSS_AXIS_FEATURES = ('accel_xy_correlation', 'accel_xz_correlation', 'accel_yz_correlation')
+
+DISTANCE_FEATURES = (
+    'gps_total_distance', 'gps_mean_distance', 'gps_distance_std',
+    'gps_displacement', 'gps_efficiency'
+)
+
+
+def _prefixed(prefix: str, names: Sequence[str]) -> Tuple[str, ...]:
+    return tuple(f"{prefix}_{name}" for name in names)
+
+
+# Column groups in matrix order. Columns of a group that a window lacks
+# (no gyroscope, no GPS fix, no peaks) are written as 0.0.
+FEATURE_GROUPS: Dict[str, Tuple[str, ...]] = {
+    'accelerometer': (
+        _prefixed('accel_x', STATISTICAL_FEATURES)
+        + _prefixed('accel_y', STATISTICAL_FEATURES)
+        + _prefixed('accel_z', STATISTICAL_FEATURES)
+        + _prefixed('accel_magnitude', STATISTICAL_FEATURES)
+        + _prefixed('accel_magnitude', SPECTRAL_FEATURES)
+        + CROSS_AXIS_FEATURES
+        + _prefixed('accel_magnitude', PEAK_FEATURES)
+    ),
+    'gyroscope': (
+        _prefixed('gyro_x', STATISTICAL_FEATURES)
+        + _prefixed('gyro_y', STATISTICAL_FEATURES)
+        + _prefixed('gyro_z', STATISTICAL_FEATURES)
+        + _prefixed('gyro_magnitude', STATISTICAL_FEATURES)
+        + _prefixed('gyro_magnitude', SPECTRAL_FEATURES)
+    ),
+    'gps': (
+        _prefixed('speed', STATISTICAL_FEATURES)
+        + _prefixed('heading', STATISTICAL_FEATURES)
+        + DISTANCE_FEATURES
+    ),
+}
+
+FEATURE_COLUMNS: Tuple[str, ...] = tuple(
+    column for columns in FEATURE_GROUPS.values() for column in columns
+)
+
+
+class FeatureSchema:
+    """Ordered set of feature columns a model was trained on."""
+    
+    def __init__(self, columns: Sequence[str], version: int = FEATURE_SCHEMA_VERSION):
+        """
+        Initialize a feature schema.
+        
+        Args:
+            columns: Feature names in matrix column order
+            version: Registry version the columns were taken from
+        """
+        self.columns = tuple(columns)
+        self.version = version
+        self.index = {name: i for i, name in enumerate(self.columns)}
+    
+    @classmethod
+    def default(cls) -> 'FeatureSchema':
+        """Schema containing every registered column."""
+        return cls(FEATURE_COLUMNS)
+    
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]], feature_names: Optional[List[str]] = None) -> 'FeatureSchema':
+        """
+        Restore a schema saved with a model.
+        
+        Models saved before the registry existed only carry `feature_names`;
+        those are treated as version 0 schemas.
+        """
+        if data is None:
+            return cls(feature_names or FEATURE_COLUMNS, version=0)
+        return cls(data['columns'], version=data['version'])
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable form stored in model artifacts."""
+        return {'version': self.version, 'columns': list(self.columns)}
+    
+    def unknown_columns(self) -> List[str]:
+        """Columns the feature extractor does not produce (always 0.0)."""
+        known = set(FEATURE_COLUMNS)
+        return [name for name in self.columns if name not in known]
+    
+    def __len__(self) -> int:
+        return len(self.columns)
+    
+    def empty_matrix(self, n_windows: int) -> np.ndarray:
+        """Preallocated zero-filled (n_windows, n_features) float32 matrix."""
+        return np.zeros((n_windows, len(self.columns)), dtype=np.float32)
\ No newline at end of file
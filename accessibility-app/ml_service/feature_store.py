@@ -0,0 +1,155 @@
+"""
+Persistent feature store for transport mode training.
+Caches extracted feature matrices and labels on disk, content-addressed by
+training sample, extractor configuration and feature schema, so retraining
+only extracts samples it has not seen before and memory-maps the rest.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+import numpy as np
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .feature_registry import FeatureSchema
+from .parallel_extraction import ParallelFeatureExtractor
+
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def sample_key(sample: Dict[str, Any]) -> str:
+    """Content hash of a training sample's sensor data and label."""
+    payload = json.dumps(
+        {'sensor_data': sample['sensor_data'], 'transport_mode': sample['transport_mode']},
+        sort_keys=True, separators=(',', ':'), default=float
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class FeatureStore:
+    """
+    On-disk cache of per-sample feature rows.
+    
+    Each (extractor config, schema) pair gets its own namespace directory.
+    Rows are appended in shards, one `.npy` pair (float32 features, labels)
+    per extraction run, and a manifest maps every sample hash to its shard
+    and row range. Shards are opened with mmap, so cached rows are read
+    straight from the page cache.
+    """
+    
+    def __init__(self, root: str = "data/feature_store"):
+        """
+        Initialize feature store.
+        
+        Args:
+            root: Directory holding one namespace per extractor config and schema
+        """
+        self.root = root
+    
+    def extract(self, samples: Sequence[Dict[str, Any]], extractor: ParallelFeatureExtractor,
+                schema: FeatureSchema) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Feature matrix and labels for training samples, extracting only uncached ones.
+        
+        Args:
+            samples: Training samples with 'sensor_data' and 'transport_mode' keys
+            extractor: Extractor used for samples missing from the store
+            schema: Column order of the matrix
+        
+        Returns:
+            (feature matrix, label per row) with the windows of all samples in order.
+            When every sample is one contiguous run of a single shard, the matrix
+            is a read-only memory map of that shard.
+        """
+        directory = self._namespace(extractor.feature_extractor.get_config(), schema)
+        manifest = self._read_manifest(directory)
+        keys = [sample_key(sample) for sample in samples]
+        
+        missing = {}
+        for key, sample in zip(keys, samples):
+            if key not in manifest['samples'] and key not in missing:
+                missing[key] = sample
+        
+        if missing:
+            print(f"Feature store: extracting {len(missing)} of {len(samples)} samples")
+            X, counts = extractor.extract(list(missing.values()), schema)
+            labels = np.repeat([sample['transport_mode'] for sample in missing.values()], counts)
+            manifest = self._write_shard(directory, list(missing), X, labels, counts)
+        
+        return self._assemble(directory, manifest, keys, len(schema))
+    
+    def _namespace(self, extractor_config: Dict[str, Any], schema: FeatureSchema) -> str:
+        """Directory for one extractor configuration and feature schema."""
+        identity = {'extractor': extractor_config, 'schema': schema.to_dict()}
+        digest = hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()[:16]
+        directory = os.path.join(self.root, f"v{schema.version}-{digest}")
+        os.makedirs(directory, exist_ok=True)
+        
+        identity_path = os.path.join(directory, 'namespace.json')
+        if not os.path.exists(identity_path):
+            with open(identity_path, 'w') as f:
+                json.dump(identity, f, indent=2)
+        return directory
+    
+    @staticmethod
+    def _read_manifest(directory: str) -> Dict[str, Any]:
+        """Sample index of a namespace (empty for a new one)."""
+        path = os.path.join(directory, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return {'samples': {}, 'shards': {}}
+        with open(path) as f:
+            return json.load(f)
+    
+    def _write_shard(self, directory: str, keys: List[str], X: np.ndarray,
+                     labels: np.ndarray, counts: np.ndarray) -> Dict[str, Any]:
+        """Persist newly extracted rows as a shard and index them."""
+        shard = uuid.uuid4().hex
+        np.save(os.path.join(directory, f"{shard}.features.npy"), X)
+        np.save(os.path.join(directory, f"{shard}.labels.npy"), labels.astype(str))
+        
+        # Re-read so samples added by another process since extraction started are kept
+        manifest = self._read_manifest(directory)
+        manifest['shards'][shard] = {'rows': len(X)}
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        for key, start, stop in zip(keys, offsets[:-1], offsets[1:]):
+            manifest['samples'][key] = [shard, int(start), int(stop)]
+        
+        path = os.path.join(directory, MANIFEST_NAME)
+        temp_path = f"{path}.{shard}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, path)
+        return manifest
+    
+    @staticmethod
+    def _assemble(directory: str, manifest: Dict[str, Any], keys: List[str],
+                  n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Gather the rows of each sample, in order, from the memory-mapped shards."""
+        ranges = [manifest['samples'][key] for key in keys]
+        if not ranges:
+            return np.empty((0, n_features), dtype=np.float32), np.empty(0, dtype=str)
+        
+        shards = {}
+        for shard, _, _ in ranges:
+            if shard not in shards:
+                shards[shard] = (
+                    np.load(os.path.join(directory, f"{shard}.features.npy"), mmap_mode='r'),
+                    np.load(os.path.join(directory, f"{shard}.labels.npy"), mmap_mode='r')
+                )
+        
+        # Same samples in the same order as a single extraction run: no copy at all
+        if len(shards) == 1 and all(prev[2] == cur[1] for prev, cur in zip(ranges, ranges[1:])):
+            features, labels = shards[ranges[0][0]]
+            return features[ranges[0][1]:ranges[-1][2]], labels[ranges[0][1]:ranges[-1][2]]
+        
+        total = sum(stop - start for _, start, stop in ranges)
+        X = np.empty((total, n_features), dtype=np.float32)
+        row = 0
+        for shard, start, stop in ranges:
+            X[row:row + stop - start] = shards[shard][0][start:stop]
+            row += stop - start
+        y = np.concatenate([shards[shard][1][start:stop] for shard, start, stop in ranges])
+        
+        return X, y
\ No newline at end of file
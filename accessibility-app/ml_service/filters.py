@@ -0,0 +1,116 @@
+"""
+Causal IIR filtering for transport mode detection.
+Separates gravity from linear acceleration and band-limits the accelerometer
+and gyroscope channels of uniformly sampled sensor data.
+"""
+
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+from .sensor_data import SensorBatch
+
+
+ACCEL_CHANNELS = ('acceleration_x', 'acceleration_y', 'acceleration_z')
+GYRO_CHANNELS = ('gyroscope_x', 'gyroscope_y', 'gyroscope_z')
+
+# Filter state carried between chunks of one stream: section state per filter
+FilterState = Dict[str, np.ndarray]
+
+
+class SensorFilter:
+    """
+    Butterworth filters in second-order sections, applied to all motion
+    channels at once.
+    
+    Filtering is causal (sosfilt rather than filtfilt), so a stream can be
+    filtered chunk by chunk with the section state carried over, and gives
+    exactly the same output as filtering the whole trace in one call.
+    """
+    
+    def __init__(self, sample_rate: float, lowpass_cutoff: Optional[float] = None,
+                 gravity_cutoff: Optional[float] = None, order: int = 4):
+        """
+        Initialize sensor filter.
+        
+        Args:
+            sample_rate: Sample rate of the (resampled) data in Hz
+            lowpass_cutoff: Low-pass cutoff in Hz for accelerometer and
+                gyroscope channels, or None to leave them unfiltered
+            gravity_cutoff: Cutoff in Hz below which acceleration is treated as
+                gravity and removed, or None to keep gravity
+            order: Butterworth filter order
+        """
+        nyquist = sample_rate / 2
+        for name, cutoff in (('lowpass_cutoff', lowpass_cutoff), ('gravity_cutoff', gravity_cutoff)):
+            if cutoff is not None and not 0 < cutoff < nyquist:
+                raise ValueError(f"{name} must be between 0 and the Nyquist frequency ({nyquist} Hz)")
+        
+        self.sample_rate = sample_rate
+        self.lowpass_cutoff = lowpass_cutoff
+        self.gravity_cutoff = gravity_cutoff
+        self.order = order
+        
+        # scipy is only needed once filtering is configured
+        from scipy.signal import butter
+        
+        self._sos = {}
+        if lowpass_cutoff is not None:
+            self._sos['lowpass'] = butter(order, lowpass_cutoff, btype='low', fs=sample_rate, output='sos')
+        if gravity_cutoff is not None:
+            self._sos['gravity'] = butter(order, gravity_cutoff, btype='low', fs=sample_rate, output='sos')
+    
+    def apply(self, batch: SensorBatch, state: Optional[FilterState] = None) -> Tuple[SensorBatch, FilterState]:
+        """
+        Filter one chunk of uniformly sampled data.
+        
+        Args:
+            batch: Samples on a uniform grid at sample_rate
+            state: State returned for the previous chunk of the same segment,
+                or None to start a new segment
+        
+        Returns:
+            (filtered batch, state to pass with the next chunk)
+        """
+        if not len(batch):
+            return batch, state or {}
+        
+        from scipy.signal import sosfilt
+        
+        # (n_channels, n_samples); every channel is filtered in one sosfilt call
+        motion = np.stack([batch.channels[name] for name in ACCEL_CHANNELS + GYRO_CHANNELS])
+        state = dict(state) if state else self._initial_state(motion)
+        channels = dict(batch.channels)
+        
+        if 'lowpass' in self._sos:
+            motion, state['lowpass'] = sosfilt(self._sos['lowpass'], motion, axis=1, zi=state['lowpass'])
+        
+        accel = motion[:len(ACCEL_CHANNELS)]
+        if 'gravity' in self._sos:
+            gravity, state['gravity'] = sosfilt(self._sos['gravity'], accel, axis=1, zi=state['gravity'])
+            accel = accel - gravity
+        
+        for name, values in zip(ACCEL_CHANNELS, accel):
+            channels[name] = values
+        for name, values in zip(GYRO_CHANNELS, motion[len(ACCEL_CHANNELS):]):
+            channels[name] = np.where(batch.valid[name], values, 0.0)
+        
+        return SensorBatch(channels, batch.valid), state
+    
+    def _initial_state(self, motion: np.ndarray) -> FilterState:
+        """
+        Steady-state section state for a segment starting at its first sample.
+        
+        Avoids the start-up transient (e.g. accel_z ramping up from 0 to 9.81)
+        that a zero initial state would put into the first window.
+        """
+        from scipy.signal import sosfilt_zi
+        
+        state = {}
+        if 'lowpass' in self._sos:
+            zi = sosfilt_zi(self._sos['lowpass'])
+            state['lowpass'] = zi[:, None, :] * motion[None, :, :1]
+        if 'gravity' in self._sos:
+            zi = sosfilt_zi(self._sos['gravity'])
+            # The gravity filter sees the low-passed signal, whose steady state is the same first sample
+            state['gravity'] = zi[:, None, :] * motion[None, :len(ACCEL_CHANNELS), :1]
+        return state
\ No newline at end of file
@@ -5,13 +5,14 @@ Combines sensor-based TMD with GTFS vehicle position data for improved accuracy.
 
 import numpy as np
 import math
-from typing import List, Dict, Optional, Tuple, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple, Any, Union
 from datetime import datetime, timedelta
 import logging
 
 from .transport_mode_detector import TransportModeDetector
 from .gtfs_service import GTFSService
-from .feature_extraction import SensorData
+from .feature_extraction import FeatureExtractor, SensorBatch, SensorData
 
 logger = logging.getLogger(__name__)
 
@@ -29,20 +30,32 @@ class HybridInferenceEngine:
     
     def __init__(self, 
                  tmd_model_path: str = "models/transport_mode_model.pkl",
-                 gtfs_db_path: str = "data/gtfs.db"):
+                 gtfs_db_path: str = "data/gtfs.db",
+                 tmd_detector: Optional[TransportModeDetector] = None,
+                 gtfs_service: Optional[GTFSService] = None,
+                 lookup_workers: int = 2):
         """
         Initialize the hybrid inference engine.
         
         Args:
             tmd_model_path: Path to the trained TMD model
             gtfs_db_path: Path to the GTFS database
+            tmd_detector: Already loaded detector to share (e.g. the API's);
+                tmd_model_path is then not loaded
+            gtfs_service: GTFS service to share instead of opening gtfs_db_path
+            lookup_workers: Threads running GTFS lookups alongside the sensor model
         """
-        self.tmd_detector = TransportModeDetector(tmd_model_path)
-        self.gtfs_service = GTFSService(gtfs_db_path)
+        self.gtfs_service = gtfs_service or GTFSService(gtfs_db_path)
+        self.tmd_detector = tmd_detector
+        if self.tmd_detector is None:
+            self.tmd_detector = TransportModeDetector(tmd_model_path)
+            
+            # Load the TMD model
+            if not self.tmd_detector.load_model():
+                logger.warning("TMD model not loaded. Hybrid inference will use GTFS data only.")
         
-        # Load the TMD model
-        if not self.tmd_detector.load_model():
-            logger.warning("TMD model not loaded. Hybrid inference will use GTFS data only.")
+        # GTFS lookups are database I/O, so they overlap with the CPU-bound sensor stage
+        self._lookups = ThreadPoolExecutor(max_workers=lookup_workers, thread_name_prefix='gtfs-lookup')
         
         # Configuration parameters
         self.vehicle_search_radius = 100  # meters
@@ -97,26 +110,28 @@ class HybridInferenceEngine:
             }
         }
     
-    def infer_transport_mode(self, sensor_data: List[SensorData]) -> List[Dict[str, Any]]:
+    def infer_transport_mode(self, sensor_data: Union[SensorBatch, List[SensorData]]) -> List[Dict[str, Any]]:
         """
         Perform hybrid inference to determine transport mode.
         
         Args:
-            sensor_data: List of sensor data points
-            
+            sensor_data: Sensor data as a SensorBatch or a list of sensor data points
+        
         Returns:
             List of inference results with mode, confidence, and supporting evidence
         """
-        if not sensor_data:
+        if not len(sensor_data):
             return []
         
+        sensor_data = FeatureExtractor.as_batch(sensor_data)
         results = []
         
+        # Look up GTFS vehicle data for the trace while the sensor model runs
+        gtfs_lookup = self._lookups.submit(self._get_gtfs_data, sensor_data)
+        
         # Get sensor-based predictions
         sensor_predictions = self._get_sensor_predictions(sensor_data)
-        
-        # Get GTFS vehicle data for relevant time periods
-        gtfs_data = self._get_gtfs_data(sensor_data)
+        gtfs_data = gtfs_lookup.result()
         
         # Perform hybrid inference for each window
         for i, sensor_pred in enumerate(sensor_predictions):
@@ -127,7 +142,7 @@ class HybridInferenceEngine:
         
         return results
     
-    def _get_sensor_predictions(self, sensor_data: List[SensorData]) -> List[Dict[str, Any]]:
+    def _get_sensor_predictions(self, sensor_data: SensorBatch) -> List[Dict[str, Any]]:
         """Get sensor-based transport mode predictions."""
         if not self.tmd_detector.is_trained:
             # Fallback to basic heuristics if model not trained
@@ -139,22 +154,18 @@ class HybridInferenceEngine:
             logger.error(f"Error getting sensor predictions: {e}")
             return self._basic_sensor_heuristics(sensor_data)
     
-    def _basic_sensor_heuristics(self, sensor_data: List[SensorData]) -> List[Dict[str, Any]]:
+    def _basic_sensor_heuristics(self, sensor_data: SensorBatch) -> List[Dict[str, Any]]:
         """Basic heuristics for transport mode detection when ML model is not available."""
         if len(sensor_data) < 10:
             return []
         
         # Calculate average speed
-        speeds = [s.speed or 0 for s in sensor_data if s.speed is not None]
-        avg_speed = np.mean(speeds) if speeds else 0
+        speeds = sensor_data.speed[sensor_data.valid['speed']]
+        avg_speed = np.mean(speeds) if len(speeds) else 0
         
         # Calculate acceleration variance
-        accel_magnitudes = []
-        for s in sensor_data:
-            mag = math.sqrt(s.acceleration_x**2 + s.acceleration_y**2 + s.acceleration_z**2)
-            accel_magnitudes.append(mag)
-        
-        accel_variance = np.var(accel_magnitudes) if accel_magnitudes else 0
+        accel_magnitudes = self._accel_magnitudes(sensor_data)
+        accel_variance = np.var(accel_magnitudes) if len(accel_magnitudes) else 0
         
         # Simple rule-based classification
         if avg_speed < 2:
@@ -180,23 +191,19 @@ class HybridInferenceEngine:
             'probabilities': {mode: confidence}
         }]
     
-    def _get_gtfs_data(self, sensor_data: List[SensorData]) -> List[Dict[str, Any]]:
+    def _get_gtfs_data(self, sensor_data: SensorBatch) -> List[Dict[str, Any]]:
         """Get relevant GTFS vehicle data for the sensor data time period."""
         gtfs_data = []
         
         # Get GPS coordinates from sensor data
-        gps_points = [(s.latitude, s.longitude) for s in sensor_data 
-                     if s.latitude is not None and s.longitude is not None]
+        gps_valid = self._gps_mask(sensor_data)
         
-        if not gps_points:
+        if not gps_valid.any():
             return gtfs_data
         
         # Calculate bounding box
-        lats = [p[0] for p in gps_points]
-        lons = [p[1] for p in gps_points]
-        
-        center_lat = np.mean(lats)
-        center_lon = np.mean(lons)
+        center_lat = float(np.mean(sensor_data.latitude[gps_valid]))
+        center_lon = float(np.mean(sensor_data.longitude[gps_valid]))
         
         # Get nearby vehicles
         try:
@@ -214,7 +221,7 @@ class HybridInferenceEngine:
     def _hybrid_inference_single_window(self, 
                                       sensor_pred: Dict[str, Any],
                                       gtfs_data: List[Dict[str, Any]],
-                                      sensor_data: List[SensorData],
+                                      sensor_data: SensorBatch,
                                       window_index: int) -> Dict[str, Any]:
         """
         Perform hybrid inference for a single window.
@@ -271,7 +278,7 @@ class HybridInferenceEngine:
         return result
     
     def _find_gtfs_matches(self, 
-                          sensor_data: List[SensorData],
+                          sensor_data: SensorBatch,
                           gtfs_data: List[Dict[str, Any]],
                           predicted_mode: str) -> List[Dict[str, Any]]:
         """
@@ -288,30 +295,33 @@ class HybridInferenceEngine:
         matches = []
         
         # Get GPS coordinates from sensor data
-        gps_points = [(s.latitude, s.longitude, s.timestamp) for s in sensor_data 
-                     if s.latitude is not None and s.longitude is not None]
+        gps_valid = self._gps_mask(sensor_data)
         
-        if not gps_points:
+        if not gps_valid.any():
             return matches
         
+        lats = sensor_data.latitude[gps_valid]
+        lons = sensor_data.longitude[gps_valid]
+        timestamps = sensor_data.timestamp[gps_valid]
+        
         for vehicle in gtfs_data:
             vehicle_lat = vehicle['latitude']
             vehicle_lon = vehicle['longitude']
             vehicle_timestamp = vehicle['timestamp']
             
-            # Check spatial proximity
-            spatial_matches = []
-            for lat, lon, timestamp in gps_points:
-                distance = self._calculate_distance(lat, lon, vehicle_lat, vehicle_lon)
-                time_diff = abs(timestamp - vehicle_timestamp)
-                
-                if (distance <= self.spatial_threshold and 
-                    time_diff <= self.temporal_threshold):
-                    spatial_matches.append({
-                        'distance': distance,
-                        'time_diff': time_diff,
-                        'sensor_point': (lat, lon, timestamp)
-                    })
+            # Check spatial proximity against all GPS points at once
+            distances = self._calculate_distances(lats, lons, vehicle_lat, vehicle_lon)
+            time_diffs = np.abs(timestamps - vehicle_timestamp)
+            close = (distances <= self.spatial_threshold) & (time_diffs <= self.temporal_threshold)
+            
+            spatial_matches = [
+                {
+                    'distance': float(distances[i]),
+                    'time_diff': float(time_diffs[i]),
+                    'sensor_point': (float(lats[i]), float(lons[i]), float(timestamps[i]))
+                }
+                for i in np.flatnonzero(close)
+            ]
             
             if spatial_matches:
                 # Calculate overall match score
@@ -340,6 +350,33 @@ class HybridInferenceEngine:
         
         return R * c
     
+    def _calculate_distances(self, lats: np.ndarray, lons: np.ndarray, lat: float, lon: float) -> np.ndarray:
+        """Vectorized haversine distance from many points to one point."""
+        R = 6371000  # Earth's radius in meters
+        
+        lat1_rad = np.radians(lats)
+        lat2_rad = math.radians(lat)
+        delta_lat = np.radians(lat - lats)
+        delta_lon = np.radians(lon - lons)
+        
+        a = (np.sin(delta_lat / 2) ** 2 +
+             np.cos(lat1_rad) * math.cos(lat2_rad) * np.sin(delta_lon / 2) ** 2)
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        
+        return R * c
+    
+    @staticmethod
+    def _gps_mask(sensor_data: SensorBatch) -> np.ndarray:
+        """Mask of samples with both latitude and longitude."""
+        return sensor_data.valid['latitude'] & sensor_data.valid['longitude']
+    
+    @staticmethod
+    def _accel_magnitudes(sensor_data: SensorBatch) -> np.ndarray:
+        """Acceleration magnitude for every sample."""
+        return np.sqrt(sensor_data.acceleration_x ** 2 +
+                       sensor_data.acceleration_y ** 2 +
+                       sensor_data.acceleration_z ** 2)
+    
     def _calculate_match_score(self, spatial_matches: List[Dict], vehicle: Dict) -> float:
         """Calculate overall match score for a GTFS vehicle."""
         if not spatial_matches:
@@ -420,7 +457,7 @@ class HybridInferenceEngine:
     
     def _validate_mode_characteristics(self, 
                                      result: Dict[str, Any], 
-                                     sensor_data: List[SensorData]) -> Dict[str, Any]:
+                                     sensor_data: SensorBatch) -> Dict[str, Any]:
         """
         Validate the inferred mode against known characteristics.
         
@@ -439,8 +476,8 @@ class HybridInferenceEngine:
         characteristics = self.mode_characteristics[mode]
         
         # Validate speed characteristics
-        speeds = [s.speed or 0 for s in sensor_data if s.speed is not None]
-        if speeds:
+        speeds = sensor_data.speed[sensor_data.valid['speed']]
+        if len(speeds):
             avg_speed = np.mean(speeds)
             min_speed = characteristics['min_speed']
             max_speed = characteristics['max_speed']
@@ -451,12 +488,9 @@ class HybridInferenceEngine:
                 result['evidence']['speed_mismatch'] = True
         
         # Validate acceleration patterns
-        accel_magnitudes = []
-        for s in sensor_data:
-            mag = math.sqrt(s.acceleration_x**2 + s.acceleration_y**2 + s.acceleration_z**2)
-            accel_magnitudes.append(mag)
+        accel_magnitudes = self._accel_magnitudes(sensor_data)
         
-        if accel_magnitudes:
+        if len(accel_magnitudes):
             accel_variance = np.var(accel_magnitudes)
             
             # Check if acceleration pattern matches expected characteristics
@@ -467,6 +501,10 @@ class HybridInferenceEngine:
         
         return result
     
+    def shutdown(self):
+        """Stop the GTFS lookup threads."""
+        self._lookups.shutdown(wait=False)
+    
     def get_inference_summary(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Generate a summary of inference results.
@@ -0,0 +1,405 @@
+"""
+Per-window feature kernels for transport mode detection.
+Fused single-pass implementations of window moments and sign changes, peak
+detection and GPS path distances. A numba backend is chosen at import time
+when numba is installed; otherwise the pure NumPy versions are used. Set
+ML_KERNEL_BACKEND=numpy to force the fallback.
+"""
+
+import math
+import os
+import sys
+import numpy as np
+from typing import Dict, Tuple
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+EARTH_RADIUS = 6371000  # meters
+
+# Same degenerate-variance threshold as scipy.stats.skew/kurtosis
+RESOLUTION = float(np.finfo(np.float64).resolution)
+
+# Largest relative difference allowed between backends by check_parity
+PARITY_TOLERANCE = 1e-9
+
+
+# --- NumPy backend ---------------------------------------------------------
+
+def _numpy_window_statistics(data: np.ndarray, moments: bool = True,
+                             crossings: bool = True) -> Dict[str, np.ndarray]:
+    """Mean/std/skewness/kurtosis and zero crossing rate of each row (NaN-free)."""
+    # scipy.stats is imported on first use so serving with the numba backend never loads it
+    from scipy import stats
+    
+    features = {}
+    if moments:
+        features['mean'] = np.mean(data, axis=1)
+        features['std'] = np.std(data, axis=1)
+        features['skewness'] = stats.skew(data, axis=1)
+        features['kurtosis'] = stats.kurtosis(data, axis=1)
+    if crossings:
+        features['zero_crossing_rate'] = np.sum(np.diff(np.signbit(data), axis=1), axis=1) / data.shape[1]
+    return features
+
+
+def _numpy_peak_statistics(windows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Peak count, mean and std of each row, with find_peaks(height=mean + std) semantics.
+    
+    Strict local maxima are found with array comparisons. Rows containing
+    flat runs or NaNs are delegated to scipy's find_peaks so plateau handling
+    stays identical.
+    """
+    height = np.mean(windows, axis=1) + np.std(windows, axis=1)
+    
+    centre = windows[:, 1:-1]
+    is_peak = np.zeros(windows.shape, dtype=bool)
+    is_peak[:, 1:-1] = (windows[:, :-2] < centre) & (centre > windows[:, 2:]) & (centre >= height[:, None])
+    
+    irregular = (np.diff(windows, axis=1) == 0).any(axis=1) | np.isnan(windows).any(axis=1)
+    if irregular.any():
+        from scipy.signal import find_peaks
+    for row in np.flatnonzero(irregular):
+        peaks, _ = find_peaks(windows[row], height=height[row])
+        is_peak[row] = False
+        is_peak[row, peaks] = True
+    
+    peak_count = is_peak.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        peak_values = np.where(is_peak, windows, 0.0)
+        peak_mean = np.sum(peak_values, axis=1) / peak_count
+        deviations = np.where(is_peak, windows - peak_mean[:, None], 0.0)
+        peak_std = np.sqrt(np.sum(deviations ** 2, axis=1) / peak_count)
+    
+    return peak_count.astype(float), peak_mean, peak_std
+
+
+def haversine(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Vectorized haversine distance in meters."""
+    lat1_rad = np.radians(lat1)
+    lat2_rad = np.radians(lat2)
+    delta_lat = np.radians(lat2 - lat1)
+    delta_lon = np.radians(lon2 - lon1)
+    
+    a = (np.sin(delta_lat / 2) ** 2 +
+         np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon / 2) ** 2)
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    
+    return EARTH_RADIUS * c
+
+
+def _numpy_path_distances(latitudes: np.ndarray, longitudes: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Total, mean and std of step distances plus start-to-end displacement of each row."""
+    distances = haversine(latitudes[:, :-1], longitudes[:, :-1], latitudes[:, 1:], longitudes[:, 1:])
+    displacement = haversine(latitudes[:, 0], longitudes[:, 0], latitudes[:, -1], longitudes[:, -1])
+    return np.sum(distances, axis=1), np.mean(distances, axis=1), np.std(distances, axis=1), displacement
+
+
+# --- numba backend ---------------------------------------------------------
+
+if numba is not None:
+    
+    # nogil lets the API's inference threads run kernels in parallel
+    @numba.njit(cache=True, nogil=True)
+    def _statistics_rows(data, want_moments, mean, std, skewness, kurtosis, crossings):
+        n_rows, width = data.shape
+        for i in range(n_rows):
+            # Pass 1: sum and sign changes
+            total = 0.0
+            count = 0
+            previous = math.copysign(1.0, data[i, 0]) < 0
+            for j in range(width):
+                total += data[i, j]
+                negative = math.copysign(1.0, data[i, j]) < 0
+                if negative != previous:
+                    count += 1
+                previous = negative
+            crossings[i] = count / width
+            if not want_moments:
+                continue
+            
+            # Pass 2: central moments
+            mu = total / width
+            m2 = 0.0
+            m3 = 0.0
+            m4 = 0.0
+            for j in range(width):
+                d = data[i, j] - mu
+                d2 = d * d
+                m2 += d2
+                m3 += d2 * d
+                m4 += d2 * d2
+            m2 /= width
+            m3 /= width
+            m4 /= width
+            
+            mean[i] = mu
+            std[i] = math.sqrt(m2)
+            if m2 <= (RESOLUTION * mu) ** 2:
+                skewness[i] = np.nan
+                kurtosis[i] = np.nan
+            else:
+                skewness[i] = m3 / m2 ** 1.5
+                kurtosis[i] = m4 / (m2 * m2) - 3.0
+    
+    @numba.njit(cache=True, nogil=True)
+    def _peak_rows(windows, peak_count, peak_mean, peak_std):
+        n_rows, width = windows.shape
+        peaks = np.empty(width, dtype=np.int64)
+        for i in range(n_rows):
+            row = windows[i]
+            total = 0.0
+            for j in range(width):
+                total += row[j]
+            mu = total / width
+            spread = 0.0
+            for j in range(width):
+                spread += (row[j] - mu) ** 2
+            height = mu + math.sqrt(spread / width)
+            
+            # Local maxima as in scipy.signal._peak_finding_utils._local_maxima_1d:
+            # a plateau counts once, at its (rounded down) middle sample
+            n = 0
+            j = 1
+            while j < width - 1:
+                if row[j - 1] < row[j]:
+                    ahead = j + 1
+                    while ahead < width - 1 and row[ahead] == row[j]:
+                        ahead += 1
+                    if row[ahead] < row[j]:
+                        middle = (j + ahead - 1) // 2
+                        if row[middle] >= height:
+                            peaks[n] = middle
+                            n += 1
+                        j = ahead
+                j += 1
+            
+            peak_count[i] = n
+            if n == 0:
+                peak_mean[i] = np.nan
+                peak_std[i] = np.nan
+                continue
+            total = 0.0
+            for k in range(n):
+                total += row[peaks[k]]
+            mu = total / n
+            spread = 0.0
+            for k in range(n):
+                spread += (row[peaks[k]] - mu) ** 2
+            peak_mean[i] = mu
+            peak_std[i] = math.sqrt(spread / n)
+    
+    @numba.njit(cache=True, nogil=True)
+    def _haversine_scalar(lat1, lon1, lat2, lon2):
+        lat1_rad = math.radians(lat1)
+        lat2_rad = math.radians(lat2)
+        delta_lat = math.radians(lat2 - lat1)
+        delta_lon = math.radians(lon2 - lon1)
+        a = (math.sin(delta_lat / 2) ** 2 +
+             math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2)
+        return EARTH_RADIUS * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    
+    @numba.njit(cache=True, nogil=True)
+    def _path_rows(latitudes, longitudes, total, mean, std, displacement):
+        n_rows, width = latitudes.shape
+        steps = np.empty(width - 1)
+        for i in range(n_rows):
+            path = 0.0
+            for j in range(width - 1):
+                steps[j] = _haversine_scalar(latitudes[i, j], longitudes[i, j],
+                                             latitudes[i, j + 1], longitudes[i, j + 1])
+                path += steps[j]
+            mu = path / (width - 1)
+            spread = 0.0
+            for j in range(width - 1):
+                spread += (steps[j] - mu) ** 2
+            total[i] = path
+            mean[i] = mu
+            std[i] = math.sqrt(spread / (width - 1))
+            displacement[i] = _haversine_scalar(latitudes[i, 0], longitudes[i, 0],
+                                                latitudes[i, width - 1], longitudes[i, width - 1])
+
+
+def _numba_window_statistics(data: np.ndarray, moments: bool = True,
+                             crossings: bool = True) -> Dict[str, np.ndarray]:
+    data = np.ascontiguousarray(data, dtype=np.float64)
+    n_rows = len(data)
+    columns = [np.empty(n_rows) for _ in range(5)]
+    _statistics_rows(data, moments, *columns)
+    mean, std, skewness, kurtosis, zero_crossing_rate = columns
+    
+    features = {}
+    if moments:
+        features.update(mean=mean, std=std, skewness=skewness, kurtosis=kurtosis)
+    if crossings:
+        features['zero_crossing_rate'] = zero_crossing_rate
+    return features
+
+
+def _numba_peak_statistics(windows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    windows = np.ascontiguousarray(windows, dtype=np.float64)
+    columns = [np.empty(len(windows)) for _ in range(3)]
+    _peak_rows(windows, *columns)
+    return tuple(columns)
+
+
+def _numba_path_distances(latitudes: np.ndarray, longitudes: np.ndarray) -> Tuple[np.ndarray, ...]:
+    latitudes = np.ascontiguousarray(latitudes, dtype=np.float64)
+    longitudes = np.ascontiguousarray(longitudes, dtype=np.float64)
+    columns = [np.empty(len(latitudes)) for _ in range(4)]
+    _path_rows(latitudes, longitudes, *columns)
+    return tuple(columns)
+
+
+# --- Backend selection -----------------------------------------------------
+
+BACKENDS = {
+    'numpy': (_numpy_window_statistics, _numpy_peak_statistics, _numpy_path_distances),
+}
+if numba is not None:
+    BACKENDS['numba'] = (_numba_window_statistics, _numba_peak_statistics, _numba_path_distances)
+
+
+def select_backend(name: str):
+    """
+    Switch the kernels used by feature extraction.
+    
+    Args:
+        name: 'numba' or 'numpy'
+    """
+    global BACKEND, window_statistics, peak_statistics, path_distances
+    if name not in BACKENDS:
+        raise ValueError(f"Kernel backend '{name}' is not available (have: {sorted(BACKENDS)})")
+    
+    BACKEND = name
+    window_statistics, peak_statistics, path_distances = BACKENDS[name]
+
+
+def warm_up():
+    """Compile the JIT kernels now rather than on the first request."""
+    windows = np.linspace(-1.0, 1.0, 32).reshape(4, 8)
+    window_statistics(windows)
+    peak_statistics(windows)
+    path_distances(windows, windows)
+
+
+_requested = os.environ.get('ML_KERNEL_BACKEND', 'numba' if numba is not None else 'numpy')
+select_backend(_requested if _requested in BACKENDS else 'numpy')
+
+
+# --- Parity check ----------------------------------------------------------
+
+def _max_relative_difference(a: np.ndarray, b: np.ndarray) -> float:
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    if a.shape != b.shape or not np.array_equal(np.isnan(a), np.isnan(b)):
+        return np.inf
+    both = ~np.isnan(a)
+    if not both.any():
+        return 0.0
+    return float(np.max(np.abs(a[both] - b[both]) / np.maximum(1.0, np.abs(a[both]))))
+
+
+def _parity_windows(n_windows: int, width: int, seed: int) -> np.ndarray:
+    """Random windows plus the edge cases the kernels special-case."""
+    rng = np.random.default_rng(seed)
+    windows = rng.normal(9.81, 2.0, (n_windows, width))
+    windows[::7] = np.round(windows[::7])  # plateaus
+    windows[1::11] = 9.81  # constant windows (undefined skewness/kurtosis)
+    windows[2::13] -= 9.81  # sign changes
+    windows[3::17, width // 2] = np.nan  # missing samples
+    return windows
+
+
+def check_parity(n_windows: int = 500, width: int = 50, seed: int = 0) -> Dict[str, float]:
+    """
+    Compare every available backend against the NumPy one.
+    
+    Runs each kernel on synthetic windows with plateaus, constant rows,
+    sign changes and NaNs, and then full feature extraction on a synthetic
+    trace with partial GPS and gyroscope coverage.
+    
+    Returns:
+        Largest relative difference per '<backend>.<check>'
+    """
+    from .feature_extraction import FeatureExtractor, SensorBatch
+    
+    windows = _parity_windows(n_windows, width, seed)
+    clean = np.nan_to_num(windows, nan=0.0)
+    rng = np.random.default_rng(seed + 1)
+    latitudes = -37.8136 + np.cumsum(rng.normal(0, 1e-4, (n_windows, width)), axis=1)
+    longitudes = 144.9631 + np.cumsum(rng.normal(0, 1e-4, (n_windows, width)), axis=1)
+    
+    n_samples = n_windows * width
+    gps = rng.random(n_samples) < 0.8
+    gyro = np.arange(n_samples) % (7 * width) < 5 * width
+    batch = SensorBatch.from_columns({
+        'timestamp': np.arange(n_samples) * 0.1,
+        'acceleration_x': rng.normal(0, 1, n_samples),
+        'acceleration_y': rng.normal(0, 1, n_samples),
+        'acceleration_z': np.round(rng.normal(9.81, 1, n_samples), 1),
+        'gyroscope_x': np.where(gyro, rng.normal(0, 0.1, n_samples), np.nan),
+        'gyroscope_y': np.where(gyro, rng.normal(0, 0.1, n_samples), np.nan),
+        'gyroscope_z': np.where(gyro, rng.normal(0, 0.1, n_samples), np.nan),
+        'latitude': np.where(gps, latitudes.ravel(), np.nan),
+        'longitude': np.where(gps, longitudes.ravel(), np.nan),
+        'speed': np.where(gps, rng.normal(10, 3, n_samples), np.nan),
+        'heading': np.where(gps, rng.uniform(0, 360, n_samples), np.nan),
+    })
+    
+    def run():
+        results = {}
+        for name, values in window_statistics(clean).items():
+            results[f'window_statistics.{name}'] = values
+        for name, values in zip(('count', 'mean', 'std'), peak_statistics(windows)):
+            results[f'peak_statistics.{name}'] = values
+        for name, values in zip(('total', 'mean', 'std', 'displacement'), path_distances(latitudes, longitudes)):
+            results[f'path_distances.{name}'] = values
+        for overlap in (0.0, 0.5):
+            extractor = FeatureExtractor(window_size=width, overlap=overlap)
+            for i, features in enumerate(extractor.extract_features(batch)):
+                for name, value in features.items():
+                    results[f'extract_features.{overlap}.{i}.{name}'] = value
+        return results
+    
+    active = BACKEND
+    try:
+        select_backend('numpy')
+        reference = run()
+        report = {}
+        for name in BACKENDS:
+            if name == 'numpy':
+                continue
+            select_backend(name)
+            results = run()
+            for key in set(reference) | set(results):
+                check = f"{name}.{key.split('.')[0]}"
+                if key not in reference or key not in results:
+                    difference = np.inf
+                else:
+                    difference = _max_relative_difference(reference[key], results[key])
+                report[check] = max(report.get(check, 0.0), difference)
+    finally:
+        select_backend(active)
+    
+    return report
+
+
+if __name__ == "__main__":
+    # Under `python -m` this file is __main__, a separate copy from the module
+    # feature extraction imports, so switch backends on the imported one
+    from . import kernels as imported
+    
+    if len(imported.BACKENDS) == 1:
+        print("Only the numpy backend is available; install numba to compare backends")
+        sys.exit(0)
+    
+    report = imported.check_parity()
+    for check, difference in sorted(report.items()):
+        status = "ok" if difference <= PARITY_TOLERANCE else "MISMATCH"
+        print(f"{check:40s} {difference:.3e}  {status}")
+    sys.exit(0 if all(d <= PARITY_TOLERANCE for d in report.values()) else 1)
\ No newline at end of file
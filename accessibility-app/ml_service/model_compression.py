@@ -0,0 +1,279 @@
+"""
+Model compression for transport mode detection.
+Builds smaller variants of a trained detector's forest (fewer trees,
+shallower trees, top-k features, a distilled single tree), measures the
+accuracy, latency and memory of each on held-out samples, and publishes
+the chosen ones to the model registry as servable versions.
+"""
+
+import argparse
+import copy
+import pickle
+import sys
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .feature_extraction import SensorBatch
+from .parallel_extraction import ParallelFeatureExtractor
+from .model_registry import ModelRegistry
+from .transport_mode_detector import TransportModeDetector
+
+
+class Candidate:
+    """A compressed model and how it was derived from the original."""
+    
+    def __init__(self, name: str, model: Any, description: str):
+        """
+        Initialize a candidate.
+        
+        Args:
+            name: Short identifier, e.g. 'trees-25' or 'top-20'
+            model: Fitted forest classifier over the detector's feature schema
+            description: How the model was built
+        """
+        self.name = name
+        self.model = model
+        self.description = description
+
+
+class HoldoutSet:
+    """Training rows for refitting candidates and held-out samples for measuring them."""
+    
+    def __init__(self, detector: TransportModeDetector, samples: Sequence[Dict[str, Any]],
+                 holdout_fraction: float = 0.25, n_workers: Optional[int] = None):
+        """
+        Extract and split labelled samples.
+        
+        The split is by sample, not by window, so the held-out traces can
+        also be replayed end to end through predict().
+        
+        Args:
+            detector: Trained detector whose extractor, scaler and labels are used
+            samples: Labelled samples with 'sensor_data' and 'transport_mode' keys
+            holdout_fraction: Share of samples held out for measurement
+            n_workers: Processes used for feature extraction
+        """
+        from sklearn.model_selection import train_test_split
+        
+        labels = [sample['transport_mode'] for sample in samples]
+        train_index, holdout_index = train_test_split(
+            np.arange(len(samples)), test_size=holdout_fraction, random_state=42, stratify=labels
+        )
+        extractor = ParallelFeatureExtractor(detector.feature_extractor, n_workers=n_workers)
+        
+        def rows(indices):
+            subset = [samples[i] for i in indices]
+            X, counts = extractor.extract(subset, detector.feature_schema)
+            y = np.repeat([sample['transport_mode'] for sample in subset], counts)
+            return detector._scale(X), detector.label_encoder.transform(y), subset
+        
+        self.X_train, self.y_train, _ = rows(train_index)
+        self.X_holdout, self.y_holdout, self.holdout_samples = rows(holdout_index)
+        self.traces = [SensorBatch.from_dicts(sample['sensor_data']) for sample in self.holdout_samples]
+        self.trace_labels = [sample['transport_mode'] for sample in self.holdout_samples]
+
+
+# --- Candidates --------------------------------------------------------------
+
+def fewer_trees(model: Any, n_trees: int) -> Candidate:
+    """The first n_trees trees of the original forest, without refitting."""
+    pruned = copy.copy(model)
+    pruned.estimators_ = model.estimators_[:n_trees]
+    pruned.n_estimators = len(pruned.estimators_)
+    return Candidate(f"trees-{n_trees}", pruned, f"first {n_trees} of {len(model.estimators_)} trees")
+
+
+def shallower(model: Any, data: HoldoutSet, max_depth: int) -> Candidate:
+    """The same forest configuration refitted with a depth limit."""
+    shallow = _forest(model.n_estimators, max_depth).fit(data.X_train, data.y_train)
+    return Candidate(f"depth-{max_depth}", shallow, f"{model.n_estimators} trees refitted with max_depth={max_depth}")
+
+
+def top_features(detector: TransportModeDetector, data: HoldoutSet, k: int) -> Candidate:
+    """
+    A forest refitted on the k most important features.
+    
+    The other columns are held constant while fitting, so no tree splits on
+    them; the model still takes the full schema, and the detector's feature
+    plan skips extracting what it never reads.
+    """
+    importance = detector.get_feature_importance()
+    keep = sorted(importance, key=importance.get, reverse=True)[:k]
+    mask = np.isin(detector.feature_names, keep)
+    
+    X = np.where(mask, data.X_train, 0.0)
+    model = _forest(detector.model.n_estimators, detector.model.max_depth).fit(X, data.y_train)
+    return Candidate(f"top-{k}", model, f"refitted on the top {k} of {len(mask)} features")
+
+
+def distilled(detector: TransportModeDetector, data: HoldoutSet, max_depth: int) -> Candidate:
+    """A single tree fitted to the original forest's predictions."""
+    teacher_labels = detector._score(data.X_train)[0]
+    # A one-tree forest without bootstrapping is a plain decision tree that
+    # the compiled forest, feature plan and registry already handle
+    student = _forest(1, max_depth, bootstrap=False, max_features=None).fit(data.X_train, teacher_labels)
+    return Candidate(f"distilled-{max_depth}", student, f"one tree of depth {max_depth} distilled from the forest")
+
+
+def _forest(n_estimators: int, max_depth: Optional[int], **options: Any) -> Any:
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=42,
+                                  n_jobs=-1, **options)
+
+
+def build_candidates(detector: TransportModeDetector, data: HoldoutSet,
+                     tree_counts: Sequence[int] = (10, 25, 50), depths: Sequence[int] = (4, 6, 8),
+                     top_k: Sequence[int] = (10, 20, 40), distill_depths: Sequence[int] = (6, 8, 10)
+                     ) -> List[Candidate]:
+    """All compressed variants of the detector's forest, smallest settings first within each kind."""
+    candidates = [fewer_trees(detector.model, n) for n in tree_counts if n < len(detector.model.estimators_)]
+    candidates += [shallower(detector.model, data, depth) for depth in depths]
+    candidates += [top_features(detector, data, k) for k in top_k if k < len(detector.feature_names)]
+    candidates += [distilled(detector, data, depth) for depth in distill_depths]
+    return candidates
+
+
+# --- Measurement -------------------------------------------------------------
+
+def candidate_detector(detector: TransportModeDetector, candidate: Candidate,
+                       registry: Optional[ModelRegistry] = None) -> TransportModeDetector:
+    """A detector serving the candidate with the original's preprocessing and extractor."""
+    model_data = dict(detector._model_data(), model=candidate.model)
+    compressed = TransportModeDetector(model_path=detector.model_path, registry=registry)
+    compressed._restore(model_data, None)
+    return compressed
+
+
+def measure(detector: TransportModeDetector, data: HoldoutSet,
+            reference: Optional[np.ndarray] = None, repeats: int = 200) -> Dict[str, float]:
+    """
+    Accuracy, latency and size of a detector on the held-out set.
+    
+    Args:
+        detector: Detector to measure
+        data: Held-out rows and traces
+        reference: Original model's held-out predictions, for agreement
+        repeats: Single-window model evaluations timed
+    
+    Returns:
+        Holdout accuracy, agreement, model and end-to-end latency, memory and shape
+    """
+    predictions = detector._score(data.X_holdout)[0]
+    forest = detector.compiled_model
+    
+    model_timings = []
+    for i in range(repeats):
+        row = data.X_holdout[i % len(data.X_holdout)][None, :]
+        start = time.perf_counter()
+        forest.predict(row)
+        model_timings.append((time.perf_counter() - start) * 1000)
+    
+    # End to end, as /predict sees it: extraction of what the model reads, scaling, scoring
+    trace_timings = []
+    detector.predict(data.traces[0])
+    for trace in data.traces:
+        start = time.perf_counter()
+        detector.predict(trace)
+        trace_timings.append((time.perf_counter() - start) * 1000)
+    
+    return {
+        'accuracy': float(np.mean(predictions == data.y_holdout)),
+        'agreement': float(np.mean(predictions == reference)) if reference is not None else 1.0,
+        'model_p50_ms': float(np.percentile(model_timings, 50)),
+        'predict_p50_ms': float(np.percentile(trace_timings, 50)),
+        'predict_p99_ms': float(np.percentile(trace_timings, 99)),
+        'memory_bytes': int(sum(getattr(forest, name).nbytes for name in ('feature', 'threshold', 'left',
+                                                                          'right', 'leaf_proba', 'roots'))),
+        'pickle_bytes': len(pickle.dumps(detector.model)),
+        'n_trees': len(forest.roots),
+        'max_depth': int(forest.max_depth),
+        'n_features': len(forest.used_features()),
+    }
+
+
+def compare(detector: TransportModeDetector, data: HoldoutSet,
+            candidates: Sequence[Candidate]) -> List[Tuple[str, str, Dict[str, float]]]:
+    """
+    Measure the original model and every candidate on the same held-out set.
+    
+    Returns:
+        (name, description, measurements) rows, the original first
+    """
+    reference = detector._score(data.X_holdout)[0]
+    rows = [('original', 'trained model', measure(detector, data, reference))]
+    for candidate in candidates:
+        rows.append((candidate.name, candidate.description,
+                     measure(candidate_detector(detector, candidate), data, reference)))
+    return rows
+
+
+def register(detector: TransportModeDetector, candidate: Candidate, measurements: Dict[str, float],
+             registry: ModelRegistry, activate: bool = False) -> str:
+    """
+    Publish a candidate to the registry as a servable version.
+    
+    Its holdout measurements become the version's metrics in the manifest.
+    
+    Returns:
+        The new version name
+    """
+    compressed = candidate_detector(detector, candidate, registry)
+    compressed.training_metrics = {
+        'accuracy': measurements['accuracy'],
+        'agreement': measurements['agreement'],
+        'predict_p50_ms': measurements['predict_p50_ms'],
+        'memory_bytes': float(measurements['memory_bytes']),
+    }
+    compressed.save_model(activate=activate)
+    return compressed.model_version
+
+
+def main():
+    """Build, compare and optionally register compressed models."""
+    parser = argparse.ArgumentParser(description="Compress a trained transport mode model")
+    parser.add_argument("--model-path", default="models/transport_mode_model.pkl",
+                        help="Model to compress when no registry version is active")
+    parser.add_argument("--registry", default="models/registry",
+                        help="Registry holding the model to compress and receiving registered candidates")
+    parser.add_argument("--samples", type=int, default=700,
+                        help="Synthetic samples to refit and measure with (default: 700)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes used for feature extraction (default: CPU count)")
+    parser.add_argument("--register", nargs='*', default=[], metavar="NAME",
+                        help="Candidates to publish to the registry (e.g. trees-25 top-20)")
+    parser.add_argument("--activate", action="store_true",
+                        help="Make the last registered candidate the served version")
+    args = parser.parse_args()
+    
+    registry = ModelRegistry(args.registry)
+    detector = TransportModeDetector(model_path=args.model_path, registry=registry)
+    if not detector.load_model():
+        sys.exit(1)
+    if detector.model is None or not hasattr(detector.model, 'estimators_'):
+        print("Only forest models can be compressed")
+        sys.exit(1)
+    
+    data = HoldoutSet(detector, detector.generate_synthetic_data(args.samples), n_workers=args.workers)
+    candidates = build_candidates(detector, data)
+    rows = compare(detector, data, candidates)
+    
+    print(f"{'model':14s} {'acc':>6s} {'agree':>6s} {'model':>8s} {'predict':>8s} {'p99':>8s} "
+          f"{'memory':>9s} {'trees':>5s} {'depth':>5s} {'feats':>5s}")
+    for name, description, m in rows:
+        print(f"{name:14s} {m['accuracy']:6.3f} {m['agreement']:6.3f} {m['model_p50_ms']:6.3f}ms "
+              f"{m['predict_p50_ms']:6.2f}ms {m['predict_p99_ms']:6.2f}ms {m['memory_bytes'] / 1024:7.0f}KB "
+              f"{m['n_trees']:5d} {m['max_depth']:5d} {m['n_features']:5d}")
+    
+    by_name = {candidate.name: candidate for candidate in candidates}
+    measurements = {name: m for name, _, m in rows}
+    for i, name in enumerate(args.register):
+        if name not in by_name:
+            parser.error(f"Unknown candidate '{name}' (have: {', '.join(by_name)})")
+        activate = args.activate and i == len(args.register) - 1
+        version = register(detector, by_name[name], measurements[name], registry, activate=activate)
+        print(f"Registered {name} as {version}{' (active)' if activate else ''}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
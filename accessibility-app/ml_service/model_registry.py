@@ -0,0 +1,257 @@
+"""
+Versioned model registry for transport mode detection.
+Stores every trained model as an immutable version directory with a
+manifest, tracks which version is active, and loads artifacts memory-mapped
+so that all serving processes share one copy of the model in memory.
+"""
+
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+
+from .compiled_forest import CompiledForest
+from .portable_model import PortableModel
+
+
+MANIFEST_NAME = 'manifest.json'
+ACTIVE_NAME = 'active.json'
+MODEL_NAME = 'model.joblib'
+PORTABLE_NAME = 'model.npz'
+FOREST_DIR = 'forest'
+
+
+class ModelRegistry:
+    """
+    Directory of versioned model artifacts.
+    
+    Each version `vNNNN` holds the pickled model (joblib, uncompressed so its
+    arrays can be memory-mapped), the compiled forest as raw `.npy` node
+    arrays, the portable NumPy archive served without scikit-learn, and a
+    manifest describing the feature schema, extractor config,
+    training metrics and artifact size. `active.json` names the version to
+    serve and the order versions were activated in, which rollback walks back.
+    """
+    
+    def __init__(self, root: str = "models/registry"):
+        """
+        Initialize model registry.
+        
+        Args:
+            root: Directory holding one subdirectory per model version
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+    
+    def publish(self, model_data: Dict[str, Any], compiled_model: Optional[CompiledForest] = None,
+                activate: bool = True) -> str:
+        """
+        Store a trained model as a new version.
+        
+        Args:
+            model_data: Model, preprocessing objects and metadata as saved by the detector
+            compiled_model: Flat-array forest to store alongside, if the model is a forest
+            activate: Make the new version the active one
+        
+        Returns:
+            The new version name
+        """
+        # Build the version in a private directory and rename it into place,
+        # so readers never see a half-written version
+        staging = os.path.join(self.root, f".staging-{uuid.uuid4().hex}")
+        os.makedirs(staging)
+        try:
+            joblib.dump(model_data, os.path.join(staging, MODEL_NAME))
+            if compiled_model is not None:
+                compiled_model.save(os.path.join(staging, FOREST_DIR))
+                PortableModel.from_model_data(model_data, compiled_model).save(os.path.join(staging, PORTABLE_NAME))
+            
+            manifest = {
+                'created_at': datetime.now().isoformat(),
+                'trained_at': model_data.get('trained_at'),
+                'feature_schema': model_data.get('feature_schema'),
+                'feature_extractor_config': model_data.get('feature_extractor_config'),
+                'metrics': model_data.get('metrics', {}),
+                'compiled': compiled_model is not None,
+                'portable': compiled_model is not None,
+                'size_bytes': _directory_size(staging),
+            }
+            version = self._claim_version(staging, manifest)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        
+        if activate:
+            self.activate(version)
+        return version
+    
+    def _claim_version(self, staging: str, manifest: Dict[str, Any]) -> str:
+        """Rename a staged version to the next free version name."""
+        while True:
+            existing = self.versions()
+            number = int(existing[-1][1:]) + 1 if existing else 1
+            version = f"v{number:04d}"
+            manifest['version'] = version
+            with open(os.path.join(staging, MANIFEST_NAME), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            try:
+                # Fails if another process claimed the same name first
+                os.rename(staging, os.path.join(self.root, version))
+                return version
+            except OSError:
+                if not os.path.isdir(os.path.join(self.root, version)):
+                    raise
+    
+    def versions(self) -> List[str]:
+        """Names of all stored versions, oldest first."""
+        return sorted(
+            name for name in os.listdir(self.root)
+            if name.startswith('v') and name[1:].isdigit()
+            and os.path.exists(os.path.join(self.root, name, MANIFEST_NAME))
+        )
+    
+    def manifest(self, version: str) -> Dict[str, Any]:
+        """
+        Manifest of one version.
+        
+        Raises:
+            KeyError: If the version does not exist
+        """
+        path = os.path.join(self.root, version, MANIFEST_NAME)
+        if not os.path.exists(path):
+            raise KeyError(f"Unknown model version: {version}")
+        with open(path) as f:
+            return json.load(f)
+    
+    def active_version(self) -> Optional[str]:
+        """Version currently marked for serving, or None if none has been activated."""
+        return self._read_active()['version']
+    
+    def history(self) -> List[str]:
+        """Previously and currently active versions, in activation order."""
+        return self._read_active()['history']
+    
+    def activate(self, version: str):
+        """
+        Mark a version as the one to serve.
+        
+        Raises:
+            KeyError: If the version does not exist
+        """
+        self.manifest(version)
+        state = self._read_active()
+        history = [name for name in state['history'] if name != version] + [version]
+        self._write_active({'version': version, 'history': history,
+                            'activated_at': datetime.now().isoformat()})
+    
+    def previous_version(self) -> Optional[str]:
+        """Version that was active before the current one, or None."""
+        history = self._rollback_history(self._read_active())
+        return history[-1] if history else None
+    
+    def rollback(self) -> str:
+        """
+        Reactivate the version that was active before the current one.
+        
+        The current version is dropped from the activation history, so
+        repeated rollbacks keep stepping further back.
+        
+        Returns:
+            The version now active
+        
+        Raises:
+            ValueError: If no earlier version is available
+        """
+        history = self._rollback_history(self._read_active())
+        if not history:
+            raise ValueError("No previous model version to roll back to")
+        
+        version = history[-1]
+        self._write_active({'version': version, 'history': history,
+                            'activated_at': datetime.now().isoformat()})
+        return version
+    
+    def load(self, version: Optional[str] = None,
+             mmap_mode: Optional[str] = 'r') -> Tuple[Dict[str, Any], Optional[CompiledForest], str]:
+        """
+        Load a version's artifacts.
+        
+        Args:
+            version: Version to load (defaults to the active one)
+            mmap_mode: Memory-map mode for the stored arrays, or None to read them into memory
+        
+        Returns:
+            (model data, compiled forest or None, version name)
+        
+        Raises:
+            KeyError: If the version does not exist or no version is active
+        """
+        version = version or self.active_version()
+        if version is None:
+            raise KeyError("No active model version")
+        manifest = self.manifest(version)
+        directory = os.path.join(self.root, version)
+        
+        model_data = joblib.load(os.path.join(directory, MODEL_NAME), mmap_mode=mmap_mode)
+        compiled_model = None
+        if manifest.get('compiled'):
+            compiled_model = CompiledForest.load(os.path.join(directory, FOREST_DIR), mmap_mode=mmap_mode)
+        return model_data, compiled_model, version
+    
+    def _rollback_history(self, state: Dict[str, Any]) -> List[str]:
+        """Activation history without the current version and versions since deleted."""
+        stored = set(self.versions())
+        return [name for name in state['history'] if name in stored and name != state['version']]
+    
+    def has_portable(self, version: Optional[str] = None) -> bool:
+        """Whether a version (default: the active one) has a portable archive."""
+        version = version or self.active_version()
+        return version is not None and self.manifest(version).get('portable', False)
+    
+    def load_portable(self, version: Optional[str] = None) -> Tuple[PortableModel, str]:
+        """
+        Load a version's portable archive, with NumPy only.
+        
+        The forest node arrays are memory-mapped from the version's `.npy`
+        files rather than read from the archive, so they stay shared.
+        
+        Returns:
+            (portable model, version name)
+        
+        Raises:
+            KeyError: If the version does not exist, has no portable archive, or no version is active
+        """
+        version = version or self.active_version()
+        if not self.has_portable(version):
+            raise KeyError(f"No portable archive for model version: {version}")
+        directory = os.path.join(self.root, version)
+        
+        portable_model = PortableModel.load(os.path.join(directory, PORTABLE_NAME))
+        portable_model.compiled_model = CompiledForest.load(os.path.join(directory, FOREST_DIR))
+        return portable_model, version
+    
+    def _read_active(self) -> Dict[str, Any]:
+        path = os.path.join(self.root, ACTIVE_NAME)
+        if not os.path.exists(path):
+            return {'version': None, 'history': []}
+        with open(path) as f:
+            return json.load(f)
+    
+    def _write_active(self, state: Dict[str, Any]):
+        path = os.path.join(self.root, ACTIVE_NAME)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, path)
+
+
+def _directory_size(directory: str) -> int:
+    """Total size in bytes of the files under directory."""
+    return sum(
+        os.path.getsize(os.path.join(path, name))
+        for path, _, names in os.walk(directory) for name in names
+    )
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Multiprocess feature extraction for training corpora.
+Splits the training samples into chunks, extracts each chunk in a worker
+process and has the workers write their rows straight into a shared
+memory-mapped feature matrix, so results never travel back through pickling.
+"""
+
+import multiprocessing
+import os
+import tempfile
+import threading
+import uuid
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .feature_extraction import FeatureExtractor, SensorBatch
+from .feature_registry import FeatureSchema
+
+
+# Per-process state set up by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _extract_rows(extractor: FeatureExtractor, schema: FeatureSchema,
+                  samples: Sequence[Dict[str, Any]], out: np.ndarray) -> List[int]:
+    """Extract samples into consecutive rows of out; returns windows per sample."""
+    counts = []
+    row = 0
+    for sample in samples:
+        matrix = extractor.extract_feature_matrix(SensorBatch.from_dicts(sample['sensor_data']), schema)
+        out[row:row + len(matrix)] = matrix
+        row += len(matrix)
+        counts.append(len(matrix))
+    return counts
+
+
+def _init_worker(extractor_config: Dict[str, Any], columns: Sequence[str], version: int,
+                 path: str, shape: Tuple[int, int]):
+    """Build the worker's extractor and open the shared output matrix."""
+    _worker['extractor'] = FeatureExtractor.from_config(extractor_config)
+    _worker['schema'] = FeatureSchema(columns, version)
+    _worker['matrix'] = np.memmap(path, dtype=np.float32, mode='r+', shape=shape)
+
+
+def _extract_chunk(task: Tuple[int, int, Sequence[Dict[str, Any]]]) -> List[int]:
+    """Extract one chunk of samples into its rows of the shared matrix."""
+    row, stop, samples = task
+    counts = _extract_rows(_worker['extractor'], _worker['schema'], samples, _worker['matrix'][row:stop])
+    _worker['matrix'].flush()
+    return counts
+
+
+class ParallelFeatureExtractor:
+    """
+    Extracts feature matrices for many training samples across processes.
+    
+    Window counts are computed up front from the timestamps alone, so every
+    chunk knows which rows of the output it owns. Rows come out in sample
+    order and are identical to extracting the samples one by one.
+    """
+    
+    def __init__(self, feature_extractor: FeatureExtractor, n_workers: Optional[int] = None,
+                 chunk_size: int = 64):
+        """
+        Initialize parallel feature extractor.
+        
+        Args:
+            feature_extractor: Extractor whose configuration every worker copies
+            n_workers: Worker processes (defaults to the CPU count; 1 runs inline)
+            chunk_size: Samples handed to a worker at a time
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        
+        self.feature_extractor = feature_extractor
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+    
+    def extract(self, samples: Sequence[Dict[str, Any]],
+                schema: Optional[FeatureSchema] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Extract features for a list of training samples.
+        
+        Args:
+            samples: Training samples with a 'sensor_data' list of point dictionaries
+            schema: Column order to write (defaults to every registered feature)
+        
+        Returns:
+            (feature matrix with the windows of all samples in order,
+             number of windows contributed by each sample)
+        """
+        schema = schema or FeatureSchema.default()
+        counts = np.array([
+            self.feature_extractor.count_windows([point['timestamp'] for point in sample['sensor_data']])
+            for sample in samples
+        ], dtype=int)
+        total = int(counts.sum())
+        
+        chunks = [(start, min(start + self.chunk_size, len(samples)))
+                  for start in range(0, len(samples), self.chunk_size)]
+        
+        if not total:
+            return schema.empty_matrix(0), counts
+        if self.n_workers == 1 or len(chunks) == 1:
+            matrix = schema.empty_matrix(total)
+            self._check_counts(counts, _extract_rows(self.feature_extractor, schema, samples, matrix))
+            return matrix, counts
+        
+        return self._extract_parallel(samples, schema, counts, chunks), counts
+    
+    def _extract_parallel(self, samples: Sequence[Dict[str, Any]], schema: FeatureSchema,
+                          counts: np.ndarray, chunks: List[Tuple[int, int]]) -> np.ndarray:
+        """Run the chunks in a process pool writing into a shared memmap."""
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        shape = (int(offsets[-1]), len(schema))
+        path = os.path.join(self._shared_dir(), f"features-{uuid.uuid4().hex}.f32")
+        
+        try:
+            shared = np.memmap(path, dtype=np.float32, mode='w+', shape=shape)
+            tasks = [(int(offsets[start]), int(offsets[stop]), samples[start:stop]) for start, stop in chunks]
+            initargs = (self.feature_extractor.get_config(), schema.columns, schema.version, path, shape)
+            
+            with ProcessPoolExecutor(max_workers=min(self.n_workers, len(chunks)),
+                                     mp_context=self._context(),
+                                     initializer=_init_worker, initargs=initargs) as pool:
+                extracted = [n for chunk_counts in pool.map(_extract_chunk, tasks) for n in chunk_counts]
+            
+            self._check_counts(counts, extracted)
+            matrix = np.array(shared)
+            del shared
+            return matrix
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+    
+    @staticmethod
+    def _check_counts(expected: np.ndarray, extracted: List[int]):
+        """Fail loudly if a worker produced a different number of windows than was reserved."""
+        if not np.array_equal(expected, extracted):
+            raise RuntimeError("Extracted window counts do not match the precomputed counts")
+    
+    @staticmethod
+    def _shared_dir() -> str:
+        """Directory for the shared matrix; tmpfs keeps it in memory where available."""
+        if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+            return '/dev/shm'
+        return tempfile.gettempdir()
+    
+    @staticmethod
+    def _context() -> multiprocessing.context.BaseContext:
+        """Fork when it is safe (no other threads running), otherwise spawn."""
+        if 'fork' in multiprocessing.get_all_start_methods() and threading.active_count() == 1:
+            return multiprocessing.get_context('fork')
+        return multiprocessing.get_context('spawn')
\ No newline at end of file
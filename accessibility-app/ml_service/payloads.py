@@ -0,0 +1,165 @@
+"""
+Columnar request payloads for transport mode prediction.
+Decodes sensor traces sent as per-channel arrays, either as JSON lists or
+as a binary body of typed arrays, straight into a SensorBatch without
+creating an object per reading.
+"""
+
+import json
+import struct
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+from .sensor_data import SensorBatch
+
+
+# Media types of the binary encoding and of columnar JSON; per-point JSON
+# bodies keep using application/json
+BINARY_CONTENT_TYPE = 'application/vnd.sensor-batch'
+COLUMNAR_JSON_CONTENT_TYPE = 'application/vnd.sensor-batch+json'
+
+# Binary layout: magic, little-endian uint32 header length, JSON header,
+# zero padding to an 8-byte boundary, then each channel's array in header
+# order, each padded to 8 bytes. The header is
+# {"length": n, "channels": {"timestamp": "<f8", ...}}.
+MAGIC = b'SBT1'
+ALIGNMENT = 8
+DTYPES = ('<f8', '<f4')
+
+
+class PayloadError(ValueError):
+    """A request body that cannot be decoded into a sensor batch."""
+
+
+def decode_columns(columns: Any) -> SensorBatch:
+    """
+    Build a batch from a columnar JSON object, one list per channel.
+    
+    Optional channels may be omitted or contain null for missing readings.
+    
+    Raises:
+        PayloadError: If a channel is unknown, missing, non-numeric or of the wrong length
+    """
+    if not isinstance(columns, dict):
+        raise PayloadError("Columnar sensor_data must be an object of channel arrays")
+    _check_channels(columns)
+    try:
+        return SensorBatch.from_columns(columns)
+    except (TypeError, ValueError) as e:
+        raise PayloadError(f"Invalid sensor data: {e}")
+
+
+def decode_points(points: Any) -> SensorBatch:
+    """
+    Build a batch from a list of point objects, as in a per-point JSON body.
+    
+    Raises:
+        PayloadError: If a point is not an object, lacks a required reading or is non-numeric
+    """
+    if not isinstance(points, list) or not all(isinstance(point, dict) for point in points):
+        raise PayloadError("sensor_data must be a list of point objects or an object of channel arrays")
+    for name in SensorBatch.REQUIRED_CHANNELS:
+        if any(point.get(name) is None for point in points):
+            raise PayloadError(f"Missing required reading '{name}'")
+    try:
+        return SensorBatch.from_dicts(points)
+    except (TypeError, ValueError) as e:
+        raise PayloadError(f"Invalid sensor data: {e}")
+
+
+def decode_binary(body: bytes) -> SensorBatch:
+    """
+    Build a batch from a binary body written by encode_binary().
+    
+    float64 channels are views of the body, not copies.
+    
+    Raises:
+        PayloadError: If the body is not a well-formed sensor batch
+    """
+    header, offset = _read_header(body)
+    try:
+        length = int(header['length'])
+        channels = header['channels']
+    except (KeyError, TypeError, ValueError):
+        raise PayloadError("Header must give 'length' and 'channels'")
+    if not isinstance(channels, dict) or length < 0:
+        raise PayloadError("Header must give 'length' and 'channels'")
+    _check_channels(channels)
+    
+    arrays = {}
+    for name, dtype in channels.items():
+        if dtype not in DTYPES:
+            raise PayloadError(f"Channel '{name}' has unsupported dtype {dtype!r} (use one of {DTYPES})")
+        size = length * np.dtype(dtype).itemsize
+        if offset + size > len(body):
+            raise PayloadError(f"Body ends inside channel '{name}'")
+        arrays[name] = np.frombuffer(body, dtype=dtype, count=length, offset=offset)
+        offset += _padded(size)
+    try:
+        return SensorBatch.from_columns(arrays)
+    except ValueError as e:
+        raise PayloadError(f"Invalid sensor data: {e}")
+
+
+def encode_binary(batch: SensorBatch, dtype: str = '<f8') -> bytes:
+    """
+    Encode a batch for the binary payload.
+    
+    Missing optional readings are sent as NaN and channels without any
+    reading are left out. Timestamps are always float64.
+    
+    Args:
+        batch: Sensor trace to encode
+        dtype: Type of the non-timestamp channels ('<f4' halves the body)
+    """
+    arrays = {}
+    for name in SensorBatch.CHANNELS:
+        values = batch.channels[name]
+        if name in SensorBatch.OPTIONAL_CHANNELS:
+            valid = batch.valid[name]
+            if not valid.any():
+                continue
+            values = np.where(valid, values, np.nan)
+        arrays[name] = np.ascontiguousarray(values, dtype='<f8' if name == 'timestamp' else dtype)
+    
+    header = json.dumps({
+        'length': len(batch),
+        'channels': {name: values.dtype.str for name, values in arrays.items()}
+    }).encode()
+    parts = [MAGIC, struct.pack('<I', len(header)), header, b'\0' * (_padded(8 + len(header)) - 8 - len(header))]
+    for values in arrays.values():
+        data = values.tobytes()
+        parts += [data, b'\0' * (_padded(len(data)) - len(data))]
+    return b''.join(parts)
+
+
+def _read_header(body: bytes) -> Tuple[Dict[str, Any], int]:
+    """Header of a binary body and the offset of its first channel."""
+    if len(body) < 8 or body[:4] != MAGIC:
+        raise PayloadError("Not a sensor batch body")
+    (header_length,) = struct.unpack_from('<I', body, 4)
+    if 8 + header_length > len(body):
+        raise PayloadError("Body ends inside the header")
+    try:
+        header = json.loads(bytes(body[8:8 + header_length]))
+    except ValueError:
+        raise PayloadError("Header is not valid JSON")
+    return header, _padded(8 + header_length)
+
+
+def _check_channels(channels: Dict[str, Any]):
+    unknown = set(channels) - set(SensorBatch.CHANNELS)
+    if unknown:
+        raise PayloadError(f"Unknown channels: {sorted(unknown)}")
+    missing = [name for name in SensorBatch.REQUIRED_CHANNELS if channels.get(name) is None]
+    if missing:
+        raise PayloadError(f"Missing required channels: {missing}")
+
+
+def _padded(size: int) -> int:
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def content_type(header: Optional[str]) -> str:
+    """Media type of a Content-Type header, without parameters."""
+    return (header or 'application/json').split(';')[0].strip().lower()
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Portable NumPy model format for transport mode detection.
+Exports the scaler parameters, label classes and compiled forest of a
+trained model to a single .npz archive that loads with NumPy alone, so a
+serving process never imports scikit-learn or unpickles an estimator.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+from typing import Any, Dict, Optional
+
+from .cascade import CascadeStage
+from .compiled_forest import ARRAY_NAMES, CompiledForest
+
+
+FORMAT_VERSION = 1
+
+# Entries of the detector's model data carried over as JSON metadata
+METADATA_KEYS = ('feature_names', 'feature_schema', 'feature_extractor_config', 'metrics', 'trained_at')
+
+
+class PortableScaler:
+    """The StandardScaler parameters prediction needs."""
+    
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+    
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (X - self.mean_) / self.scale_
+
+
+class PortableLabelEncoder:
+    """The LabelEncoder classes prediction needs."""
+    
+    def __init__(self, classes: np.ndarray):
+        self.classes_ = classes
+    
+    def inverse_transform(self, y: np.ndarray) -> np.ndarray:
+        return self.classes_[np.asarray(y, dtype=np.intp)]
+
+
+class PortableModel:
+    """
+    Everything a detector needs to predict, as plain arrays and JSON.
+    
+    The archive holds the compiled forest's node arrays (`forest_*`), the
+    cascade first stage's (`cascade_*`, if the model has one), the scaler
+    mean and scale, the label classes, the feature importances and a JSON
+    metadata string with the feature schema and extractor config. It is
+    written with allow_pickle=False and read the same way.
+    """
+    
+    def __init__(self, compiled_model: CompiledForest, scaler: PortableScaler,
+                 label_encoder: PortableLabelEncoder, feature_importances: np.ndarray,
+                 metadata: Dict[str, Any], cascade: Optional[CascadeStage] = None):
+        """
+        Initialize a portable model.
+        
+        Args:
+            compiled_model: Flat-array forest
+            scaler: Feature scaling parameters
+            label_encoder: Transport mode of each class index
+            feature_importances: Importance of each feature column
+            metadata: Feature names and schema, extractor config, metrics
+            cascade: First stage for cascade inference, if the model has one
+        """
+        self.compiled_model = compiled_model
+        self.scaler = scaler
+        self.label_encoder = label_encoder
+        self.feature_importances = feature_importances
+        self.metadata = metadata
+        self.cascade = cascade
+    
+    @classmethod
+    def from_model_data(cls, model_data: Dict[str, Any], compiled_model: Optional[CompiledForest]) -> 'PortableModel':
+        """
+        Convert the detector's saved model data.
+        
+        Raises:
+            ValueError: If the model is not a forest that could be compiled
+        """
+        if compiled_model is None:
+            raise ValueError("Only models with a compiled forest can be exported")
+        return cls(
+            compiled_model=compiled_model,
+            scaler=PortableScaler(np.asarray(model_data['scaler'].mean_, dtype=np.float64),
+                                  np.asarray(model_data['scaler'].scale_, dtype=np.float64)),
+            label_encoder=PortableLabelEncoder(np.asarray(model_data['label_encoder'].classes_).astype(str)),
+            feature_importances=np.asarray(model_data['model'].feature_importances_, dtype=np.float64),
+            metadata={key: model_data.get(key) for key in METADATA_KEYS},
+            cascade=model_data.get('cascade')
+        )
+    
+    def save(self, path: str):
+        """Write the archive (uncompressed .npz)."""
+        metadata = dict(self.metadata, format_version=FORMAT_VERSION,
+                        max_depth=int(self.compiled_model.max_depth))
+        arrays = {f"forest_{name}": getattr(self.compiled_model, name) for name in ARRAY_NAMES}
+        if self.cascade is not None:
+            metadata['cascade'] = {'columns': self.cascade.columns,
+                                   'max_depth': int(self.cascade.forest.max_depth)}
+            arrays['cascade_indices'] = self.cascade.indices
+            arrays.update({f"cascade_{name}": getattr(self.cascade.forest, name) for name in ARRAY_NAMES})
+        
+        # Write under a temporary name so a reader never opens a partial archive
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez(
+                f,
+                scaler_mean=self.scaler.mean_,
+                scaler_scale=self.scaler.scale_,
+                label_classes=self.label_encoder.classes_,
+                feature_importances=self.feature_importances,
+                metadata=np.array(json.dumps(metadata)),
+                **arrays
+            )
+        os.replace(temp_path, path)
+    
+    @classmethod
+    def load(cls, path: str) -> 'PortableModel':
+        """
+        Read an archive written by save().
+        
+        Raises:
+            ValueError: If the archive was written by a newer format version
+        """
+        with np.load(path, allow_pickle=False) as archive:
+            metadata = json.loads(str(archive['metadata']))
+            if metadata.get('format_version', 0) > FORMAT_VERSION:
+                raise ValueError(f"Unsupported portable model format {metadata['format_version']}")
+            
+            compiled_model = CompiledForest(
+                max_depth=metadata['max_depth'],
+                **{name: archive[f"forest_{name}"] for name in ARRAY_NAMES}
+            )
+            cascade = None
+            if metadata.get('cascade'):
+                forest = CompiledForest(
+                    max_depth=metadata['cascade']['max_depth'],
+                    **{name: archive[f"cascade_{name}"] for name in ARRAY_NAMES}
+                )
+                cascade = CascadeStage(forest, metadata['cascade']['columns'], archive['cascade_indices'])
+            return cls(
+                compiled_model=compiled_model,
+                scaler=PortableScaler(archive['scaler_mean'], archive['scaler_scale']),
+                label_encoder=PortableLabelEncoder(archive['label_classes']),
+                feature_importances=archive['feature_importances'],
+                metadata=metadata,
+                cascade=cascade
+            )
+    
+    def as_model_data(self) -> Dict[str, Any]:
+        """The detector's model data, with no estimator behind it."""
+        return dict(
+            {key: self.metadata.get(key) for key in METADATA_KEYS},
+            model=None,
+            cascade=self.cascade,
+            scaler=self.scaler,
+            label_encoder=self.label_encoder,
+            feature_importances=self.feature_importances
+        )
+
+
+# --- Startup benchmark -------------------------------------------------------
+
+# Child script timing import, load and a first prediction in a fresh interpreter
+_STARTUP_SCRIPT = """
+import sys, time, json
+started = time.perf_counter()
+from ml_service.transport_mode_detector import TransportModeDetector
+from ml_service.feature_extraction import SensorBatch
+imported = time.perf_counter()
+detector = TransportModeDetector(sys.argv[2])
+ok = detector.load_portable(sys.argv[2]) if sys.argv[1] == 'portable' else detector.load_model()
+loaded = time.perf_counter()
+detector.predict(SensorBatch.from_dicts(json.loads(sys.argv[3])))
+predicted = time.perf_counter()
+print(json.dumps({
+    'import_ms': 1000 * (imported - started),
+    'load_ms': 1000 * (loaded - imported),
+    'first_prediction_ms': 1000 * (predicted - loaded),
+    'total_ms': 1000 * (predicted - started),
+    'loaded': bool(ok),
+    'sklearn_imported': 'sklearn' in sys.modules,
+    'scipy_imported': 'scipy.stats' in sys.modules or 'scipy.signal' in sys.modules,
+    'pandas_imported': 'pandas' in sys.modules,
+}))
+"""
+
+
+def benchmark_startup(model_path: str, portable_path: str, sensor_data: Any,
+                      repeats: int = 3) -> Dict[str, Dict[str, Any]]:
+    """
+    Cold-start cost of the pickled model and the portable archive.
+    
+    Each repeat runs in a new interpreter, timing the detector import, the
+    model load and the first prediction, and records which heavy libraries
+    ended up imported.
+    
+    Returns:
+        Median timings (ms) and import flags per format
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    report = {}
+    for mode, path in (('pickle', model_path), ('portable', portable_path)):
+        runs = []
+        for _ in range(repeats):
+            output = subprocess.run(
+                [sys.executable, '-W', 'ignore', '-c', _STARTUP_SCRIPT, mode, os.path.abspath(path),
+                 json.dumps(sensor_data)],
+                cwd=root, capture_output=True, text=True, check=True
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        report[mode] = {
+            key: float(np.median([run[key] for run in runs])) if key.endswith('_ms') else runs[0][key]
+            for key in runs[0]
+        }
+    return report
+
+
+if __name__ == "__main__":
+    from .transport_mode_detector import TransportModeDetector
+    
+    model_path = sys.argv[1] if len(sys.argv) > 1 else "models/transport_mode_model.pkl"
+    portable_path = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(model_path)[0] + ".npz"
+    
+    detector = TransportModeDetector(model_path)
+    if not detector.load_model():
+        sys.exit(1)
+    detector.export_portable(portable_path)
+    print(f"Exported {model_path} to {portable_path} ({os.path.getsize(portable_path)} bytes)")
+    
+    sample = detector.generate_synthetic_data(len(detector.TRANSPORT_MODES))[0]['sensor_data']
+    for mode, timings in benchmark_startup(model_path, portable_path, sample).items():
+        print(f"{mode:9s} import {timings['import_ms']:7.1f} ms  load {timings['load_ms']:7.1f} ms  "
+              f"first prediction {timings['first_prediction_ms']:6.1f} ms  total {timings['total_ms']:7.1f} ms  "
+              f"sklearn {'yes' if timings['sklearn_imported'] else 'no'}  "
+              f"scipy {'yes' if timings['scipy_imported'] else 'no'}")
\ No newline at end of file
@@ -0,0 +1,227 @@
+"""
+Timestamp-aware resampling for transport mode detection.
+Interpolates every sensor channel onto a uniform time grid so that windows
+cover a fixed duration regardless of the device's native sample rate or jitter.
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .sensor_data import SensorBatch
+
+
+# Slack (in samples) when placing the last grid point, so float jitter in
+# timestamps does not drop a point that falls exactly on a sample
+GRID_TOLERANCE = 1e-6
+
+
+class Resampler:
+    """Interpolates a SensorBatch onto a uniform grid at a fixed sample rate."""
+    
+    def __init__(self, sample_rate: float, max_gap_seconds: float = 1.0):
+        """
+        Initialize resampler.
+        
+        Args:
+            sample_rate: Target sample rate in Hz
+            max_gap_seconds: Gaps between samples longer than this split the
+                trace into separate segments instead of being interpolated across
+        """
+        if sample_rate <= 0:
+            raise ValueError("sample_rate must be positive")
+        
+        self.sample_rate = sample_rate
+        self.max_gap_seconds = max_gap_seconds
+    
+    def resample(self, batch: SensorBatch) -> List[SensorBatch]:
+        """
+        Resample a trace onto a uniform grid.
+        
+        Args:
+            batch: Sensor data with arbitrary (possibly unsorted, jittery) timestamps
+        
+        Returns:
+            One uniformly sampled batch per gap-free segment, in time order
+        """
+        if not len(batch):
+            return []
+        
+        batch = self._sorted_unique(batch)
+        segments = []
+        
+        for start, stop in self._segment_bounds(batch.timestamp):
+            segment = batch.slice(start, stop)
+            count = self._grid_length(segment.timestamp)
+            grid = segment.timestamp[0] + np.arange(count) / self.sample_rate
+            segments.append(self.interpolate(segment, grid))
+        
+        return segments
+    
+    def segment_lengths(self, timestamps: Sequence[float]) -> List[int]:
+        """
+        Number of grid samples in each segment resample() would produce.
+        
+        Only needs the timestamps, so windows can be counted without
+        interpolating any channel.
+        """
+        times = np.unique(np.asarray(timestamps, dtype=float))
+        return [self._grid_length(times[start:stop]) for start, stop in self._segment_bounds(times)]
+    
+    def _grid_length(self, times: np.ndarray) -> int:
+        """Grid points from the first to the last of a segment's sorted timestamps."""
+        return int(np.floor((times[-1] - times[0]) * self.sample_rate + GRID_TOLERANCE)) + 1
+    
+    def interpolate(self, batch: SensorBatch, grid: np.ndarray,
+                    anchors: Optional[Dict[str, Tuple[float, float]]] = None) -> SensorBatch:
+        """
+        Interpolate every channel of a time-sorted batch at the given times.
+        
+        Optional channels are interpolated between their valid readings only;
+        a grid point is valid if the nearest original sample had a reading.
+        
+        Args:
+            batch: Time-sorted samples covering the grid
+            grid: Times to interpolate at
+            anchors: Optional (timestamp, value) of each optional channel's last
+                reading before the batch, used as an extra interpolation point
+        """
+        times = batch.timestamp
+        channels = {'timestamp': grid}
+        valid = {}
+        anchors = anchors or {}
+        
+        for name in SensorBatch.REQUIRED_CHANNELS[1:]:
+            channels[name] = np.interp(grid, times, batch.channels[name])
+        
+        nearest = self._nearest_indices(times, grid)
+        for name in SensorBatch.OPTIONAL_CHANNELS:
+            mask = batch.valid[name]
+            if not mask.any():
+                channels[name] = np.zeros(len(grid))
+                valid[name] = np.zeros(len(grid), dtype=bool)
+                continue
+            
+            reading_times = times[mask]
+            readings = batch.channels[name][mask]
+            anchor = anchors.get(name)
+            if anchor is not None and anchor[0] < reading_times[0]:
+                reading_times = np.concatenate([[anchor[0]], reading_times])
+                readings = np.concatenate([[anchor[1]], readings])
+            
+            channels[name] = np.interp(grid, reading_times, readings)
+            valid[name] = mask[nearest]
+            channels[name][~valid[name]] = 0.0
+        
+        return SensorBatch(channels, valid)
+    
+    def _segment_bounds(self, times: np.ndarray) -> List[Tuple[int, int]]:
+        """(start, stop) sample ranges between gaps longer than max_gap_seconds."""
+        breaks = np.flatnonzero(np.diff(times) > self.max_gap_seconds) + 1
+        edges = np.concatenate([[0], breaks, [len(times)]])
+        return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+    
+    @staticmethod
+    def _sorted_unique(batch: SensorBatch) -> SensorBatch:
+        """Order samples by timestamp and drop repeated timestamps."""
+        times = batch.timestamp
+        if len(times) and np.all(np.diff(times) > 0):
+            return batch
+        
+        order = np.argsort(times, kind='stable')
+        keep = np.concatenate([[True], np.diff(times[order]) > 0])
+        order = order[keep]
+        return SensorBatch(
+            {name: values[order] for name, values in batch.channels.items()},
+            {name: mask[order] for name, mask in batch.valid.items()}
+        )
+    
+    @staticmethod
+    def _nearest_indices(times: np.ndarray, grid: np.ndarray) -> np.ndarray:
+        """Index of the original sample closest in time to each grid point."""
+        if len(times) == 1:
+            return np.zeros(len(grid), dtype=int)
+        
+        after = np.clip(np.searchsorted(times, grid), 1, len(times) - 1)
+        before = after - 1
+        return np.where(grid - times[before] <= times[after] - grid, before, after)
+
+
+class StreamingResampler:
+    """
+    Resamples a live stream chunk by chunk.
+    
+    Carries the last raw sample and the next grid time across chunks, so the
+    output grid is identical to resampling the concatenated stream in one go.
+    Optional channels (gyroscope, GPS) also carry their last reading; grid
+    points after a chunk's final reading hold that value instead of
+    interpolating towards a reading that has not arrived yet.
+    """
+    
+    def __init__(self, resampler: Resampler):
+        """
+        Initialize streaming resampler.
+        
+        Args:
+            resampler: Resampler providing the sample rate and gap threshold
+        """
+        self.resampler = resampler
+        self.reset()
+    
+    def reset(self):
+        """Forget the stream position."""
+        self._last = None
+        self._origin = None
+        self._next_index = 0
+        self._anchors = {}
+    
+    def push(self, batch: SensorBatch) -> List[Tuple[SensorBatch, bool]]:
+        """
+        Resample a new chunk of raw samples.
+        
+        Args:
+            batch: New raw samples, in time order
+        
+        Returns:
+            (uniform batch, starts_new_segment) pairs. starts_new_segment is True
+            when the stream resumed after a gap, so window state should be reset.
+        """
+        if self._last is not None:
+            newer = batch.timestamp > self._last.timestamp[-1]
+            batch = SensorBatch(
+                {name: values[newer] for name, values in batch.channels.items()},
+                {name: mask[newer] for name, mask in batch.valid.items()}
+            )
+        if not len(batch):
+            return []
+        
+        combined = batch if self._last is None else SensorBatch.concatenate([self._last, batch])
+        output = []
+        
+        for start, stop in self.resampler._segment_bounds(combined.timestamp):
+            segment = combined.slice(start, stop)
+            new_segment = self._origin is None or start > 0
+            if new_segment:
+                self._origin = segment.timestamp[0]
+                self._next_index = 0
+                self._anchors = {}
+            
+            rate = self.resampler.sample_rate
+            last_index = int(np.floor((segment.timestamp[-1] - self._origin) * rate + GRID_TOLERANCE))
+            indices = np.arange(self._next_index, last_index + 1)
+            if len(indices):
+                grid = self._origin + indices / rate
+                output.append((self.resampler.interpolate(segment, grid, self._anchors), new_segment))
+                self._next_index = last_index + 1
+            
+            self._update_anchors(segment)
+        
+        self._last = combined.slice(len(combined) - 1, len(combined))
+        return output
+    
+    def _update_anchors(self, segment: SensorBatch):
+        """Remember the latest reading of each optional channel."""
+        for name in SensorBatch.OPTIONAL_CHANNELS:
+            readings = np.flatnonzero(segment.valid[name])
+            if len(readings):
+                last = readings[-1]
+                self._anchors[name] = (segment.timestamp[last], segment.channels[name][last])
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Sensor data containers for transport mode detection.
+Provides the per-point SensorData record and the columnar SensorBatch used on the hot path.
+"""
+
+import numpy as np
+from typing import Any, List, Dict, Optional, Sequence
+from dataclasses import dataclass
+
+
+@dataclass
+class SensorData:
+    """Container for sensor data points."""
+    timestamp: float
+    acceleration_x: float
+    acceleration_y: float
+    acceleration_z: float
+    gyroscope_x: Optional[float] = None
+    gyroscope_y: Optional[float] = None
+    gyroscope_z: Optional[float] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    speed: Optional[float] = None
+    heading: Optional[float] = None
+    accuracy: Optional[float] = None
+
+
+class SensorBatch:
+    """
+    Columnar (struct-of-arrays) container for a trace of sensor data points.
+    
+    Every channel is a contiguous float64 array. Optional channels store 0.0
+    where a reading is missing and carry a boolean validity mask in `valid`.
+    """
+    
+    REQUIRED_CHANNELS = ('timestamp', 'acceleration_x', 'acceleration_y', 'acceleration_z')
+    OPTIONAL_CHANNELS = (
+        'gyroscope_x', 'gyroscope_y', 'gyroscope_z',
+        'latitude', 'longitude', 'speed', 'heading', 'accuracy'
+    )
+    CHANNELS = REQUIRED_CHANNELS + OPTIONAL_CHANNELS
+    
+    def __init__(self, channels: Dict[str, np.ndarray], valid: Dict[str, np.ndarray]):
+        """
+        Initialize a batch from prepared channel arrays.
+        
+        Args:
+            channels: Float array per channel name (all channels in CHANNELS)
+            valid: Boolean validity mask per optional channel name
+        """
+        self.channels = channels
+        self.valid = valid
+    
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Any]) -> 'SensorBatch':
+        """
+        Build a batch from per-channel sequences or arrays.
+        
+        Optional channels may be omitted or contain None/NaN for missing readings.
+        """
+        length = len(columns['timestamp'])
+        channels = {}
+        valid = {}
+        
+        for name in cls.REQUIRED_CHANNELS:
+            channels[name] = np.ascontiguousarray(columns[name], dtype=np.float64)
+            if len(channels[name]) != length:
+                raise ValueError(f"Channel '{name}' has {len(channels[name])} samples, expected {length}")
+        
+        for name in cls.OPTIONAL_CHANNELS:
+            values = columns.get(name)
+            if values is None:
+                channels[name] = np.zeros(length)
+                valid[name] = np.zeros(length, dtype=bool)
+                continue
+            
+            values = np.asarray(values, dtype=np.float64)
+            if len(values) != length:
+                raise ValueError(f"Channel '{name}' has {len(values)} samples, expected {length}")
+            
+            # Arrays without missing readings are used as they are, not copied
+            mask = ~np.isnan(values)
+            if not mask.all():
+                values = np.where(mask, values, 0.0)
+            channels[name] = values
+            valid[name] = mask
+        
+        return cls(channels, valid)
+    
+    @classmethod
+    def from_sensor_data(cls, points: Sequence[Any]) -> 'SensorBatch':
+        """Build a batch from point objects with SensorData attributes (dataclasses or API models)."""
+        return cls.from_columns({
+            name: [getattr(point, name) for point in points] for name in cls.CHANNELS
+        })
+    
+    @classmethod
+    def from_dicts(cls, points: Sequence[Dict[str, Any]]) -> 'SensorBatch':
+        """Build a batch from point dictionaries, as used in training samples."""
+        return cls.from_columns({
+            name: [point.get(name) for point in points] for name in cls.CHANNELS
+        })
+    
+    @classmethod
+    def concatenate(cls, batches: Sequence['SensorBatch']) -> 'SensorBatch':
+        """Join several batches end to end."""
+        return cls(
+            {name: np.concatenate([b.channels[name] for b in batches]) for name in cls.CHANNELS},
+            {name: np.concatenate([b.valid[name] for b in batches]) for name in cls.OPTIONAL_CHANNELS}
+        )
+    
+    def __len__(self) -> int:
+        return len(self.channels['timestamp'])
+    
+    def __getattr__(self, name: str) -> np.ndarray:
+        channels = self.__dict__.get('channels')
+        if channels is not None and name in channels:
+            return channels[name]
+        raise AttributeError(name)
+    
+    def slice(self, start: int, stop: int) -> 'SensorBatch':
+        """Return a batch of views over samples [start, stop)."""
+        return SensorBatch(
+            {name: values[start:stop] for name, values in self.channels.items()},
+            {name: mask[start:stop] for name, mask in self.valid.items()}
+        )
+    
+    def to_sensor_data(self) -> List[SensorData]:
+        """Convert back to a list of SensorData points."""
+        columns = {}
+        for name in self.CHANNELS:
+            values = self.channels[name].tolist()
+            if name in self.valid:
+                values = [v if ok else None for v, ok in zip(values, self.valid[name].tolist())]
+            columns[name] = values
+        
+        return [SensorData(**dict(zip(columns, row))) for row in zip(*columns.values())]
\ No newline at end of file
@@ -0,0 +1,259 @@
+"""
+Device sessions for incremental transport mode detection.
+Keeps a streaming feature extractor per device so that clients upload only
+new sensor readings and get predictions for the windows those readings
+complete, with idle sessions expiring and total session memory capped.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .feature_extraction import FeatureExtractor, SensorBatch
+from .streaming_features import MOMENT_CHANNELS, StreamingFeatureExtractor
+
+
+# Per-session memory besides the stream buffers: objects, resampler and filter state
+SESSION_OVERHEAD_BYTES = 8 * 1024
+
+
+class SessionNotFound(KeyError):
+    """Raised for a session id that never existed, was closed or has expired."""
+
+
+class DeviceSession:
+    """
+    Streaming state of one device.
+    
+    Uploads must be in time order; readings at or before the newest one
+    already received are dropped, so a client may retry an upload or resend
+    overlap without windows being counted twice.
+    """
+    
+    def __init__(self, session_id: str, device_id: str, feature_extractor: FeatureExtractor):
+        """
+        Initialize a device session.
+        
+        Args:
+            session_id: Identifier handed to the client
+            device_id: Client-supplied device identifier
+            feature_extractor: Extractor of the model the session is served by
+        """
+        self.session_id = session_id
+        self.device_id = device_id
+        self.created_at = datetime.now().isoformat()
+        self.last_seen = 0.0
+        self.samples_received = 0
+        self.windows_emitted = 0
+        self.last_timestamp = None
+        self.lock = threading.Lock()
+        self._start(feature_extractor)
+    
+    def _start(self, feature_extractor: FeatureExtractor):
+        """Start streaming with an extractor, discarding any buffered readings."""
+        self.extractor_config = feature_extractor.get_config()
+        self.stream = StreamingFeatureExtractor(feature_extractor=FeatureExtractor.from_config(self.extractor_config))
+    
+    def append(self, batch: SensorBatch, detector: Any) -> List[Dict[str, Any]]:
+        """
+        Add new readings and predict the windows they complete.
+        
+        Same as append_many([batch], detector).
+        """
+        return self.append_many([batch], detector)
+    
+    def append_many(self, batches: List[SensorBatch], detector: Any) -> List[Dict[str, Any]]:
+        """
+        Add several uploads in order and predict the windows they complete in one model pass.
+        
+        If the detector now serves a model with a different extractor
+        configuration (a model swap), the buffered tail is discarded and
+        windowing restarts with the new configuration.
+        
+        Args:
+            batches: Uploads received since the previous call, oldest first
+            detector: Trained TransportModeDetector to score the windows with
+        
+        Returns:
+            Predictions of the newly completed windows; window_index counts
+            from the start of the session
+        """
+        for batch in batches:
+            self.check_order(batch)
+        
+        with self.lock:
+            if detector.feature_extractor.get_config() != self.extractor_config:
+                self._start(detector.feature_extractor)
+            
+            first_index = self.windows_emitted
+            features = []
+            for batch in batches:
+                features.extend(self._push(batch))
+            self.windows_emitted += len(features)
+        return detector.predict_features(features, first_index)
+    
+    @staticmethod
+    def check_order(batch: SensorBatch):
+        """
+        Raises:
+            ValueError: If the readings of an upload are not in increasing timestamp order
+        """
+        if np.any(np.diff(batch.timestamp) <= 0):
+            raise ValueError("Readings must be in increasing timestamp order")
+    
+    def _push(self, batch: SensorBatch) -> List[Dict[str, float]]:
+        """Stream the readings newer than any received so far; features of completed windows."""
+        if self.last_timestamp is not None:
+            newer = batch.timestamp > self.last_timestamp
+            if not newer.all():
+                batch = SensorBatch(
+                    {name: values[newer] for name, values in batch.channels.items()},
+                    {name: mask[newer] for name, mask in batch.valid.items()}
+                )
+        if not len(batch):
+            return []
+        
+        self.last_timestamp = float(batch.timestamp[-1])
+        self.samples_received += len(batch)
+        return self.stream.push(batch)
+    
+    def memory_bytes(self) -> int:
+        """
+        Upper bound of the memory held by the session's stream state.
+        
+        Ring buffers of one window per channel plus a window of block power
+        sums and extrema; fixed for a given extractor configuration.
+        """
+        stream = self.stream
+        buffers = stream.window_size * (8 * len(SensorBatch.CHANNELS) + len(SensorBatch.OPTIONAL_CHANNELS))
+        blocks = (stream.blocks_per_window + 2) * 6 * 8 * len(MOMENT_CHANNELS)
+        return buffers + blocks + SESSION_OVERHEAD_BYTES
+    
+    def info(self) -> Dict[str, Any]:
+        """Public description of the session."""
+        return {
+            'session_id': self.session_id,
+            'device_id': self.device_id,
+            'created_at': self.created_at,
+            'samples_received': self.samples_received,
+            'windows_emitted': self.windows_emitted,
+            'window_size': self.stream.window_size,
+            'step_size': self.stream.step_size,
+        }
+
+
+class SessionManager:
+    """
+    Registry of open device sessions with idle expiry and a memory cap.
+    
+    Sessions idle for ttl_seconds are dropped. When the sessions' buffers
+    together exceed max_memory_bytes, the least recently used sessions are
+    dropped until they fit again. Methods are called from the event loop;
+    only DeviceSession.append runs on worker threads.
+    """
+    
+    def __init__(self, ttl_seconds: float = 600.0, max_memory_bytes: int = 64 * 1024 * 1024,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize session manager.
+        
+        Args:
+            ttl_seconds: Idle time after which a session expires
+            max_memory_bytes: Budget for all sessions' buffers together
+            clock: Monotonic time source in seconds
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_bytes = max_memory_bytes
+        self.clock = clock
+        self._sessions: 'OrderedDict[str, DeviceSession]' = OrderedDict()
+        self.opened = 0
+        self.closed = 0
+        self.expired = 0
+        self.evicted = 0
+    
+    def open(self, device_id: str, feature_extractor: FeatureExtractor) -> DeviceSession:
+        """Start a session for a device."""
+        self.evict_expired()
+        session = DeviceSession(uuid.uuid4().hex, device_id, feature_extractor)
+        session.last_seen = self.clock()
+        self._sessions[session.session_id] = session
+        self.opened += 1
+        self._enforce_memory_cap(keep=session.session_id)
+        return session
+    
+    def get(self, session_id: str) -> DeviceSession:
+        """
+        Look up an open session and mark it as used.
+        
+        Raises:
+            SessionNotFound: If the session does not exist or has expired
+        """
+        self.evict_expired()
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise SessionNotFound(session_id)
+        session.last_seen = self.clock()
+        self._sessions.move_to_end(session_id)
+        return session
+    
+    def close(self, session_id: str) -> DeviceSession:
+        """
+        End a session.
+        
+        Raises:
+            SessionNotFound: If the session does not exist or has expired
+        """
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            raise SessionNotFound(session_id)
+        self.closed += 1
+        return session
+    
+    def evict_expired(self) -> int:
+        """Drop sessions idle for longer than the TTL; returns how many were dropped."""
+        deadline = self.clock() - self.ttl_seconds
+        # Sessions are kept in least-recently-used order, so expired ones come first
+        expired = []
+        for session_id, session in self._sessions.items():
+            if session.last_seen > deadline:
+                break
+            expired.append(session_id)
+        for session_id in expired:
+            del self._sessions[session_id]
+        self.expired += len(expired)
+        return len(expired)
+    
+    def _enforce_memory_cap(self, keep: Optional[str] = None):
+        """Drop least recently used sessions until the memory budget holds."""
+        total = self.memory_bytes()
+        while total > self.max_memory_bytes and len(self._sessions) > 1:
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                break
+            total -= self._sessions.pop(session_id).memory_bytes()
+            self.evicted += 1
+    
+    def memory_bytes(self) -> int:
+        """Approximate memory held by all open sessions."""
+        return sum(session.memory_bytes() for session in self._sessions.values())
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Open sessions, their memory and how sessions have ended."""
+        return {
+            'sessions': len(self._sessions),
+            'memory_bytes': self.memory_bytes(),
+            'max_memory_bytes': self.max_memory_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'opened': self.opened,
+            'closed': self.closed,
+            'expired': self.expired,
+            'evicted': self.evicted,
+        }
\ No newline at end of file
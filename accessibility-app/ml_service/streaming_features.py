@@ -0,0 +1,267 @@
+"""
+Streaming feature extraction for live transport mode detection.
+Keeps ring buffers and running moments so that each new window's moment
+features cost time proportional to the step size; the remaining features are
+still computed over the whole buffered window.
+"""
+
+import numpy as np
+import math
+from collections import deque
+from typing import List, Dict, Optional, Union
+
+from .feature_extraction import FeatureExtractor, SensorBatch, SensorData
+from .resampling import StreamingResampler
+
+
+# Channels whose mean/std/min/max/skewness/kurtosis are maintained incrementally
+MOMENT_CHANNELS = (
+    'accel_x', 'accel_y', 'accel_z', 'accel_magnitude',
+    'gyro_x', 'gyro_y', 'gyro_z', 'gyro_magnitude'
+)
+
+# Recompute the running power sums from the buffer every N windows to bound drift
+RESYNC_INTERVAL = 32
+
+
+class StreamingFeatureExtractor:
+    """
+    Stateful sliding-window feature extractor for live sensor streams.
+    
+    Samples are pushed one at a time or in chunks. Every `step_size` samples a
+    window completes and its features are emitted with the same keys as
+    FeatureExtractor.extract_features, so they can be fed straight to a model
+    trained on batch features.
+    
+    Samples are accumulated in blocks of gcd(window_size, step_size), which tile
+    every window exactly. Each block contributes shifted power sums and extrema,
+    so only mean/std/min/max/skewness/kurtosis cost O(step) per window.
+    Everything else is recomputed from the buffered window each time it is
+    emitted: copying the window out of the ring is O(window), the quartiles
+    sort it and the spectral features take its FFT (O(window log window)), and
+    peaks, cross-axis correlation and GPS distance scan it (O(window)).
+    
+    If the extractor has a sample_rate, incoming samples are resampled onto the
+    same uniform grid as in batch extraction, and a gap in the stream restarts
+    windowing just as it splits a batch trace into segments. Filter state is
+    carried across chunks, so each sample is filtered exactly once.
+    """
+    
+    def __init__(self, window_size: int = 50, overlap: float = 0.5,
+                 feature_extractor: Optional[FeatureExtractor] = None):
+        """
+        Initialize streaming feature extractor.
+        
+        Args:
+            window_size: Number of samples per window
+            overlap: Overlap ratio between windows (0-1)
+            feature_extractor: Batch extractor to share configuration with
+                (e.g. a loaded model's extractor); overrides window_size/overlap
+        """
+        self.feature_extractor = feature_extractor or FeatureExtractor(window_size, overlap)
+        self.window_size = self.feature_extractor.window_size
+        self.step_size = self.feature_extractor.step_size
+        self.block_size = math.gcd(self.window_size, self.step_size)
+        self.blocks_per_window = self.window_size // self.block_size
+        
+        resampler = self.feature_extractor.resampler
+        self._resampler = StreamingResampler(resampler) if resampler else None
+        self.reset()
+    
+    def reset(self):
+        """Discard all buffered samples and running state."""
+        if self._resampler is not None:
+            self._resampler.reset()
+        self._filter_state = None
+        self._reset_windows()
+    
+    def _reset_windows(self):
+        """Start windowing afresh, e.g. after a gap in the stream."""
+        self._buffer = {name: np.zeros(self.window_size) for name in SensorBatch.CHANNELS}
+        self._valid = {name: np.zeros(self.window_size, dtype=bool) for name in SensorBatch.OPTIONAL_CHANNELS}
+        self._position = 0  # Next ring slot to write, i.e. the oldest sample once full
+        
+        self.samples_seen = 0
+        self.windows_emitted = 0
+        self._next_window_end = self.window_size
+        
+        n_channels = len(MOMENT_CHANNELS)
+        self._shift = None
+        self._power_sums = np.zeros((4, n_channels))
+        self._blocks = deque()
+        self._block_fill = 0
+        self._block_sums = np.zeros((4, n_channels))
+        self._block_min = np.full(n_channels, np.inf)
+        self._block_max = np.full(n_channels, -np.inf)
+    
+    def push_sample(self, sample: SensorData) -> List[Dict[str, float]]:
+        """Add a single sample; returns features for any window it completes."""
+        return self.push([sample])
+    
+    def push(self, sensor_data: Union[SensorBatch, List[SensorData]]) -> List[Dict[str, float]]:
+        """
+        Add a chunk of samples.
+        
+        Args:
+            sensor_data: New samples as a SensorBatch or list of sensor data points
+        
+        Returns:
+            Feature dictionaries for the windows completed by this chunk, in order
+        """
+        batch = FeatureExtractor.as_batch(sensor_data)
+        if self._resampler is None:
+            return self._push_uniform(batch)
+        
+        sensor_filter = self.feature_extractor.sensor_filter
+        features = []
+        for segment, starts_new_segment in self._resampler.push(batch):
+            if starts_new_segment:
+                self._filter_state = None
+                self._reset_windows()
+            if sensor_filter is not None:
+                segment, self._filter_state = sensor_filter.apply(segment, self._filter_state)
+            features.extend(self._push_uniform(segment))
+        
+        return features
+    
+    def _push_uniform(self, batch: SensorBatch) -> List[Dict[str, float]]:
+        """Window samples that are already on the extractor's sample grid."""
+        if not len(batch):
+            return []
+        
+        moment_data = self._moment_channels(batch)
+        if self._shift is None:
+            self._shift = moment_data[0].copy()
+        
+        features = []
+        start = 0
+        while start < len(batch):
+            count = min(len(batch) - start, self.block_size - self._block_fill)
+            self._write(batch, start, count)
+            self._accumulate(moment_data[start:start + count])
+            start += count
+            
+            if self._block_fill == self.block_size:
+                self._close_block()
+            
+            if self.samples_seen == self._next_window_end:
+                features.append(self._emit_window())
+                self._next_window_end += self.step_size
+        
+        return features
+    
+    def _moment_channels(self, batch: SensorBatch) -> np.ndarray:
+        """Stack the incrementally tracked channels as a (n_samples, n_channels) array."""
+        ax, ay, az = batch.acceleration_x, batch.acceleration_y, batch.acceleration_z
+        gx, gy, gz = batch.gyroscope_x, batch.gyroscope_y, batch.gyroscope_z
+        data = np.stack([
+            ax, ay, az, np.sqrt(ax ** 2 + ay ** 2 + az ** 2),
+            gx, gy, gz, np.sqrt(gx ** 2 + gy ** 2 + gz ** 2)
+        ], axis=1)
+        return np.nan_to_num(data, nan=0.0)
+    
+    def _write(self, batch: SensorBatch, start: int, count: int):
+        """Copy samples [start, start + count) of a batch into the ring buffers."""
+        slots = (self._position + np.arange(count)) % self.window_size
+        for name, values in batch.channels.items():
+            self._buffer[name][slots] = values[start:start + count]
+        for name, mask in batch.valid.items():
+            self._valid[name][slots] = mask[start:start + count]
+        
+        self._position = (self._position + count) % self.window_size
+        self.samples_seen += count
+    
+    def _accumulate(self, data: np.ndarray):
+        """Fold samples into the current block's power sums and extrema."""
+        shifted = data - self._shift
+        powers = shifted.copy()
+        for order in range(4):
+            self._block_sums[order] += powers.sum(axis=0)
+            powers *= shifted
+        
+        self._block_min = np.minimum(self._block_min, data.min(axis=0))
+        self._block_max = np.maximum(self._block_max, data.max(axis=0))
+        self._block_fill += len(data)
+    
+    def _close_block(self):
+        """Add the finished block to the window and evict the block that left it."""
+        self._blocks.append((self._block_sums, self._block_min, self._block_max))
+        self._power_sums += self._block_sums
+        
+        if len(self._blocks) > self.blocks_per_window:
+            evicted_sums, _, _ = self._blocks.popleft()
+            self._power_sums -= evicted_sums
+        
+        n_channels = len(MOMENT_CHANNELS)
+        self._block_fill = 0
+        self._block_sums = np.zeros((4, n_channels))
+        self._block_min = np.full(n_channels, np.inf)
+        self._block_max = np.full(n_channels, -np.inf)
+    
+    def _resync(self, window: SensorBatch):
+        """Recompute block power sums exactly, re-centred on the current window mean."""
+        data = self._moment_channels(window)
+        self._shift = data.mean(axis=0)
+        
+        shifted = (data - self._shift).reshape(self.blocks_per_window, self.block_size, -1)
+        powers = shifted.copy()
+        block_sums = np.zeros((self.blocks_per_window, 4, len(MOMENT_CHANNELS)))
+        for order in range(4):
+            block_sums[:, order] = powers.sum(axis=1)
+            powers *= shifted
+        
+        self._blocks = deque(
+            (block_sums[i], block_min, block_max)
+            for i, (_, block_min, block_max) in enumerate(self._blocks)
+        )
+        self._power_sums = block_sums.sum(axis=0)
+    
+    def _window_moments(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Window moments from the running power sums, in the form the batch engine accepts."""
+        n = self.window_size
+        a1, a2, a3, a4 = self._power_sums / n
+        
+        mean = self._shift + a1
+        m2 = a2 - a1 ** 2
+        m3 = a3 - 3 * a1 * a2 + 2 * a1 ** 3
+        m4 = a4 - 4 * a1 * a3 + 6 * a1 ** 2 * a2 - 3 * a1 ** 4
+        
+        # Same degenerate-variance rule as scipy.stats.skew/kurtosis
+        zero = m2 <= (np.finfo(np.float64).resolution * mean) ** 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            skewness = np.where(zero, np.nan, m3 / m2 ** 1.5)
+            kurtosis = np.where(zero, np.nan, m4 / m2 ** 2 - 3.0)
+        
+        minimum = np.min([block_min for _, block_min, _ in self._blocks], axis=0)
+        maximum = np.max([block_max for _, _, block_max in self._blocks], axis=0)
+        
+        return {
+            prefix: {
+                'mean': mean[i:i + 1],
+                'std': np.sqrt(np.maximum(m2[i:i + 1], 0.0)),
+                'min': minimum[i:i + 1],
+                'max': maximum[i:i + 1],
+                'skewness': skewness[i:i + 1],
+                'kurtosis': kurtosis[i:i + 1],
+            }
+            for i, prefix in enumerate(MOMENT_CHANNELS)
+        }
+    
+    def _emit_window(self) -> Dict[str, float]:
+        """Compute features for the window that ends at the newest sample."""
+        order = (self._position + np.arange(self.window_size)) % self.window_size
+        window = SensorBatch(
+            {name: values[order] for name, values in self._buffer.items()},
+            {name: mask[order] for name, mask in self._valid.items()}
+        )
+        
+        if self.windows_emitted % RESYNC_INTERVAL == 0:
+            self._resync(window)
+        
+        extractor = self.feature_extractor
+        groups = extractor._extract_window_columns(
+            extractor._channel_arrays(window), self._window_moments()
+        )
+        self.windows_emitted += 1
+        
+        return extractor._columns_to_dicts(groups, 1)[0]
\ No newline at end of file
@@ -12,7 +12,10 @@ from pathlib import Path
 # Add the parent directory to the path so we can import our modules
 sys.path.append(str(Path(__file__).parent.parent))
 
+from ml_service.feature_extraction import FeatureExtractor
 from ml_service.transport_mode_detector import TransportModeDetector
+from ml_service.feature_store import FeatureStore
+from ml_service.model_registry import ModelRegistry
 
 
 def main():
@@ -24,25 +27,96 @@ def main():
         default=1000, 
         help="Number of synthetic samples to generate (default: 1000)"
     )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Random seed for the synthetic samples (default: random)"
+    )
     parser.add_argument(
         "--model-path", 
         type=str, 
         default="models/transport_mode_model.pkl",
-        help="Path to save the trained model"
+        help="Path to save the trained model with --no-registry"
+    )
+    parser.add_argument(
+        "--registry",
+        type=str,
+        default="models/registry",
+        help="Model registry directory the model is published to (default: models/registry)"
+    )
+    parser.add_argument(
+        "--no-registry",
+        action="store_true",
+        help="Save a single model file at --model-path instead of publishing a registry version"
+    )
+    parser.add_argument(
+        "--no-activate",
+        action="store_true",
+        help="Publish the new version without making it the served one"
     )
     parser.add_argument(
         "--force-retrain", 
         action="store_true",
         help="Force retraining even if model exists"
     )
+    parser.add_argument(
+        "--sample-rate",
+        type=float,
+        default=None,
+        help="Resample sensor data to this rate in Hz before windowing (default: use raw samples)"
+    )
+    parser.add_argument(
+        "--window-seconds",
+        type=float,
+        default=None,
+        help="Window length in seconds (requires --sample-rate)"
+    )
+    parser.add_argument(
+        "--lowpass-cutoff",
+        type=float,
+        default=None,
+        help="Low-pass accelerometer and gyroscope at this frequency in Hz (requires --sample-rate)"
+    )
+    parser.add_argument(
+        "--gravity-cutoff",
+        type=float,
+        default=None,
+        help="Remove gravity below this frequency in Hz (requires --sample-rate)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes used for feature extraction (default: CPU count)"
+    )
+    parser.add_argument(
+        "--feature-store",
+        type=str,
+        default="data/feature_store",
+        help="Directory caching extracted training features (default: data/feature_store)"
+    )
+    parser.add_argument(
+        "--no-feature-store",
+        action="store_true",
+        help="Extract every sample without reading or writing the feature store"
+    )
     
     args = parser.parse_args()
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.sample_rate is None:
+        for option in ('window_seconds', 'lowpass_cutoff', 'gravity_cutoff'):
+            if getattr(args, option) is not None:
+                parser.error(f"--{option.replace('_', '-')} requires --sample-rate")
     
     print("=== Transport Mode Detection Model Training ===")
     print(f"Generating {args.samples} synthetic training samples...")
     
     # Initialize detector
-    detector = TransportModeDetector(model_path=args.model_path)
+    feature_store = None if args.no_feature_store else FeatureStore(args.feature_store)
+    registry = None if args.no_registry else ModelRegistry(args.registry)
+    detector = TransportModeDetector(model_path=args.model_path, feature_store=feature_store, registry=registry)
     
     # Check if model already exists
     if detector.load_model() and not args.force_retrain:
@@ -50,20 +124,32 @@ def main():
         print("Use --force-retrain to retrain the model.")
         return
     
+    # Loading a model replaces the extractor, so configure it just before training
+    if args.sample_rate is not None:
+        detector.feature_extractor = FeatureExtractor(
+            sample_rate=args.sample_rate,
+            window_seconds=args.window_seconds,
+            lowpass_cutoff=args.lowpass_cutoff,
+            gravity_cutoff=args.gravity_cutoff
+        )
+    
     try:
         # Generate synthetic training data
-        training_data = detector.generate_synthetic_data(args.samples)
+        training_data = detector.generate_synthetic_data(args.samples, seed=args.seed)
         
         print(f"Generated {len(training_data)} training samples")
         print("Training transport mode detection model...")
         
         # Train the model
-        metrics = detector.train(training_data)
+        metrics = detector.train(training_data, n_workers=args.workers, activate=not args.no_activate)
         
         print("\n=== Training Results ===")
         print(f"Accuracy: {metrics['accuracy']:.3f}")
         print(f"Cross-validation score: {metrics['cv_mean']:.3f} (+/- {metrics['cv_std'] * 2:.3f})")
-        print(f"Model saved to: {detector.model_path}")
+        if registry is not None:
+            print(f"Model saved to: {registry.root} as version {detector.model_version}")
+        else:
+            print(f"Model saved to: {detector.model_path}")
         
         # Show top features
         print("\n=== Top 10 Most Important Features ===")
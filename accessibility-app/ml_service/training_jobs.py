@@ -0,0 +1,284 @@
+"""
+Background training jobs for transport mode detection.
+Runs each training request in its own process, reports progress while it
+runs, publishes the finished model to the model registry and hands it to
+the caller so serving can switch to it in one step.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .execution import ExecutorSaturated
+from .feature_extraction import FeatureExtractor
+from .feature_store import FeatureStore
+from .model_registry import ModelRegistry
+from .transport_mode_detector import TransportModeDetector
+
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+# Stage of a running job whose model is being swapped in; it can no longer be cancelled
+ACTIVATING = 'activating'
+
+
+def _run_training(registry_root: str, extractor_config: Dict[str, Any], feature_store_root: Optional[str],
+                  training_data: List[Dict[str, Any]], num_synthetic: int, messages):
+    """
+    Child process entry point: train a fresh detector and publish it, inactive, to the registry.
+    
+    Reports ('progress', fraction, stage), then ('succeeded', metrics, n_samples, version)
+    or ('failed', error) on the message queue.
+    """
+    # Serving runs in the parent; let it win any contention for the CPU
+    if hasattr(os, 'nice'):
+        os.nice(10)
+    
+    try:
+        detector = TransportModeDetector(
+            feature_extractor=FeatureExtractor.from_config(extractor_config),
+            feature_store=FeatureStore(feature_store_root) if feature_store_root else None,
+            registry=ModelRegistry(registry_root)
+        )
+        if num_synthetic:
+            messages.put(('progress', 0.0, 'generating synthetic data'))
+            training_data = training_data + detector.generate_synthetic_data(num_synthetic)
+        
+        detector.train(
+            training_data, progress=lambda fraction, stage: messages.put(('progress', fraction, stage)),
+            activate=False
+        )
+        messages.put(('succeeded', detector.training_metrics, len(training_data), detector.model_version))
+    except Exception as e:
+        messages.put(('failed', str(e)))
+
+
+class TrainingJob:
+    """State of one training request."""
+    
+    def __init__(self, training_data: List[Dict[str, Any]], num_synthetic: int):
+        """
+        Initialize a queued job.
+        
+        Args:
+            training_data: Samples provided with the request
+            num_synthetic: Synthetic samples to generate in addition
+        """
+        self.id = uuid.uuid4().hex
+        self.status = QUEUED
+        self.progress = 0.0
+        self.stage = 'queued'
+        self.num_samples = len(training_data) + num_synthetic
+        self.metrics: Optional[Dict[str, float]] = None
+        self.model_version: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.training_data = training_data
+        self.num_synthetic = num_synthetic
+        self.process: Optional[multiprocessing.Process] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable status for the jobs endpoints."""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'stage': self.stage,
+            'num_samples': self.num_samples,
+            'metrics': self.metrics,
+            'model_version': self.model_version,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class TrainingJobManager:
+    """
+    Runs training jobs one at a time in child processes.
+    
+    The child publishes the model to the registry as an inactive version.
+    Only after it succeeds is that version loaded into a new detector and
+    handed to on_complete, which activates and serves it; a failed or
+    cancelled job never touches the serving model. Cancelling is refused
+    once a job has reached the activating stage.
+    """
+    
+    def __init__(self, registry: ModelRegistry, on_complete: Callable[[TransportModeDetector], None],
+                 extractor_config: Callable[[], Dict[str, Any]],
+                 feature_store_root: Optional[str] = None, max_pending: int = 4,
+                 max_history: int = 100, portable: bool = False):
+        """
+        Initialize training job manager.
+        
+        Args:
+            registry: Registry the finished model is published to
+            on_complete: Receives the newly trained detector and activates its
+                version; called on the job thread
+            extractor_config: Returns the feature extractor config to train with
+            feature_store_root: Feature store directory, or None to extract every sample
+            max_pending: Jobs allowed to wait behind the running one
+            max_history: Finished jobs kept for status queries
+            portable: Load finished models from their portable archive (NumPy only)
+        """
+        self.registry = registry
+        self.on_complete = on_complete
+        self.extractor_config = extractor_config
+        self.feature_store_root = feature_store_root
+        self.max_pending = max_pending
+        self.max_history = max_history
+        self.portable = portable
+        self._jobs: Dict[str, TrainingJob] = {}
+        self._pending: 'queue.Queue[Optional[TrainingJob]]' = queue.Queue()
+        self._lock = threading.Lock()
+        self._context = multiprocessing.get_context('spawn')
+        self._worker = threading.Thread(target=self._run, name='training-jobs', daemon=True)
+        self._worker.start()
+    
+    def submit(self, training_data: List[Dict[str, Any]], num_synthetic: int = 0) -> TrainingJob:
+        """
+        Queue a training job.
+        
+        Raises:
+            ExecutorSaturated: If max_pending jobs are already waiting
+        """
+        with self._lock:
+            waiting = sum(job.status == QUEUED for job in self._jobs.values())
+            if waiting >= self.max_pending:
+                raise ExecutorSaturated(f"{waiting} training jobs are already queued", retry_after=60,
+                                        status_code=503)
+            job = TrainingJob(training_data, num_synthetic)
+            self._jobs[job.id] = job
+            
+            finished = [old for old in self._jobs.values() if old.status in FINISHED_STATES]
+            for old in finished[:max(0, len(finished) - self.max_history)]:
+                del self._jobs[old.id]
+        self._pending.put(job)
+        return job
+    
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        """Job by ID, or None."""
+        return self._jobs.get(job_id)
+    
+    def jobs(self) -> List[TrainingJob]:
+        """All retained jobs, oldest first."""
+        return list(self._jobs.values())
+    
+    def cancel(self, job_id: str) -> Optional[TrainingJob]:
+        """
+        Cancel a queued or running job.
+        
+        Finished jobs, and jobs whose model is already being activated, are
+        left as they are; the returned job shows which happened.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES or job.stage == ACTIVATING:
+                return job
+            job.status = CANCELLED
+            job.stage = 'cancelled'
+            job.finished_at = datetime.now().isoformat()
+            job.training_data = None
+            process = job.process
+        
+        if process is not None and process.is_alive():
+            process.terminate()
+        return job
+    
+    def shutdown(self):
+        """Cancel every unfinished job and stop the worker thread."""
+        for job in self.jobs():
+            self.cancel(job.id)
+        self._pending.put(None)
+        self._worker.join(timeout=10)
+    
+    def _run(self):
+        """Worker thread: run queued jobs in order."""
+        while True:
+            job = self._pending.get()
+            if job is None:
+                return
+            if job.status == QUEUED:
+                self._execute(job)
+    
+    def _execute(self, job: TrainingJob):
+        """Run one job in a child process, relaying its progress."""
+        messages = self._context.Queue()
+        process = self._context.Process(
+            target=_run_training, name=f"training-{job.id}",
+            args=(self.registry.root, self.extractor_config(), self.feature_store_root,
+                  job.training_data, job.num_synthetic, messages)
+        )
+        
+        with self._lock:
+            if job.status != QUEUED:
+                return
+            job.status = RUNNING
+            job.stage = 'starting'
+            job.started_at = datetime.now().isoformat()
+            job.process = process
+            process.start()
+        
+        outcome = None
+        while outcome is None and (process.is_alive() or not messages.empty()):
+            try:
+                message = messages.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if message[0] == 'progress':
+                job.progress, job.stage = message[1], message[2]
+            else:
+                outcome = message
+        process.join()
+        job.training_data = None
+        
+        try:
+            if job.status == CANCELLED:
+                return
+            if outcome is None:
+                self._finish(job, FAILED, error=f"Training process exited with code {process.exitcode}")
+            elif outcome[0] == 'failed':
+                self._finish(job, FAILED, error=outcome[1])
+            else:
+                with self._lock:
+                    if job.status == CANCELLED:
+                        return
+                    job.metrics, job.num_samples, job.model_version = outcome[1], outcome[2], outcome[3]
+                    job.stage = ACTIVATING
+                self._swap_in(job.model_version)
+                self._finish(job, SUCCEEDED)
+        except Exception as e:
+            self._finish(job, FAILED, error=f"Could not load trained model: {e}")
+    
+    def _swap_in(self, version: str):
+        """Load a finished job's model version and hand it over for activation."""
+        detector = TransportModeDetector(registry=self.registry)
+        if not detector.load_model(version, portable=self.portable):
+            raise RuntimeError(f"model version {version} could not be loaded")
+        self.on_complete(detector)
+    
+    def _finish(self, job: TrainingJob, status: str, error: Optional[str] = None):
+        """Record a job's outcome unless it was cancelled meanwhile."""
+        with self._lock:
+            if job.status == CANCELLED:
+                return
+            job.status = status
+            job.error = error
+            job.stage = status
+            if status == SUCCEEDED:
+                job.progress = 1.0
+            job.finished_at = datetime.now().isoformat()
\ No newline at end of file
@@ -4,22 +4,31 @@ Implements a Random Forest classifier for detecting transport modes from sensor
 """
 
 import numpy as np
-import pandas as pd
-from typing import List, Dict, Tuple, Optional, Any
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from typing import List, Dict, Tuple, Optional, Any, Callable, Sequence, Union
 import joblib
 import json
 import os
 from datetime import datetime
 
-from .feature_extraction import FeatureExtractor, SensorData
+from .feature_extraction import FeatureExtractor, SensorBatch, SensorData
+from .feature_registry import FeatureSchema
+from .feature_graph import FeaturePlan
+from .parallel_extraction import ParallelFeatureExtractor
+from .feature_store import FeatureStore
+from .compiled_forest import CompiledForest
+from .model_registry import ModelRegistry
+from .portable_model import PortableModel
+from .cascade import CascadeStage, DEFAULT_THRESHOLD, evaluate_thresholds
+from .synthetic_data import SyntheticDataGenerator, trace_points
 
 
 class TransportModeDetector:
-    """Transport mode detection using machine learning."""
+    """
+    Transport mode detection using machine learning.
+    
+    scikit-learn is imported only to train or to unpickle a full model; a
+    detector loaded from a portable archive predicts with NumPy alone.
+    """
     
     # Transport modes we can detect
     TRANSPORT_MODES = [
@@ -32,65 +41,90 @@ class TransportModeDetector:
         'stationary'
     ]
     
-    def __init__(self, model_path: str = "models/transport_mode_model.pkl"):
+    def __init__(self, model_path: str = "models/transport_mode_model.pkl",
+                 feature_extractor: Optional[FeatureExtractor] = None,
+                 feature_store: Optional[FeatureStore] = None,
+                 registry: Optional[ModelRegistry] = None,
+                 cascade_threshold: Optional[float] = None):
         """
         Initialize the transport mode detector.
         
         Args:
             model_path: Path to save/load the trained model
+            feature_extractor: Extractor to train with (e.g. one resampling to a
+                fixed rate); replaced by the saved configuration on load
+            feature_store: Cache of extracted training features, or None to
+                extract every sample on each training run
+            registry: Versioned model store to save to and load from; without
+                one the model is a single pickle at model_path
+            cascade_threshold: First-stage confidence at which a window skips
+                the full model, or None to always run the full model
         """
         self.model_path = model_path
         self.model = None
-        self.scaler = StandardScaler()
-        self.label_encoder = LabelEncoder()
-        self.feature_extractor = FeatureExtractor()
+        self.scaler = None
+        self.label_encoder = None
+        self.feature_importances = None
+        self.feature_extractor = feature_extractor or FeatureExtractor()
+        self.feature_store = feature_store
+        self.registry = registry
+        self.model_version = None
+        self.training_metrics = {}
+        self.compiled_model = None
+        self.cascade = None
+        self.cascade_threshold = cascade_threshold
+        self.cascade_stats = {'windows': 0, 'exits': 0}
+        self.feature_schema = None
+        self.feature_plan = None
         self.feature_names = None
         self.is_trained = False
         
         # Create models directory if it doesn't exist
         os.makedirs(os.path.dirname(model_path), exist_ok=True)
     
-    def train(self, training_data: List[Dict[str, Any]]) -> Dict[str, float]:
+    def train(self, training_data: List[Dict[str, Any]], n_workers: Optional[int] = None,
+              progress: Optional[Callable[[float, str], None]] = None,
+              activate: bool = True) -> Dict[str, float]:
         """
         Train the transport mode detection model.
         
         Args:
             training_data: List of training samples with 'sensor_data' and 'transport_mode' keys
-            
+            n_workers: Processes used for feature extraction (defaults to the CPU count)
+            progress: Called with (fraction done, stage name) as training advances
+            activate: Make the saved model the registry's active version
+        
         Returns:
             Dictionary with training metrics
         """
-        print("Starting model training...")
-        
-        # Extract features and labels
-        features_list = []
-        labels = []
-        
-        for sample in training_data:
-            sensor_data = [SensorData(**point) for point in sample['sensor_data']]
-            transport_mode = sample['transport_mode']
-            
-            # Extract features
-            window_features = self.feature_extractor.extract_features(sensor_data)
-            
-            for features in window_features:
-                features_list.append(features)
-                labels.append(transport_mode)
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.model_selection import train_test_split, cross_val_score
+        from sklearn.metrics import accuracy_score
+        from sklearn.preprocessing import StandardScaler, LabelEncoder
         
-        if not features_list:
+        print("Starting model training...")
+        progress = progress or (lambda fraction, stage: None)
+        progress(0.0, 'extracting features')
+        
+        # Extract features against the registered feature schema; every window
+        # of a sample is labelled with the sample's transport mode
+        schema = FeatureSchema.default()
+        extractor = ParallelFeatureExtractor(self.feature_extractor, n_workers=n_workers)
+        if self.feature_store is not None:
+            X, y = self.feature_store.extract(training_data, extractor, schema)
+        else:
+            X, window_counts = extractor.extract(training_data, schema)
+            y = np.repeat([sample['transport_mode'] for sample in training_data], window_counts)
+        
+        if not len(X):
             raise ValueError("No valid features extracted from training data")
         
-        # Convert to DataFrame
-        X = pd.DataFrame(features_list)
-        y = np.array(labels)
-        
-        # Handle NaN values in features
-        X = X.fillna(0.0)
-        
-        # Store feature names
-        self.feature_names = X.columns.tolist()
+        # Store feature schema
+        self.feature_schema = schema
+        self.feature_names = list(schema.columns)
         
         # Encode labels
+        self.label_encoder = LabelEncoder()
         y_encoded = self.label_encoder.fit_transform(y)
         
         # Split data
@@ -99,10 +133,12 @@ class TransportModeDetector:
         )
         
         # Scale features
+        self.scaler = StandardScaler()
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
         
         # Train model
+        progress(0.3, 'fitting model')
         self.model = RandomForestClassifier(
             n_estimators=100,
             max_depth=10,
@@ -114,12 +150,26 @@ class TransportModeDetector:
         print(f"Feature names: {self.feature_names[:5]}...")  # Show first 5 features
         
         self.model.fit(X_train_scaled, y_train)
+        self.feature_importances = self.model.feature_importances_
+        self.compiled_model = self._compile_model()
+        self.feature_plan = self._build_feature_plan()
+        
+        # Small first-stage forest over cheap features for cascade inference
+        self.cascade = CascadeStage.fit(X_train_scaled, y_train, self.feature_names)
         
         # Evaluate model
+        progress(0.5, 'evaluating')
         y_pred = self.model.predict(X_test_scaled)
         accuracy = accuracy_score(y_test, y_pred)
         
+        cascade_report = evaluate_thresholds(self.cascade, y_pred, X_test_scaled, y_test)
+        print("Cascade threshold / early exit / accuracy on the test split:")
+        for row in cascade_report:
+            print(f"  {row['threshold']:.2f}  {row['exit_rate']:6.1%}  {row['accuracy']:.3f}")
+        cascade_default = evaluate_thresholds(self.cascade, y_pred, X_test_scaled, y_test, (DEFAULT_THRESHOLD,))[0]
+        
         # Cross-validation
+        progress(0.6, 'cross-validating')
         cv_scores = cross_val_score(
             self.model, X_train_scaled, y_train, cv=5, scoring='accuracy'
         )
@@ -129,270 +179,384 @@ class TransportModeDetector:
             'accuracy': accuracy,
             'cv_mean': cv_scores.mean(),
             'cv_std': cv_scores.std(),
+            'cascade_accuracy': cascade_default['accuracy'],
+            'cascade_exit_rate': cascade_default['exit_rate'],
             'feature_importance': dict(zip(self.feature_names, self.model.feature_importances_))
         }
         
         # Set trained flag before saving
         self.is_trained = True
+        self.training_metrics = {
+            'accuracy': float(accuracy),
+            'cv_mean': float(cv_scores.mean()),
+            'cv_std': float(cv_scores.std()),
+            'cascade_accuracy': cascade_default['accuracy'],
+            'cascade_exit_rate': cascade_default['exit_rate'],
+        }
         
         # Save model
-        self.save_model()
+        progress(0.95, 'saving model')
+        self.save_model(activate=activate)
+        progress(1.0, 'done')
         
         print(f"Model training completed. Accuracy: {accuracy:.3f}")
         print(f"Cross-validation score: {cv_scores.mean():.3f} (+/- {cv_scores.std() * 2:.3f})")
         
         return metrics
     
-    def predict(self, sensor_data: List[SensorData]) -> List[Dict[str, Any]]:
+    def predict(self, sensor_data: Union[SensorBatch, List[SensorData]]) -> List[Dict[str, Any]]:
         """
         Predict transport mode for sensor data.
         
         Args:
-            sensor_data: List of sensor data points
-            
+            sensor_data: Sensor data as a SensorBatch or a list of sensor data points
+        
         Returns:
             List of predictions with mode and confidence
         """
-        if not self.is_trained:
-            raise ValueError("Model must be trained before making predictions")
-        
-        # Extract features
-        features_list = self.feature_extractor.extract_features(sensor_data)
+        return self.predict_many([sensor_data])[0]
+    
+    def predict_many(self, traces: Sequence[Union[SensorBatch, List[SensorData]]]) -> List[List[Dict[str, Any]]]:
+        """
+        Predict transport modes for several independent traces in one model pass.
         
-        if not features_list:
-            return []
+        Windows never span traces: each trace is windowed on its own, its rows
+        are written into one shared feature matrix, and the whole matrix is
+        scaled and scored at once. With a cascade threshold set, the cheap
+        first stage scores every window and only the windows it is unsure
+        about go through full extraction and the full model.
         
-        # Convert to DataFrame
-        X = pd.DataFrame(features_list)
+        Args:
+            traces: Sensor data of each trace (e.g. one per request)
         
-        # Ensure all expected features are present
-        for feature in self.feature_names:
-            if feature not in X.columns:
-                X[feature] = 0.0
+        Returns:
+            Predictions of each trace, as predict() would return them
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
         
-        # Reorder columns to match training data
-        X = X[self.feature_names]
+        if self.cascade is not None and self.cascade_threshold is not None:
+            counts, predictions, probabilities = self._score_cascade(traces)
+        else:
+            counts, X_scaled = self._extract_scaled(traces, self.feature_plan)
+            predictions, probabilities = self._score(X_scaled) if sum(counts) else (None, None)
+        if not sum(counts):
+            return [[] for _ in traces]
+        
+        # Create results; window indices restart at 0 for every trace
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return [
+            self._format_predictions(predictions[start:stop], probabilities[start:stop])
+            for start, stop in zip(offsets[:-1], offsets[1:])
+        ]
+    
+    def predict_features(self, features: Sequence[Dict[str, float]], first_index: int = 0) -> List[Dict[str, Any]]:
+        """
+        Predict transport modes for windows whose features are already extracted.
         
-        # Scale features
-        X_scaled = self.scaler.transform(X)
+        Args:
+            features: Feature dictionary of each window, e.g. from StreamingFeatureExtractor
+            first_index: window_index of the first prediction
         
-        # Make predictions
-        predictions = self.model.predict(X_scaled)
-        probabilities = self.model.predict_proba(X_scaled)
+        Returns:
+            Predictions with mode and confidence, as predict() returns them
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+        if not features:
+            return []
         
+        X = self.feature_schema.empty_matrix(len(features))
+        index = self.feature_schema.index
+        for row, window_features in enumerate(features):
+            for name, value in window_features.items():
+                column = index.get(name)
+                if column is not None:
+                    X[row, column] = value
+        # Undefined statistics count as 0.0, as in batch extraction
+        X[np.isnan(X)] = 0.0
+        
+        predictions, probabilities = self._score(self._scale(X))
+        return self._format_predictions(predictions, probabilities, first_index)
+    
+    def _format_predictions(self, predictions: np.ndarray, probabilities: np.ndarray,
+                            first_index: int = 0) -> List[Dict[str, Any]]:
+        """Prediction dictionaries of consecutive windows."""
         # Convert back to original labels
         predicted_modes = self.label_encoder.inverse_transform(predictions)
         
-        # Create results
         results = []
         for i, (mode, prob) in enumerate(zip(predicted_modes, probabilities)):
             confidence = float(np.max(prob))
             results.append({
-                'window_index': i,
+                'window_index': first_index + i,
                 'transport_mode': mode,
                 'confidence': confidence,
                 'probabilities': dict(zip(self.label_encoder.classes_, prob.tolist()))
             })
-        
         return results
     
-    def predict_single_window(self, sensor_data: List[SensorData]) -> Dict[str, Any]:
+    def _extract_scaled(self, traces: Sequence[Union[SensorBatch, List[SensorData]]],
+                        plan: FeaturePlan) -> Tuple[List[int], Optional[np.ndarray]]:
+        """Window count of each trace and the scaled feature rows of all of them."""
+        # Extract features straight into the model's column order, evaluating
+        # only the parts of the feature graph the plan reads
+        matrices = [
+            self.feature_extractor.extract_feature_matrix(trace, self.feature_schema, plan)
+            for trace in traces
+        ]
+        counts = [len(matrix) for matrix in matrices]
+        if not sum(counts):
+            return counts, None
+        
+        X = np.concatenate(matrices) if len(matrices) > 1 else matrices[0]
+        return counts, self._scale(X)
+    
+    def _score(self, X_scaled: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Encoded class and class probabilities of each row from the full model."""
+        # The compiled forest yields classes and probabilities in one pass over the trees
+        if self.compiled_model is not None:
+            return self.compiled_model.predict(X_scaled)
+        return self.model.predict(X_scaled), self.model.predict_proba(X_scaled)
+    
+    def _score_cascade(self, traces: Sequence[Union[SensorBatch, List[SensorData]]]
+                       ) -> Tuple[List[int], np.ndarray, np.ndarray]:
+        """
+        Score windows with the first stage, falling back to the full model below the threshold.
+        
+        Features are extracted per trace, so a trace with any unsure window
+        is extracted in full once; only its unsure windows are re-scored.
+        """
+        counts, X_cheap = self._extract_scaled(traces, self.cascade.plan)
+        if not sum(counts):
+            return counts, None, None
+        
+        predictions, probabilities = self.cascade.predict(X_cheap)
+        unsure = probabilities.max(axis=1) < self.cascade_threshold
+        self.cascade_stats['windows'] += len(unsure)
+        self.cascade_stats['exits'] += int(len(unsure) - unsure.sum())
+        
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        retraced = [i for i, (start, stop) in enumerate(zip(offsets[:-1], offsets[1:])) if unsure[start:stop].any()]
+        if retraced:
+            _, X_full = self._extract_scaled([traces[i] for i in retraced], self.feature_plan)
+            rows = np.concatenate([np.arange(offsets[i], offsets[i + 1]) for i in retraced])
+            full_predictions, full_probabilities = self._score(X_full[unsure[rows]])
+            
+            rescored = rows[unsure[rows]]
+            predictions[rescored] = full_predictions
+            probabilities[rescored] = full_probabilities
+        
+        return counts, predictions, probabilities
+    
+    def _build_feature_plan(self) -> FeaturePlan:
+        """
+        Feature graph nodes behind the columns the trained model splits on.
+        
+        Columns that no tree splits on cannot change a prediction, so the
+        intermediates only they need are skipped and the columns stay 0.0.
+        Models without tree ensembles get every column of their schema.
+        """
+        if self.compiled_model is not None:
+            return FeaturePlan(self.feature_schema.columns[i] for i in self.compiled_model.used_features())
+        
+        estimators = getattr(self.model, 'estimators_', None)
+        if estimators is None or not all(hasattr(estimator, 'tree_') for estimator in estimators):
+            return FeaturePlan(self.feature_schema.columns)
+        
+        used = set()
+        for estimator in estimators:
+            features = estimator.tree_.feature
+            used.update(features[features >= 0].tolist())
+        
+        return FeaturePlan(self.feature_schema.columns[i] for i in sorted(used))
+    
+    def _compile_model(self) -> Optional[CompiledForest]:
+        """Flat-array copy of the forest for fast inference, or None if the model is not a forest."""
+        try:
+            return CompiledForest.from_estimator(self.model)
+        except ValueError:
+            return None
+    
+    def _scale(self, X: np.ndarray) -> np.ndarray:
+        """Apply the fitted StandardScaler in place on a float32 feature matrix."""
+        X -= self.scaler.mean_
+        X /= self.scaler.scale_
+        return X
+    
+    def predict_single_window(self, sensor_data: Union[SensorBatch, List[SensorData]]) -> Dict[str, Any]:
         """
         Predict transport mode for a single window of sensor data.
         
         Args:
-            sensor_data: List of sensor data points (should be window_size length)
-            
+            sensor_data: Sensor data points (should be window_size length)
+        
         Returns:
             Prediction with mode and confidence
         """
         predictions = self.predict(sensor_data)
         return predictions[0] if predictions else None
     
-    def save_model(self):
-        """Save the trained model and preprocessing objects."""
+    def save_model(self, activate: bool = True):
+        """
+        Save the trained model and preprocessing objects.
+        
+        With a registry the model is published as a new version (made active
+        unless activate is False); otherwise it is written to model_path.
+        """
         if not self.is_trained:
             raise ValueError("No trained model to save")
         
-        model_data = {
+        model_data = self._model_data()
+        if self.registry is not None:
+            self.model_version = self.registry.publish(model_data, self.compiled_model, activate=activate)
+            print(f"Model saved to {self.registry.root} as {self.model_version}")
+            return
+        
+        joblib.dump(model_data, self.model_path)
+        print(f"Model saved to {self.model_path}")
+    
+    def export_portable(self, path: str):
+        """
+        Write the model as a portable NumPy archive that load_portable() serves without scikit-learn.
+        
+        Raises:
+            ValueError: If the model is untrained or not a forest
+        """
+        if not self.is_trained:
+            raise ValueError("No trained model to export")
+        PortableModel.from_model_data(self._model_data(), self.compiled_model).save(path)
+    
+    def _model_data(self) -> Dict[str, Any]:
+        """Model, preprocessing objects and metadata as saved to disk."""
+        return {
             'model': self.model,
             'scaler': self.scaler,
             'label_encoder': self.label_encoder,
             'feature_names': self.feature_names,
-            'feature_extractor_config': {
-                'window_size': self.feature_extractor.window_size,
-                'overlap': self.feature_extractor.overlap
-            },
+            'feature_schema': self.feature_schema.to_dict(),
+            'feature_extractor_config': self.feature_extractor.get_config(),
+            'cascade': self.cascade,
+            'metrics': self.training_metrics,
             'trained_at': datetime.now().isoformat()
         }
-        
-        joblib.dump(model_data, self.model_path)
-        print(f"Model saved to {self.model_path}")
     
-    def load_model(self) -> bool:
+    def load_model(self, version: Optional[str] = None, portable: bool = False) -> bool:
         """
         Load a trained model from disk.
         
+        Loads the given (or active) registry version, memory-mapped, when a
+        registry is configured and has one; otherwise the pickle at model_path.
+        
+        Args:
+            version: Registry version to load (defaults to the active one)
+            portable: Load the version's portable archive, if it has one, so
+                scikit-learn is never imported
+        
         Returns:
             True if model loaded successfully, False otherwise
         """
-        if not os.path.exists(self.model_path):
+        compiled_model = None
+        source = self.model_path
+        use_registry = self.registry is not None and (version or self.registry.active_version())
+        if not use_registry and not os.path.exists(self.model_path):
             print(f"No model found at {self.model_path}")
             return False
         
         try:
-            model_data = joblib.load(self.model_path)
-            
-            self.model = model_data['model']
-            self.scaler = model_data['scaler']
-            self.label_encoder = model_data['label_encoder']
-            self.feature_names = model_data['feature_names']
-            
-            # Recreate feature extractor with saved config
-            config = model_data['feature_extractor_config']
-            self.feature_extractor = FeatureExtractor(
-                window_size=config['window_size'],
-                overlap=config['overlap']
-            )
+            if use_registry and portable and self.registry.has_portable(version):
+                portable_model, version = self.registry.load_portable(version)
+                model_data, compiled_model = portable_model.as_model_data(), portable_model.compiled_model
+                source = f"{self.registry.root} version {version} (portable)"
+            elif use_registry:
+                model_data, compiled_model, version = self.registry.load(version)
+                source = f"{self.registry.root} version {version}"
+            else:
+                model_data = joblib.load(self.model_path)
             
-            self.is_trained = True
-            print(f"Model loaded from {self.model_path}")
+            self._restore(model_data, compiled_model)
+            self.model_version = version if use_registry else None
+            print(f"Model loaded from {source}")
             return True
             
         except Exception as e:
             print(f"Error loading model: {e}")
             return False
     
+    def load_portable(self, path: str) -> bool:
+        """
+        Load a portable archive written by export_portable(), importing only NumPy.
+        
+        Returns:
+            True if model loaded successfully, False otherwise
+        """
+        if not os.path.exists(path):
+            print(f"No model found at {path}")
+            return False
+        
+        try:
+            portable_model = PortableModel.load(path)
+            self._restore(portable_model.as_model_data(), portable_model.compiled_model)
+            self.model_version = None
+            print(f"Model loaded from {path} (portable)")
+            return True
+        
+        except Exception as e:
+            print(f"Error loading model: {e}")
+            return False
+    
+    def _restore(self, model_data: Dict[str, Any], compiled_model: Optional[CompiledForest]):
+        """Set up the prediction state from loaded model data."""
+        self.model = model_data['model']
+        self.scaler = model_data['scaler']
+        self.label_encoder = model_data['label_encoder']
+        self.feature_importances = model_data.get('feature_importances')
+        if self.feature_importances is None:
+            self.feature_importances = self.model.feature_importances_
+        self.feature_names = model_data['feature_names']
+        self.feature_schema = FeatureSchema.from_dict(
+            model_data.get('feature_schema'), self.feature_names
+        )
+        
+        unknown = self.feature_schema.unknown_columns()
+        if unknown:
+            print(f"Warning: model expects features the extractor does not produce: {unknown}")
+        self.compiled_model = compiled_model or self._compile_model()
+        self.feature_plan = self._build_feature_plan()
+        self.cascade = model_data.get('cascade')
+        self.training_metrics = model_data.get('metrics') or {}
+        
+        # Recreate feature extractor with saved config
+        config = model_data['feature_extractor_config']
+        self.feature_extractor = FeatureExtractor.from_config(config)
+        
+        self.is_trained = True
+    
     def get_feature_importance(self) -> Dict[str, float]:
         """Get feature importance scores."""
         if not self.is_trained:
             return {}
         
-        return dict(zip(self.feature_names, self.model.feature_importances_))
+        return dict(zip(self.feature_names, self.feature_importances))
     
-    def generate_synthetic_data(self, num_samples: int = 1000) -> List[Dict[str, Any]]:
+    def generate_synthetic_data(self, num_samples: int = 1000, seed: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Generate synthetic training data for demonstration purposes.
         
+        For more samples than fit in memory, stream them with
+        SyntheticDataGenerator.iter_samples() or fill_feature_store() instead.
+        
         Args:
             num_samples: Number of samples to generate
-            
+            seed: Random seed, for reproducible data
+        
         Returns:
             List of synthetic training samples
         """
         print(f"Generating {num_samples} synthetic training samples...")
-        
-        synthetic_data = []
-        samples_per_mode = num_samples // len(self.TRANSPORT_MODES)
-        
-        for mode in self.TRANSPORT_MODES:
-            for _ in range(samples_per_mode):
-                # Generate sensor data based on transport mode characteristics
-                sensor_data = self._generate_synthetic_sensor_data(mode)
-                
-                synthetic_data.append({
-                    'sensor_data': sensor_data,
-                    'transport_mode': mode
-                })
-        
-        return synthetic_data
+        return self.synthetic_data_generator(seed).generate(num_samples)
     
-    def _generate_synthetic_sensor_data(self, transport_mode: str) -> List[Dict[str, Any]]:
-        """Generate synthetic sensor data for a specific transport mode."""
-        window_size = self.feature_extractor.window_size
-        sensor_data = []
-        
-        # Base parameters for each transport mode
-        mode_params = {
-            'walking': {
-                'accel_std': 0.5,
-                'speed_mean': 1.4,
-                'speed_std': 0.3,
-                'vibration_freq': 2.0
-            },
-            'cycling': {
-                'accel_std': 0.8,
-                'speed_mean': 5.0,
-                'speed_std': 1.0,
-                'vibration_freq': 1.5
-            },
-            'bus': {
-                'accel_std': 1.2,
-                'speed_mean': 12.0,
-                'speed_std': 3.0,
-                'vibration_freq': 0.8
-            },
-            'train': {
-                'accel_std': 0.6,
-                'speed_mean': 25.0,
-                'speed_std': 5.0,
-                'vibration_freq': 0.5
-            },
-            'tram': {
-                'accel_std': 0.7,
-                'speed_mean': 15.0,
-                'speed_std': 4.0,
-                'vibration_freq': 0.6
-            },
-            'car': {
-                'accel_std': 1.0,
-                'speed_mean': 20.0,
-                'speed_std': 8.0,
-                'vibration_freq': 0.3
-            },
-            'stationary': {
-                'accel_std': 0.1,
-                'speed_mean': 0.0,
-                'speed_std': 0.1,
-                'vibration_freq': 0.0
-            }
-        }
-        
-        params = mode_params.get(transport_mode, mode_params['walking'])
-        
-        for i in range(window_size):
-            timestamp = datetime.now().timestamp() + i * 0.1
-            
-            # Generate accelerometer data with mode-specific characteristics
-            base_accel = 9.81  # Gravity
-            vibration = params['vibration_freq'] * np.sin(2 * np.pi * i * 0.1)
-            
-            acceleration_x = np.random.normal(0, params['accel_std']) + vibration
-            acceleration_y = np.random.normal(0, params['accel_std']) + vibration
-            acceleration_z = base_accel + np.random.normal(0, params['accel_std'])
-            
-            # Generate gyroscope data
-            gyroscope_x = np.random.normal(0, 0.1)
-            gyroscope_y = np.random.normal(0, 0.1)
-            gyroscope_z = np.random.normal(0, 0.1)
-            
-            # Generate GPS data
-            speed = np.random.normal(params['speed_mean'], params['speed_std'])
-            speed = max(0, speed)  # Speed cannot be negative
-            
-            # Simulate movement for non-stationary modes
-            if transport_mode != 'stationary':
-                latitude = -37.8136 + i * 0.0001  # Melbourne coordinates
-                longitude = 144.9631 + i * 0.0001
-                heading = np.random.uniform(0, 360)
-            else:
-                latitude = -37.8136
-                longitude = 144.9631
-                heading = 0
-            
-            sensor_data.append({
-                'timestamp': timestamp,
-                'acceleration_x': float(acceleration_x),
-                'acceleration_y': float(acceleration_y),
-                'acceleration_z': float(acceleration_z),
-                'gyroscope_x': float(gyroscope_x),
-                'gyroscope_y': float(gyroscope_y),
-                'gyroscope_z': float(gyroscope_z),
-                'latitude': float(latitude),
-                'longitude': float(longitude),
-                'speed': float(speed),
-                'heading': float(heading),
-                'accuracy': 5.0
-            })
-        
-        return sensor_data 
\ No newline at end of file
+    def synthetic_data_generator(self, seed: Optional[int] = None) -> SyntheticDataGenerator:
+        """Synthetic data generator whose traces fill one window of this detector's extractor."""
+        points = trace_points(self.feature_extractor.window_size, self.feature_extractor.sample_rate)
+        return SyntheticDataGenerator(points, self.TRANSPORT_MODES, seed=seed) 
\ No newline at end of file
@@ -14,6 +14,8 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 
 from ml_service.transport_mode_detector import TransportModeDetector
+from ml_service.feature_store import FeatureStore
+from ml_service.model_registry import ModelRegistry
 from ml_service.gtfs_service import GTFSService
 
 
@@ -37,7 +39,7 @@ def train_model(samples: int = 1000, force_retrain: bool = False):
     """Train the transport mode detection model."""
     print(f"Training transport mode detection model with {samples} samples...")
     
-    detector = TransportModeDetector()
+    detector = TransportModeDetector(feature_store=FeatureStore(), registry=ModelRegistry())
     
     # Check if model already exists
     if detector.load_model() and not force_retrain:
@@ -58,7 +60,7 @@ def train_model(samples: int = 1000, force_retrain: bool = False):
         print("\n=== Training Results ===")
         print(f"Accuracy: {metrics['accuracy']:.3f}")
         print(f"Cross-validation score: {metrics['cv_mean']:.3f} (+/- {metrics['cv_std'] * 2:.3f})")
-        print(f"Model saved to: {detector.model_path}")
+        print(f"Model saved as version {detector.model_version}")
         
         # Show top features
         print("\n=== Top 10 Most Important Features ===")
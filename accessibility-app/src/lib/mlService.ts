@@ -48,6 +48,32 @@ export interface TrainingResponse {
   metrics?: Record<string, number>;
 }
 
+export interface LivePredictionMessage {
+  type: 'predictions';
+  predictions: PredictionResult[];
+  samples_received: number;
+  windows_emitted: number;
+  chunks: number;
+}
+
+export interface LiveStream {
+  /** Send readings recorded since the previous call; returns false while the server is catching up */
+  send(sensorData: SensorDataPoint[]): boolean;
+  close(): void;
+}
+
+export interface JourneyInput {
+  journey_id: string;
+  sensor_data: SensorDataPoint[];
+}
+
+export interface JourneyPredictionResult {
+  index: number;
+  journey_id: string | null;
+  predictions?: PredictionResult[];
+  error?: string;
+}
+
 export interface HybridInferenceResult extends PredictionResult {
   evidence: {
     sensor_based: boolean;
@@ -205,25 +231,110 @@ class MLService {
     return response.json();
   }
 
+  /**
+   * Open a live prediction stream over a WebSocket.
+   * Send each new chunk of readings once; predictions arrive as windows complete.
+   */
+  openLiveStream(
+    deviceId: string,
+    onPredictions: (message: LivePredictionMessage) => void,
+    onError: (detail: unknown) => void = (detail) => console.error('Live prediction error:', detail)
+  ): LiveStream {
+    const url = `${this.baseUrl.replace(/^http/, 'ws')}/ws/predict?device_id=${encodeURIComponent(deviceId)}`;
+    const socket = new WebSocket(url);
+    const queued: string[] = [];
+    let throttled = false;
+
+    socket.onopen = () => {
+      queued.splice(0).forEach((message) => socket.send(message));
+    };
+    socket.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      if (message.type === 'predictions') {
+        throttled = false;
+        onPredictions(message);
+      } else if (message.type === 'backpressure') {
+        throttled = true;
+      } else if (message.type === 'error') {
+        onError(message.detail);
+      }
+    };
+    socket.onerror = (event) => onError(event);
+
+    return {
+      send: (sensorData: SensorDataPoint[]) => {
+        const message = JSON.stringify({ sensor_data: sensorData });
+        if (socket.readyState === WebSocket.CONNECTING) {
+          queued.push(message);
+        } else if (socket.readyState === WebSocket.OPEN) {
+          socket.send(message);
+        }
+        return !throttled;
+      },
+      close: () => socket.close(),
+    };
+  }
+
+  /**
+   * Predict transport modes for many journeys in one request.
+   * Results arrive one journey at a time, in completion order; resolves with the number of journeys scored.
+   */
+  async predictJourneys(
+    journeys: JourneyInput[],
+    onResult: (result: JourneyPredictionResult) => void
+  ): Promise<number> {
+    const response = await fetch(`${this.baseUrl}/predict/batch`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/x-ndjson',
+      },
+      body: journeys.map((journey) => JSON.stringify(journey)).join('\n'),
+    });
+
+    if (!response.ok || !response.body) {
+      throw new Error(`Batch prediction failed: ${response.statusText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    let scored = 0;
+    for (;;) {
+      const { done, value } = await reader.read();
+      buffered += decoder.decode(value, { stream: !done });
+      const lines = buffered.split('\n');
+      buffered = done ? '' : lines.pop() ?? '';
+      for (const line of lines.filter((line) => line.trim())) {
+        const result = JSON.parse(line);
+        if (result.done) {
+          return scored;
+        }
+        scored += 1;
+        onResult(result);
+      }
+      if (done) {
+        throw new Error('Batch prediction ended before all journeys were scored');
+      }
+    }
+  }
+
   /**
    * Perform hybrid inference (combines sensor data with GTFS)
-   * This is a wrapper that uses the basic prediction for now
-   * In a full implementation, this would call a hybrid inference endpoint
    */
   async hybridInference(sensorData: SensorDataPoint[]): Promise<HybridInferenceResult[]> {
-    // For now, use the basic prediction and add hybrid evidence structure
-    const predictions = await this.predictTransportMode(sensorData);
-    
-    return predictions.map(pred => ({
-      ...pred,
-      evidence: {
-        sensor_based: true,
-        gtfs_matched: false, // Would be determined by hybrid inference
-        gtfs_vehicles: [],
-        spatial_matches: [],
-        temporal_matches: [],
+    const response = await fetch(`${this.baseUrl}/infer/hybrid`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
       },
-    }));
+      body: JSON.stringify({ sensor_data: sensorData }),
+    });
+
+    if (!response.ok) {
+      throw new Error(`Hybrid inference failed: ${response.statusText}`);
+    }
+
+    return response.json();
   }
 
   /**
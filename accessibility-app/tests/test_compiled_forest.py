@@ -0,0 +1,77 @@
+"""
+Parity tests for the flat-array forest.
+CompiledForest must reproduce scikit-learn's predict and predict_proba for the
+same forests and inputs, also after a save/load round trip.
+"""
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from ml_service.compiled_forest import PARITY_TOLERANCE, CompiledForest, check_parity
+
+
+MODES = np.array(['walking', 'cycling', 'bus', 'train', 'car'])
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    """Training windows and fresh windows with transport mode labels."""
+    X, y = make_classification(n_samples=1500, n_features=20, n_informative=10,
+                               n_classes=len(MODES), random_state=0)
+    return X[:1000], MODES[y[:1000]], X[1000:]
+
+
+@pytest.fixture(scope='module', params=[
+    RandomForestClassifier(n_estimators=30, random_state=0),
+    RandomForestClassifier(n_estimators=30, min_samples_leaf=5, max_depth=8, random_state=0),
+    RandomForestClassifier(n_estimators=30, class_weight='balanced', random_state=0),
+    ExtraTreesClassifier(n_estimators=30, min_samples_leaf=3, random_state=0),
+], ids=['default', 'shallow', 'weighted', 'extra_trees'])
+def model(request, dataset):
+    X_train, y_train, _ = dataset
+    return request.param.fit(X_train, y_train)
+
+
+def test_matches_sklearn(model, dataset):
+    _, _, X = dataset
+    report = check_parity(model, X)
+    
+    assert report['max_probability_difference'] <= PARITY_TOLERANCE
+    assert report['prediction_mismatches'] == 0
+
+
+def test_single_window(model, dataset):
+    _, _, X = dataset
+    predictions, probabilities = CompiledForest.from_estimator(model).predict(X[:1])
+    
+    assert predictions.tolist() == model.predict(X[:1]).tolist()
+    np.testing.assert_allclose(probabilities, model.predict_proba(X[:1]), rtol=0, atol=PARITY_TOLERANCE)
+
+
+def test_save_load_round_trip(model, dataset, tmp_path):
+    _, _, X = dataset
+    compiled = CompiledForest.from_estimator(model)
+    compiled.save(str(tmp_path))
+    loaded = CompiledForest.load(str(tmp_path))
+    
+    predictions, probabilities = loaded.predict(X)
+    expected_predictions, expected_probabilities = compiled.predict(X)
+    assert predictions.tolist() == expected_predictions.tolist()
+    np.testing.assert_array_equal(probabilities, expected_probabilities)
+
+
+def test_used_features(model):
+    expected = set()
+    for estimator in model.estimators_:
+        expected.update(estimator.tree_.feature[estimator.tree_.children_left >= 0].tolist())
+    
+    assert CompiledForest.from_estimator(model).used_features().tolist() == sorted(expected)
+
+
+def test_rejects_non_forest(dataset):
+    X_train, y_train, _ = dataset
+    with pytest.raises(ValueError):
+        CompiledForest.from_estimator(LogisticRegression(max_iter=200).fit(X_train, y_train))
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Parity tests for the per-window feature kernels.
+Every available backend is run over the same random windows and compared
+with a row-by-row NumPy/SciPy reference; the numba backend is skipped when
+numba is not installed.
+"""
+
+import numpy as np
+import pytest
+from scipy import stats
+from scipy.signal import find_peaks
+
+from ml_service import kernels
+
+
+# Constant rows are included on purpose; scipy warns about them
+pytestmark = pytest.mark.filterwarnings('ignore:Precision loss occurred:RuntimeWarning')
+
+
+@pytest.fixture(params=['numpy', 'numba'])
+def backend(request):
+    """Select a kernel backend for one test and restore the previous one after it."""
+    if request.param == 'numba':
+        pytest.importorskip('numba')
+    active = kernels.BACKEND
+    kernels.select_backend(request.param)
+    yield request.param
+    kernels.select_backend(active)
+
+
+@pytest.fixture(params=[0, 1, 2])
+def windows(request):
+    """Random windows with plateaus, constant rows, sign changes and NaNs."""
+    return kernels._parity_windows(300, 50, seed=request.param)
+
+
+def assert_parity(actual, expected):
+    difference = kernels._max_relative_difference(expected, actual)
+    assert difference <= kernels.PARITY_TOLERANCE, difference
+
+
+def test_window_statistics(backend, windows):
+    data = np.nan_to_num(windows, nan=0.0)
+    features = kernels.window_statistics(data)
+    
+    assert_parity(features['mean'], np.mean(data, axis=1))
+    assert_parity(features['std'], np.std(data, axis=1))
+    assert_parity(features['skewness'], stats.skew(data, axis=1))
+    assert_parity(features['kurtosis'], stats.kurtosis(data, axis=1))
+    crossings = [np.count_nonzero(np.diff(np.signbit(row))) for row in data]
+    assert_parity(features['zero_crossing_rate'], np.array(crossings) / data.shape[1])
+
+
+def test_window_statistics_selects_groups(backend, windows):
+    data = np.nan_to_num(windows, nan=0.0)
+    assert set(kernels.window_statistics(data, crossings=False)) == {'mean', 'std', 'skewness', 'kurtosis'}
+    assert set(kernels.window_statistics(data, moments=False)) == {'zero_crossing_rate'}
+
+
+def test_peak_statistics(backend, windows):
+    expected = np.full((len(windows), 3), np.nan)
+    for i, row in enumerate(windows):
+        peaks, _ = find_peaks(row, height=np.mean(row) + np.std(row))
+        expected[i, 0] = len(peaks)
+        if len(peaks):
+            expected[i, 1:] = np.mean(row[peaks]), np.std(row[peaks])
+    
+    for actual, column in zip(kernels.peak_statistics(windows), expected.T):
+        assert_parity(actual, column)
+
+
+def test_path_distances(backend):
+    rng = np.random.default_rng(0)
+    latitudes = -37.8136 + np.cumsum(rng.normal(0, 1e-4, (200, 50)), axis=1)
+    longitudes = 144.9631 + np.cumsum(rng.normal(0, 1e-4, (200, 50)), axis=1)
+    
+    expected = np.empty((len(latitudes), 4))
+    for i, (lat, lon) in enumerate(zip(latitudes, longitudes)):
+        steps = kernels.haversine(lat[:-1], lon[:-1], lat[1:], lon[1:])
+        expected[i] = np.sum(steps), np.mean(steps), np.std(steps), kernels.haversine(lat[0], lon[0], lat[-1], lon[-1])
+    
+    for actual, column in zip(kernels.path_distances(latitudes, longitudes), expected.T):
+        assert_parity(actual, column)
+
+
+def test_check_parity():
+    pytest.importorskip('numba')
+    report = kernels.check_parity()
+    
+    assert any(check.startswith('numba.') for check in report)
+    assert all(difference <= kernels.PARITY_TOLERANCE for difference in report.values()), report
\ No newline at end of file